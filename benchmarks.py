@@ -1,7 +1,22 @@
 """Benchmark redis tools"""
+import functools
+import random
+import threading
+import time
 import timeit
 import redis
 from rdt import RedisLifoQueue
+from rdt.bloom_filters import (
+    RedisBitmapBloomFilter,
+    RedisCountingBloomFilter,
+    RedisScalableBloomFilter,
+)
+from rdt.bloom_sizing import bloom_sizing, expected_error_rate
+from rdt.serializers import (
+    SERIALIZERS,
+    CompressedItemSerializer,
+    JsonItemSerializer,
+)
 
 REDIS_DB = "redis://localhost:6379/15"
 
@@ -27,6 +42,43 @@ def data_generator(number, bulk=False):
             yield bulk_elems
 
 
+def html_item_generator(number, seed=0):
+    """Generate crawler-like items with 5-50 KB of html-derived text"""
+    rnd = random.Random(seed)
+    words = ["<div>", "</div>", "<p>", "</p>", "news", "price", "item"]
+    words += ["".join(rnd.choices("abcdefghij", k=8)) for _ in range(200)]
+    for index in range(number):
+        size = rnd.randint(5000, 50000)
+        text = []
+        while size > 0:
+            word = rnd.choice(words)
+            text.append(word)
+            size -= len(word) + 1
+        yield {
+            "count": index,
+            "url": "https://example.com/page/{}".format(index),
+            "html": " ".join(text),
+        }
+
+
+def crawler_item_generator(number, seed=0):
+    """Generate small crawler items: url, metadata and extracted fields"""
+    rnd = random.Random(seed)
+    for index in range(number):
+        yield {
+            "url": "https://example.com/catalog/{}?page={}".format(
+                rnd.randint(1, 10**6), index
+            ),
+            "status": 200,
+            "fetched_at": 1600000000 + index,
+            "title": "Item title number {}".format(index),
+            "price": round(rnd.uniform(1, 1000), 2),
+            "in_stock": bool(index % 2),
+            "tags": ["tag{}".format(rnd.randint(1, 50)) for _ in range(5)],
+            "headers": {"content-type": "text/html", "server": "nginx"},
+        }
+
+
 def benchmark_lifo_queue(requests_num=100):
     """Benchmark redis queue"""
     pool = redis.ConnectionPool.from_url(REDIS_DB)
@@ -68,6 +120,201 @@ def benchmark_lifo_queue_bulk(requests_num=100):
     r.delete("rdt-bench-queue")
 
 
+def benchmark_lifo_queue_get_block_bulk(requests_num=1000, max_items=100):
+    """Benchmark blocking consumer draining items pushed by background
+    producer, `get_block` used when `max_items` is 1, `get_block_bulk`
+    otherwise.
+
+    :returns: tuple -- throughput (items/sec), mean latency of blocking call
+    """
+    pool = redis.ConnectionPool.from_url(REDIS_DB)
+    r = redis.Redis(connection_pool=pool)
+    queue = RedisLifoQueue("rdt-bench:queue", r=r)
+
+    def produce():
+        for elements in data_generator(requests_num, bulk=True):
+            queue.put_bulk(elements)
+
+    producer = threading.Thread(target=produce)
+    started = time.perf_counter()
+    producer.start()
+
+    received, calls = 0, 0
+    while received < requests_num:
+        if max_items == 1:
+            received += int(queue.get_block(timeout=1) is not None)
+        else:
+            received += len(queue.get_block_bulk(max_items, timeout=1))
+        calls += 1
+
+    elapsed = time.perf_counter() - started
+    producer.join()
+    assert len(queue) == 0
+    return requests_num / elapsed, elapsed / calls
+
+
+def benchmark_lifo_queue_get_bulk(requests_num=1000, loop=False):
+    """Benchmark draining the queue with one `get_bulk` call against
+    popping items one by one in a loop (one round trip per item)"""
+    pool = redis.ConnectionPool.from_url(REDIS_DB)
+    r = redis.Redis(connection_pool=pool)
+    queue = RedisLifoQueue("rdt-bench:queue", r=r)
+
+    queue.put_bulk(list(data_generator(requests_num)))
+    assert len(queue) == requests_num
+
+    if loop:
+        elems = []
+        for _ in range(requests_num):
+            item = r.lpop(queue.name)
+            if item is None:
+                break
+            elems.append(queue.serializer.loads(item))
+    else:
+        elems = queue.get_bulk(requests_num)
+
+    assert len(elems) == requests_num
+    assert len(queue) == 0
+
+
+def benchmark_serializer_storage(serializer, items_num=200):
+    """Store crawler-like items with given serializer
+
+    :returns: tuple -- bytes stored in redis per item, CPU seconds per item
+        for dumps and for loads
+    """
+    pool = redis.ConnectionPool.from_url(REDIS_DB)
+    r = redis.Redis(connection_pool=pool)
+    queue = RedisLifoQueue("rdt-bench:queue", r=r, serializer=serializer)
+    items = list(html_item_generator(items_num))
+
+    started = time.process_time()
+    payloads = [queue.serializer.dumps(item) for item in items]
+    dumps_time = time.process_time() - started
+    r.rpush(queue.name, *payloads)
+    stored = r.memory_usage(queue.name, samples=0)
+
+    started = time.process_time()
+    loaded = [
+        queue.serializer.loads(item) for item in r.lrange(queue.name, 0, -1)
+    ]
+    loads_time = time.process_time() - started
+
+    assert loaded == items
+    r.delete(queue.name)
+    return stored / items_num, dumps_time / items_num, loads_time / items_num
+
+
+def benchmark_serializers(items, repeat=3):
+    """Measure dumps/loads throughput and payload size of every registered
+    serializer, serializers of not installed libraries are skipped
+
+    :returns: dict -- name: (dumps items/sec, loads items/sec, mean bytes)
+    """
+    results = {}
+    for name, serializer_class in SERIALIZERS.items():
+        try:
+            serializer = serializer_class()
+        except ImportError:
+            continue
+
+        dumps_time = min(
+            timeit.repeat(
+                lambda s=serializer: [s.dumps(item) for item in items],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        payloads = [serializer.dumps(item) for item in items]
+        loads_time = min(
+            timeit.repeat(
+                lambda s=serializer: [s.loads(p) for p in payloads],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        size = sum(len(p) for p in payloads) / len(payloads)
+        results[name] = (len(items) / dumps_time, len(items) / loads_time, size)
+    return results
+
+
+def url_generator(number, prefix="catalog"):
+    """Generate synthetic urls, distinct for distinct prefixes"""
+    for index in range(number):
+        yield "https://example.com/{}/{}?page={}".format(
+            prefix, index, index % 50
+        )
+
+
+def delete_bloom_filter(r, name):
+    """Delete keys of bloom filter `name` of any backend: bitmap (counters)
+    with `name:*` side keys and hash tagged `{name}`, `{name}:N` keys of
+    scalable filter, found with `SCAN`"""
+    keys = [name, "{%s}" % name]
+    for pattern in ("{}:*".format(name), "{%s}:*" % name):
+        keys.extend(r.scan_iter(match=pattern, count=1000))
+    r.delete(*keys)
+
+
+def benchmark_bloom_filter(
+    filter_class,
+    items_num=100000,
+    capacity=100000,
+    error_rate=0.01,
+    probes_num=100000,
+    batch_size=1000,
+):
+    """Insert `items_num` synthetic urls into bloom filter in batches, then
+    check `probes_num` never inserted urls to measure real false positive
+    rate.
+
+    :returns: dict -- insert and check throughput (keys/sec), measured and
+        theoretical false positive rate, memory in redis and theoretical
+        memory in bytes
+    """
+    pool = redis.ConnectionPool.from_url(REDIS_DB)
+    r = redis.Redis(connection_pool=pool)
+    # filter left by interrupted run
+    delete_bloom_filter(r, "rdt-bench:bloom")
+    bloom = filter_class(
+        "rdt-bench:bloom", r=r, capacity=capacity, error_rate=error_rate
+    )
+    items = list(url_generator(items_num))
+    probes = list(url_generator(probes_num, prefix="unseen"))
+
+    started = time.perf_counter()
+    for index in range(0, items_num, batch_size):
+        bloom.add_bulk(items[index : index + batch_size])
+    insert_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    positives = 0
+    for index in range(0, probes_num, batch_size):
+        positives += sum(bloom.exists_bulk(probes[index : index + batch_size]))
+    check_time = time.perf_counter() - started
+
+    counter_bits = 4 if filter_class is RedisCountingBloomFilter else 1
+    sizing = bloom_sizing(capacity, error_rate, counter_bits)
+    result = {
+        "insert_rate": items_num / insert_time,
+        "check_rate": probes_num / check_time,
+        "error_rate": positives / probes_num,
+        "expected_error_rate": expected_error_rate(
+            sizing.bits, sizing.hashes, items_num
+        ),
+        "memory": bloom.sizeof(),
+        "expected_memory": sizing.memory,
+    }
+    if filter_class is RedisScalableBloomFilter:
+        # overall bound, sub-filters are sized by the filter itself
+        result["expected_error_rate"] = bloom.info()["Estimated error rate"]
+        result["expected_memory"] = sum(
+            (f["bits"] + 7) // 8 for f in bloom.filters()
+        )
+    delete_bloom_filter(r, bloom.name)
+    return result
+
+
 if __name__ == "__main__":
     print(
         "RedisLifoQueue put/get performance: {}".format(
@@ -87,3 +334,79 @@ if __name__ == "__main__":
             )
         )
     )
+    print(
+        "RedisLifoQueue drain 1000 items with LPOP loop: {}".format(
+            timeit.timeit(
+                "benchmark_lifo_queue_get_bulk(loop=True)",
+                setup="from __main__ import benchmark_lifo_queue_get_bulk",
+                number=10,
+            )
+        )
+    )
+    print(
+        "RedisLifoQueue drain 1000 items with get_bulk: {}".format(
+            timeit.timeit(
+                "benchmark_lifo_queue_get_bulk()",
+                setup="from __main__ import benchmark_lifo_queue_get_bulk",
+                number=10,
+            )
+        )
+    )
+    for max_items in (1, 10, 100):
+        throughput, latency = benchmark_lifo_queue_get_block_bulk(
+            requests_num=10000, max_items=max_items
+        )
+        print(
+            "RedisLifoQueue get_block_bulk({}): {:.0f} items/sec, "
+            "{:.6f} sec per call".format(max_items, throughput, latency)
+        )
+    for name, serializer in (
+        ("json", JsonItemSerializer),
+        ("json+zlib", CompressedItemSerializer),
+        ("json+zlib-1", functools.partial(CompressedItemSerializer, level=1)),
+        (
+            "json+lzma",
+            functools.partial(CompressedItemSerializer, codec="lzma"),
+        ),
+    ):
+        stored, dumps_time, loads_time = benchmark_serializer_storage(
+            serializer
+        )
+        print(
+            "{}: {:.0f} bytes per item, dumps {:.6f} sec, "
+            "loads {:.6f} sec per item".format(
+                name, stored, dumps_time, loads_time
+            )
+        )
+    for title, items in (
+        ("small items", list(crawler_item_generator(10000))),
+        ("html items", list(html_item_generator(200))),
+    ):
+        print("Serializers, {}:".format(title))
+        for name, (dumps_rate, loads_rate, size) in benchmark_serializers(
+            items
+        ).items():
+            print(
+                "  {:<16} dumps {:>10.0f}/sec, loads {:>10.0f}/sec, "
+                "{:>8.0f} bytes".format(name, dumps_rate, loads_rate, size)
+            )
+    for name, filter_class, capacity in (
+        ("bitmap", RedisBitmapBloomFilter, 100000),
+        ("bitmap, 2x over capacity", RedisBitmapBloomFilter, 50000),
+        ("counting", RedisCountingBloomFilter, 100000),
+        ("scalable from 1/8", RedisScalableBloomFilter, 12500),
+    ):
+        res = benchmark_bloom_filter(filter_class, capacity=capacity)
+        print(
+            "Bloom {}: insert {:.0f}/sec, check {:.0f}/sec, "
+            "fpr {:.4f} (theory {:.4f}), memory {} bytes "
+            "(theory {})".format(
+                name,
+                res["insert_rate"],
+                res["check_rate"],
+                res["error_rate"],
+                res["expected_error_rate"],
+                res["memory"],
+                res["expected_memory"],
+            )
+        )
@@ -1,5 +1,19 @@
 """Top level imports"""
 from .queues import RedisLifoQueue
 from .unique_queue import RedisUniqueQueue
-from .filters import RedisSetFilter, RedisBucketFilter
+from .filters import RedisSetFilter, RedisBucketFilter, RedisGenerationalFilter
 from .counters import RedisCounters
+from .reliable_queue import RedisReliableQueue
+from .sharded_queue import RedisShardedQueue
+from .priority_queue import RedisPriorityQueue
+from .delayed_queue import RedisDelayedQueue
+from .stream_queue import RedisStreamQueue
+from .prefetch import PrefetchingConsumer
+from .producer import BufferedProducer
+from .cache import MembershipCache
+from .bloom_filters import (
+    RedisBitmapBloomFilter,
+    RedisCountingBloomFilter,
+    RedisScalableBloomFilter,
+)
+from .bloom_snapshot import BloomSnapshot
@@ -0,0 +1,11 @@
+"""Asyncio versions of data structures, built on top of `redis.asyncio`
+
+Classes share names and methods with synchronous ones, but every method
+doing network round trip is coroutine. Since `__len__` can't be awaited,
+length exposed as `length()` coroutine.
+"""
+
+from .queues import RedisLifoQueue
+from .unique_queue import RedisUniqueQueue
+from .filters import RedisSetFilter, RedisBucketFilter
+from .counters import RedisCounters
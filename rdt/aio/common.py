@@ -0,0 +1,57 @@
+"""Asyncio versions of common functions"""
+import typing as t
+import weakref
+
+import redis.asyncio as aioredis
+import redis.exceptions
+
+from rdt.common import LPOP_BULK_SCRIPT, lpop_count_unsupported
+
+# cache server capabilities and registered scripts per client instance
+_LPOP_COUNT_SUPPORTED: "weakref.WeakKeyDictionary[t.Any, bool]" = (
+    weakref.WeakKeyDictionary()
+)
+_LPOP_BULK_SCRIPTS: "weakref.WeakKeyDictionary[t.Any, t.Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def lpop_bulk_script(db: aioredis.Redis) -> t.Any:
+    """Script popping elements for servers without LPOP count, registered
+    once per client instance
+
+    :param db: asyncio redis client instance
+    :returns: AsyncScript -- callable script object
+    """
+    try:
+        return _LPOP_BULK_SCRIPTS[db]
+    except KeyError:
+        script = db.register_script(LPOP_BULK_SCRIPT)
+        _LPOP_BULK_SCRIPTS[db] = script
+        return script
+
+
+async def lpop_bulk(db: aioredis.Redis, name: str, count: int) -> t.List[bytes]:
+    """Remove and return up to `count` elements from the head of the list
+    in one round trip. `LPOP` with count is tried once per client, script
+    is used if server doesn't support it (redis < 6.2).
+
+    :param db: asyncio redis client instance
+    :param name: list key
+    :param count: max number of elements to pop
+    :returns: list -- raw (not deserialized) elements
+    """
+    if count <= 0:
+        return []
+    supported = _LPOP_COUNT_SUPPORTED.get(db)
+    if supported is not False:
+        try:
+            items = await db.execute_command("LPOP", name, count)
+        except redis.exceptions.ResponseError as err:
+            if supported or not lpop_count_unsupported(err):
+                raise
+            _LPOP_COUNT_SUPPORTED[db] = False
+        else:
+            _LPOP_COUNT_SUPPORTED[db] = True
+            return list(items or [])
+    return list(await lpop_bulk_script(db)(keys=[name], args=[count]) or [])
@@ -0,0 +1,29 @@
+"""Asyncio version of counters stored into redis hashmap"""
+import redis.asyncio as aioredis
+
+
+class RedisCounters:
+    """Store counters into redis hashmap data structure"""
+
+    __slots__ = ["__db", "name"]
+
+    @property
+    def db(self):
+        """Getter for redis database client"""
+        return self.__db
+
+    def __init__(self, name: str, r: aioredis.Redis):
+        self.__db = r
+        self.name = name
+
+    async def inc(self, key: str, val: int = 1):
+        """Increment key by value"""
+        return await self.db.hincrby(self.name, key, amount=val)
+
+    async def get(self, key):
+        """Return key value"""
+        return await self.db.hget(self.name, key)
+
+    async def keys(self):
+        """Return list of keys"""
+        return await self.db.hkeys(self.name)
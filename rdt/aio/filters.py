@@ -0,0 +1,209 @@
+"""Asyncio versions of filters"""
+import typing as t
+
+import mmh3
+import redis.asyncio as aioredis
+from rdt.filters import DIGEST_BITS, key_digest
+
+
+class RedisSetFilter:
+    """Trivial redis based filter, utilize set datatype to store values
+
+    See `rdt.filters.RedisSetFilter` for details.
+    """
+
+    __slots__ = ["__db", "name", "digest_bits"]
+
+    @property
+    def db(self) -> aioredis.Redis:
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: aioredis.Redis,
+        digest_bits: t.Optional[int] = None,
+    ):
+        """RedisSetFilter
+
+        :param name: filter name
+        :param r: asyncio redis client instance
+        :param digest_bits: store 64 or 128 bit digests of values,
+            None (the default) to store raw values
+        """
+        assert digest_bits is None or digest_bits in DIGEST_BITS
+        self.__db = r
+        self.name = name
+        self.digest_bits = digest_bits
+
+    def _member(self, value: t.Any) -> t.Any:
+        if self.digest_bits is None:
+            return value
+        return key_digest(value, self.digest_bits)
+
+    async def to_set(self) -> set:
+        """Return redis set as python set object
+
+        :returns: set -- set of items in redis structure (raw digests
+            in digest mode)
+        """
+        members = await self.db.smembers(self.name)
+        if self.digest_bits is not None:
+            return set(members)
+        return set([x.decode("utf-8") for x in members])
+
+    async def add(self, *values: str) -> int:
+        """Add value or values into the filter
+
+        :param values: one or more values to add
+        :returns: int -- number of elements added
+        """
+        return await self.db.sadd(self.name, *map(self._member, values))
+
+    async def remove(self, value: str) -> bool:
+        """Remove specified value from set
+
+        :param value: delete this value from set
+        :returns: bool -- true if element deleted
+        """
+        return bool(await self.db.srem(self.name, self._member(value)))
+
+    async def exists(self, value: str) -> bool:
+        """Check if element exists
+
+        :param value: check if value present in set
+        :returns: bool -- true if exists
+        """
+        return bool(await self.db.sismember(self.name, self._member(value)))
+
+    async def sizeof(self) -> int:
+        """Size of data structure in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return await self.db.memory_usage(self.name, samples=0)
+
+    async def length(self) -> int:
+        """Len of set stored in redis
+
+        :returns: int -- number of elements in set
+        """
+        return await self.db.scard(self.name)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisSetFilter name={} <{}>>".format(self.name, self.db)
+
+
+class RedisBucketFilter:
+    """Redis filter with buckets, see `rdt.filters.RedisBucketFilter`.
+
+    Operations touching few buckets are pipelined.
+    """
+
+    __slots__ = ["__db", "name", "bucket_digits"]
+
+    @property
+    def db(self) -> aioredis.Redis:
+        return self.__db
+
+    def __init__(self, name: str, r: aioredis.Redis, bucket_digits: int = 3):
+        """RedisBucketFilter
+
+        :param name: filter name
+        :param r: asyncio redis client instance
+        :param bucket_digits: number of digits to cut from mmr3 hash, so with 1
+        number of buckets would be 10, with 2 - 100, with 3 - 1000 etc,
+        default 3
+        """
+        self.__db = r
+        self.name = name
+        self.bucket_digits = bucket_digits
+
+    def _build_key(self, value: str) -> str:
+        """Calculate redis key (with bucket) according to value
+
+        :param value: value to add into the bucket
+        :returns: str -- full redis key with bucket number assigned
+        """
+        return "{}:{}".format(self.name, self.get_bucket(value))
+
+    def get_bucket(self, value: str) -> str:
+        """Calculate bucket number from value
+
+        :param value: value
+        :returns: str -- bucket number as string
+        """
+        return str(mmh3.hash(value, signed=False))[: self.bucket_digits]
+
+    async def info(self) -> dict:
+        """Information about buckets and number of elements in them.
+
+        :returns: dict in form of {'bucket_name': bucket_len}"""
+        keys = await self.db.keys(self.name + ":*")
+        async with self.db.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.scard(key)
+            sizes = await pipe.execute()
+        return {key.decode("utf-8"): size for key, size in zip(keys, sizes)}
+
+    async def exists(self, value: str) -> bool:
+        """Check if element exists
+
+        :param value: check if value present in bucket
+        :returns: bool -- true if exists
+        """
+        k = self._build_key(value)
+        return bool(await self.db.sismember(k, value))
+
+    async def add(self, *values: str) -> int:
+        """Add value or values into the filter
+
+        :param values: one or more values to add
+        :returns: int -- number of elements added
+        """
+        async with self.db.pipeline(transaction=False) as pipe:
+            for val in values:
+                pipe.sadd(self._build_key(val), val)
+            return sum(await pipe.execute())
+
+    async def remove(self, value: str) -> bool:
+        """Remove specified value from bucket
+
+        :param value: delete this value from bucket
+        :returns: bool -- true if element deleted
+        """
+        key = self._build_key(value)
+        return bool(await self.db.srem(key, value))
+
+    async def sizeof(self) -> int:
+        """Size of data structure in redis, calculate for all buckets
+
+        :returns: int -- memory used in bytes
+        """
+        keys = await self.db.keys(self.name + ":*")
+        async with self.db.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key, samples=0)
+            return sum(await pipe.execute())
+
+    async def length(self) -> int:
+        """Number of elements inside all buckets
+
+        :returns: int -- number of elements in buckets
+        """
+        keys = await self.db.keys(self.name + ":*")
+        async with self.db.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.scard(key)
+            return sum(await pipe.execute())
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisBucketFilter name={} <{}>>".format(self.name, self.db)
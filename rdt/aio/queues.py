@@ -0,0 +1,137 @@
+"""Asyncio versions of queues for redis"""
+import typing as t
+
+import redis.asyncio as aioredis
+from rdt.aio.common import lpop_bulk
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+
+
+class RedisLifoQueue:
+    """Simple Last-In-First-Out queue implemented on redis list datatype"""
+
+    __slots__ = [
+        "__db",
+        "__serializer",
+        "name",
+    ]
+
+    __serializer: BaseSerializer
+
+    @property
+    def db(self) -> aioredis.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Current serializer
+
+        :returns: ItemSerializer -- current serializer instance
+        """
+        return self.__serializer
+
+    def __init__(
+        self,
+        name: str,
+        r: aioredis.Redis,
+        serializer: BaseSerializer = JsonItemSerializer,
+    ):
+        """Trivial LIFO redis queue implementation,
+        store data as serialized json
+
+        :param name: queue name
+        :param r: asyncio redis client instance
+        :serializer str: string representation of json library
+        """
+        self.__db = r
+        self.__serializer = serializer()
+        self.name = name
+
+    async def is_empty(self) -> bool:
+        """Check if queue is empty
+
+        :returns bool: True if empty and False if not
+        """
+        return await self.length() == 0
+
+    async def exists(self, name: str) -> bool:
+        """Check if queue key exist exists
+
+        :param value: check if value present in set
+        :returns: bool -- true if exists
+        """
+        return bool(await self.db.exists(name))
+
+    async def put(self, item: dict) -> int:
+        """Put item into the queue.
+
+        :param item: serializable item to push into the queue
+        :returns: int -- the length of the list after the push operation
+        """
+        return int(await self.db.rpush(self.name, self.serializer.dumps(item)))
+
+    async def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Use redis pipelines to push bulk into the queue
+        :param items: list of serializables to push into the queue
+        :returns: bool - if return fit number of items in queue
+        """
+        async with self.db.pipeline() as pipe:
+            for item in items:
+                pipe.rpush(self.name, self.serializer.dumps(item))
+            pipe.llen(self.name)
+            res = await pipe.execute()
+        # last push result contains len of queue after operations
+        return len(res) > 1 and bool(res[-2] == res[-1])
+
+    async def get(self) -> t.Optional[t.Dict]:
+        """Pop first element from the list
+        :returns: dict - serialized item
+        """
+        item = await self.db.lpop(self.name)
+        if item is None:
+            return None
+        return self.serializer.loads(item)
+
+    async def get_block(self, timeout=None) -> t.Optional[t.Dict]:
+        """Pop item from the queue.
+
+        If optional args block is true and timeout is None (the default), block
+        if necessary until an item is available."""
+        item = await self.db.blpop(self.name, timeout=timeout)
+
+        if item:
+            return self.serializer.loads(item[1])
+        return None
+
+    async def get_bulk(self, number_of_items) -> t.List[t.Dict]:
+        """Remove and return part of list from queue in one round trip
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        items = await lpop_bulk(self.db, self.name, number_of_items)
+        return list(map(self.serializer.loads, items))
+
+    async def sizeof(self) -> t.Optional[int]:
+        """Size of data structure in redis
+
+        :returns: int -- memory used in bytes
+        """
+        mem_usage = await self.db.memory_usage(self.name, samples=0)
+        if mem_usage is not None:
+            return int(mem_usage)
+        return None
+
+    async def length(self) -> int:
+        """Queue length.
+
+        :returns: int -- number of elements in queue
+        """
+        return int(await self.db.llen(self.name))
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisLifoQueue name={} <{}>>".format(self.name, self.db)
@@ -0,0 +1,200 @@
+"""Asyncio version of unique queue"""
+# pylint: disable=consider-using-f-string
+import typing as t
+
+import redis.asyncio as aioredis
+from rdt.aio.common import lpop_bulk
+from rdt.common import UNIQUE_PUSH_SCRIPT, PutResult
+from rdt.filters import DIGEST_BITS, key_digest
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+from rdt.unique_queue import Same
+
+
+class RedisUniqueQueue:
+    """Queue with only uniq elements"""
+
+    __slots__ = [
+        "__db",
+        "__serializer",
+        "queue_name",
+        "filter_name",
+        "keygetter",
+        "digest_bits",
+    ]
+
+    __serializer: BaseSerializer
+
+    @property
+    def db(self) -> aioredis.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Current serializer
+
+        :returns: ItemSerializer -- current serializer instance
+        """
+        return self.__serializer
+
+    def __init__(
+        self,
+        name: t.Union[str, t.Dict[str, str]],
+        r: aioredis.Redis,
+        serializer: BaseSerializer = JsonItemSerializer,
+        keygetter: t.Callable[[t.Dict], t.Any] = Same,
+        digest_bits: t.Optional[int] = None,
+    ):
+        """Trivial LIFO redis queue implementation, with filtering
+        store data as serialized json
+
+        :param queue_name: queue key in redis, could be a Dict with keys
+            'queue' and 'filter' keys
+        :param r: asyncio redis client instance
+        :param serializer: string representation of json library
+        :param keygetter: function to access to item key, by default return same
+            element
+        :param digest_bits: store 64 or 128 bit digests of keys in filter
+            instead of raw keys to save memory, see `rdt.filters.key_digest`
+            for collision probability and `migrate_set_to_digest`
+        """
+        assert digest_bits is None or digest_bits in DIGEST_BITS
+        self.__db = r
+        self.__serializer = serializer()
+
+        # define names for queue and filter
+        if isinstance(name, dict):
+            assert ("queue" in name) and (
+                "filter" in name
+            ), "name dict should contain 'queue' and 'filter' keys"
+            self.queue_name = name["queue"]
+            self.filter_name = name["filter"]
+        else:
+            self.queue_name = f"{name}:queue"
+            self.filter_name = f"{name}:filter"
+
+        self.keygetter = keygetter
+        self.digest_bits = digest_bits
+
+    def _filter_key(self, item: t.Any) -> t.Any:
+        key = self.keygetter(item)
+        if self.digest_bits is None:
+            return key
+        return key_digest(key, self.digest_bits)
+
+    async def is_empty(self) -> bool:
+        """Check if queue is empty
+
+        :returns bool: True if empty and False if not
+        """
+        return await self.length() == 0
+
+    async def in_filter(self, value: t.Dict) -> bool:
+        """Check if element already in filter"""
+        key = self._filter_key(value)
+        return bool(await self.db.sismember(self.filter_name, key))
+
+    async def put(self, item: t.Dict) -> int:
+        """Put item into the queue.
+
+        Check against filter and push are done atomically in one round trip.
+
+        :param item: serializable item to push into the queue
+        :returns: int -- the length of the list after the push operation,
+            0 if item already in filter
+        """
+        result = await self.put_bulk_result([item])
+        if result.accepted:
+            return result.length
+        return 0
+
+    async def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Push bulk into the queue, skipping items already in filter
+        :param items: list of serializables to push into the queue
+        :returns: bool - true if at least one item was pushed
+        """
+        return bool((await self.put_bulk_result(items)).accepted)
+
+    async def put_bulk_result(self, items: t.List[t.Dict]) -> PutResult:
+        """Push bulk into the queue with one server side script call.
+
+        :param items: list of serializables to push into the queue
+        :returns: PutResult -- number of accepted items, indexes of rejected
+            items and length of the queue after the push
+        """
+        if not items:
+            return PutResult(0, [], await self.length())
+
+        args: t.List[t.Any] = []
+        for item in items:
+            args.append(self._filter_key(item))
+            args.append(self.serializer.dumps(item))
+
+        script = self.db.register_script(UNIQUE_PUSH_SCRIPT)
+        accepted, length, rejected = await script(
+            keys=[self.filter_name, self.queue_name], args=args
+        )
+        return PutResult(int(accepted), [int(i) for i in rejected], int(length))
+
+    async def get(self) -> t.Any:
+        """Pop first element from the list
+        :returns: dict - serialized item
+        """
+        item = await self.db.lpop(self.queue_name)
+        if item is None:
+            return None
+        return self.serializer.loads(item)
+
+    async def get_block(self, timeout=None) -> t.Optional[t.Dict]:
+        """Pop item from the queue.
+
+        If optional args block is true and timeout is None (the default), block
+        if necessary until an item is available."""
+        item = await self.db.blpop(self.queue_name, timeout=timeout)
+
+        if item:
+            return self.serializer.loads(item[1])
+        return None
+
+    async def get_bulk(self, number_of_items) -> t.List[t.Any]:
+        """Remove and return part of list from queue in one round trip
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        items = await lpop_bulk(self.db, self.queue_name, number_of_items)
+        return list(map(self.serializer.loads, items))
+
+    async def sizeof(self) -> int:
+        """Size of data structure in redis
+
+        :returns: int -- memory used in bytes
+        """
+        async with self.db.pipeline(transaction=False) as pipe:
+            pipe.memory_usage(self.queue_name)
+            pipe.memory_usage(self.filter_name)
+            queue_mu, filter_mu = await pipe.execute()
+        return int((queue_mu or 0) + (filter_mu or 0))
+
+    async def filter_len(self) -> int:
+        """Return number of elements in filter set
+
+        :returns: int -- number of elements in queue
+        """
+        return int(await self.db.scard(self.filter_name))
+
+    async def length(self) -> int:
+        """Queue length.
+
+        :returns: int -- number of elements in queue
+        """
+        return int(await self.db.llen(self.queue_name))
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisUniqueQueue queue_name={} filter_name={} <{}>>".format(
+            self.queue_name, self.filter_name, self.db
+        )
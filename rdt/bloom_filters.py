@@ -0,0 +1,1149 @@
+"""Bloom filters on plain redis bitmaps and on redisbloom module"""
+# pylint: disable=consider-using-f-string
+import math
+import typing as t
+
+import mmh3
+import redis
+
+from rdt.bloom_sizing import bloom_size, expected_error_rate
+from rdt.common import PutResult
+
+
+# redis strings are limited by 512 MB
+MAX_BITS = 2**32
+
+# create string of full size on first write, growing string by BITFIELD
+# writes makes redis preallocate up to twice more memory than needed
+PREALLOCATE = """
+local function preallocate(key, size)
+    if redis.call('EXISTS', key) == 0 then
+        redis.call('SETRANGE', key, size - 1, '\\0')
+    end
+end
+"""
+
+# KEYS: string; ARGV: size in bytes
+PREALLOCATE_SCRIPT = PREALLOCATE + "preallocate(KEYS[1], tonumber(ARGV[1]))"
+
+# KEYS: filter, queue; ARGV: key, payload pairs
+# returns {accepted, queue length, rejected indexes}
+MODULE_PUSH_SCRIPT = """
+local accepted = 0
+local rejected = {}
+local n = #ARGV / 2
+-- chunks, since unpack is limited by lua stack size
+for first = 1, n, 1000 do
+    local last = math.min(first + 999, n)
+    local keys = {}
+    for i = first, last do
+        keys[#keys + 1] = ARGV[2 * i - 1]
+    end
+    local added = redis.call('BF.MADD', KEYS[1], unpack(keys))
+    local payloads = {}
+    for j = 1, #added do
+        if added[j] == 1 then
+            payloads[#payloads + 1] = ARGV[2 * (first + j - 1)]
+        else
+            rejected[#rejected + 1] = first + j - 2
+        end
+    end
+    if #payloads > 0 then
+        redis.call('RPUSH', KEYS[2], unpack(payloads))
+        accepted = accepted + #payloads
+    end
+end
+return {accepted, redis.call('LLEN', KEYS[2]), rejected}
+"""
+
+# KEYS: bitmap, queue; ARGV: number of hashes, size of bitmap in bytes,
+# then for every item its bit positions followed by payload
+# returns {accepted, queue length, rejected indexes}
+BITMAP_PUSH_SCRIPT = (
+    PREALLOCATE
+    + """
+local k = tonumber(ARGV[1])
+local accepted = 0
+local rejected = {}
+local payloads = {}
+local index = 0
+preallocate(KEYS[1], tonumber(ARGV[2]))
+for i = 3, #ARGV, k + 1 do
+    local args = {}
+    for j = i, i + k - 1 do
+        args[#args + 1] = 'SET'
+        args[#args + 1] = 'u1'
+        args[#args + 1] = ARGV[j]
+        args[#args + 1] = 1
+    end
+    local old = redis.call('BITFIELD', KEYS[1], unpack(args))
+    local new = false
+    for j = 1, k do
+        if old[j] == 0 then
+            new = true
+        end
+    end
+    if new then
+        payloads[#payloads + 1] = ARGV[i + k]
+        if #payloads == 1000 then
+            redis.call('RPUSH', KEYS[2], unpack(payloads))
+            accepted = accepted + #payloads
+            payloads = {}
+        end
+    else
+        rejected[#rejected + 1] = index
+    end
+    index = index + 1
+end
+if #payloads > 0 then
+    redis.call('RPUSH', KEYS[2], unpack(payloads))
+    accepted = accepted + #payloads
+end
+return {accepted, redis.call('LLEN', KEYS[2]), rejected}
+"""
+)
+
+# scalable filter, sub-filter parameters are kept in hash KEYS[1],
+# sub-filter i is bitmap `<KEYS[1]>:i`. Sub-filter keys are created by
+# script, so they can't be declared in KEYS, KEYS[1] is hash tag `{name}`
+# to keep them in one cluster slot. Positions are computed by script
+# from two 32 bit halves of key hash, so client doesn't need to know
+# number of sub-filters. ARGV: capacity, error rate, expansion,
+# tightening, then hash halves of keys
+SCALABLE_COMMON = (
+    PREALLOCATE
+    + """
+local meta = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local error_rate = tonumber(ARGV[2])
+local expansion = tonumber(ARGV[3])
+local tightening = tonumber(ARGV[4])
+local prefix = KEYS[1]
+local ln2 = math.log(2)
+
+local filters = {}
+local n = tonumber(redis.call('HGET', meta, 'filters') or 0)
+for i = 0, n - 1 do
+    local v = redis.call(
+        'HMGET', meta, 'bits:' .. i, 'hashes:' .. i,
+        'capacity:' .. i, 'count:' .. i)
+    filters[i + 1] = {
+        tonumber(v[1]), tonumber(v[2]), tonumber(v[3]), tonumber(v[4])}
+end
+
+local function create()
+    local i = #filters
+    local cap = math.floor(capacity * expansion ^ i)
+    local rate = error_rate * (1 - tightening) * tightening ^ i
+    local bits = math.ceil(-cap * math.log(rate) / ln2 ^ 2)
+    bits = math.min(bits, 4294967296)
+    local hashes = math.max(1, math.floor(bits / cap * ln2 + 0.5))
+    redis.call(
+        'HSET', meta, 'filters', i + 1, 'bits:' .. i, bits,
+        'hashes:' .. i, hashes, 'capacity:' .. i, cap, 'count:' .. i, 0)
+    preallocate(prefix .. ':' .. i, math.ceil(bits / 8))
+    filters[i + 1] = {bits, hashes, cap, 0}
+end
+
+local function bitfield(op, i, h1, h2)
+    local f = filters[i]
+    local args = {}
+    for j = 0, f[2] - 1 do
+        args[#args + 1] = op
+        args[#args + 1] = 'u1'
+        args[#args + 1] = (h1 + j * h2) % f[1]
+        if op == 'SET' then
+            args[#args + 1] = 1
+        end
+    end
+    return redis.call('BITFIELD', prefix .. ':' .. (i - 1), unpack(args))
+end
+
+local function exists(h1, h2)
+    for i = #filters, 1, -1 do
+        local found = true
+        for _, bit in ipairs(bitfield('GET', i, h1, h2)) do
+            if bit == 0 then
+                found = false
+                break
+            end
+        end
+        if found then
+            return true
+        end
+    end
+    return false
+end
+"""
+)
+
+# returns flags of keys probably in filter
+SCALABLE_EXISTS_SCRIPT = (
+    SCALABLE_COMMON
+    + """
+local res = {}
+for i = 5, #ARGV, 2 do
+    res[#res + 1] = exists(tonumber(ARGV[i]), tonumber(ARGV[i + 1])) and 1 or 0
+end
+return res
+"""
+)
+
+# ARGV[5]: 2 to only add keys or 3 if every key followed by payload
+# pushed into list KEYS[2] when key is new
+# returns {flags of added keys, queue length}
+SCALABLE_ADD_SCRIPT = (
+    SCALABLE_COMMON
+    + """
+local stride = tonumber(ARGV[5])
+local added = {}
+local payloads = {}
+if #filters == 0 then
+    create()
+end
+for i = 6, #ARGV, stride do
+    local h1, h2 = tonumber(ARGV[i]), tonumber(ARGV[i + 1])
+    if exists(h1, h2) then
+        added[#added + 1] = 0
+    else
+        local last = #filters
+        bitfield('SET', last, h1, h2)
+        filters[last][4] = filters[last][4] + 1
+        redis.call('HINCRBY', meta, 'count:' .. (last - 1), 1)
+        if filters[last][4] >= filters[last][3] then
+            create()
+        end
+        added[#added + 1] = 1
+        if stride == 3 then
+            payloads[#payloads + 1] = ARGV[i + 2]
+            if #payloads == 1000 then
+                redis.call('RPUSH', KEYS[2], unpack(payloads))
+                payloads = {}
+            end
+        end
+    end
+end
+local length = 0
+if stride == 3 then
+    if #payloads > 0 then
+        redis.call('RPUSH', KEYS[2], unpack(payloads))
+    end
+    length = redis.call('LLEN', KEYS[2])
+end
+return {added, length}
+"""
+)
+
+# counting filter, KEYS: counters, number of keys, [queue]; ARGV: number
+# of hashes, size of counters in bytes, 1 if every key positions followed
+# by payload pushed into KEYS[3] when key is new, then positions (counter
+# indexes) of keys. Counters of key are incremented only if key is new.
+# returns {flags of added keys, queue length}
+COUNTING_ADD_SCRIPT = (
+    PREALLOCATE
+    + """
+local k = tonumber(ARGV[1])
+local push = ARGV[3] == '1'
+local stride = push and k + 1 or k
+local added = {}
+local payloads = {}
+local count = 0
+preallocate(KEYS[1], tonumber(ARGV[2]))
+for i = 4, #ARGV, stride do
+    local args = {}
+    for j = i, i + k - 1 do
+        args[#args + 1] = 'GET'
+        args[#args + 1] = 'u4'
+        args[#args + 1] = '#' .. ARGV[j]
+    end
+    local new = false
+    for _, counter in ipairs(redis.call('BITFIELD', KEYS[1], unpack(args))) do
+        if counter == 0 then
+            new = true
+            break
+        end
+    end
+    if new then
+        args = {'OVERFLOW', 'SAT'}
+        for j = i, i + k - 1 do
+            args[#args + 1] = 'INCRBY'
+            args[#args + 1] = 'u4'
+            args[#args + 1] = '#' .. ARGV[j]
+            args[#args + 1] = 1
+        end
+        redis.call('BITFIELD', KEYS[1], unpack(args))
+        added[#added + 1] = 1
+        count = count + 1
+        if push then
+            payloads[#payloads + 1] = ARGV[i + k]
+            if #payloads == 1000 then
+                redis.call('RPUSH', KEYS[3], unpack(payloads))
+                payloads = {}
+            end
+        end
+    else
+        added[#added + 1] = 0
+    end
+end
+if count > 0 then
+    redis.call('INCRBY', KEYS[2], count)
+end
+local length = 0
+if push then
+    if #payloads > 0 then
+        redis.call('RPUSH', KEYS[3], unpack(payloads))
+    end
+    length = redis.call('LLEN', KEYS[3])
+end
+return {added, length}
+"""
+)
+
+# KEYS: counters, number of keys; ARGV: number of hashes, then positions
+# of keys.
+# Counters of key are decremented only if key is in filter, saturated
+# counters (15) are left as is since real count is unknown.
+# returns flags of removed keys
+COUNTING_REMOVE_SCRIPT = """
+local k = tonumber(ARGV[1])
+local removed = {}
+local count = 0
+for i = 2, #ARGV, k do
+    local args = {}
+    for j = i, i + k - 1 do
+        args[#args + 1] = 'GET'
+        args[#args + 1] = 'u4'
+        args[#args + 1] = '#' .. ARGV[j]
+    end
+    local counters = redis.call('BITFIELD', KEYS[1], unpack(args))
+    local found = true
+    for _, counter in ipairs(counters) do
+        if counter == 0 then
+            found = false
+            break
+        end
+    end
+    if found then
+        args = {}
+        for j = 1, k do
+            if counters[j] < 15 then
+                args[#args + 1] = 'INCRBY'
+                args[#args + 1] = 'u4'
+                args[#args + 1] = '#' .. ARGV[i + j - 1]
+                args[#args + 1] = -1
+            end
+        end
+        if #args > 0 then
+            redis.call('BITFIELD', KEYS[1], unpack(args))
+        end
+        removed[#removed + 1] = 1
+        count = count + 1
+    else
+        removed[#removed + 1] = 0
+    end
+end
+if count > 0 then
+    redis.call('DECRBY', KEYS[2], count)
+end
+return removed
+"""
+
+
+def _put_result(res: t.List[t.Any]) -> PutResult:
+    accepted, length, rejected = res
+    return PutResult(int(accepted), [int(i) for i in rejected], int(length))
+
+
+def _check_params(db: redis.client.Redis, name: str, params: str) -> None:
+    """Store sizing of filter in key `<name>:params` on first creation and
+    check that filter opened later has the same sizing (positions of keys
+    depend on it)"""
+    key = "{}:params".format(name)
+    pipe = db.pipeline(transaction=False)
+    pipe.set(key, params, nx=True)
+    pipe.get(key)
+    stored = pipe.execute()[1]
+    if isinstance(stored, bytes):
+        # client without `decode_responses`
+        stored = stored.decode("utf-8")
+    assert stored == params, "filter {} exists with sizing {}, not {}".format(
+        name, stored, params
+    )
+
+
+def bloom_positions(key: t.Any, bits: int, hashes: int) -> t.List[int]:
+    """Bit positions of the key, derived from two halves of murmur3 x64
+    128 bit hash (Kirsch-Mitzenmacher double hashing)
+
+    :param key: str, bytes or value converted with `str`
+    :param bits: size of bitmap
+    :param hashes: number of positions
+    :returns: list -- bit offsets
+    """
+    if not isinstance(key, (str, bytes)):
+        key = str(key)
+    h1, h2 = mmh3.hash64(key, signed=False)
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+class RedisBitmapBloomFilter:
+    """Bloom filter on plain redis string used as bitmap, doesn't require
+    redisbloom module.
+
+    Every key sets `hashes` bits, check and add of any number of keys is
+    one `BITFIELD` command. Size of filter is fixed on creation
+    (max 2^32 bits, 512 MB), bitmap is allocated at full size on first
+    write. False positive rate grows after `capacity` elements added.
+    Bits and hashes are stored in key `<name>:params`, so filter can't be
+    opened with other sizing.
+    """
+
+    __slots__ = ["__db", "name", "capacity", "error_rate", "bits", "hashes"]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        capacity: int = 1000000,
+        error_rate: float = 0.01,
+    ):
+        """RedisBitmapBloomFilter
+
+        :param name: bitmap key in redis
+        :param r: redis client instance
+        :param capacity: expected number of elements
+        :param error_rate: false positive probability at capacity
+        """
+        self.__db = r
+        self.name = name
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits, self.hashes = bloom_size(capacity, error_rate)
+        assert self.bits <= MAX_BITS, "filter doesn't fit into redis string"
+        _check_params(
+            self.db, self.name, "{}:{}".format(self.bits, self.hashes)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Size of bitmap in bytes"""
+        return (self.bits + 7) // 8
+
+    def positions(self, key: t.Any) -> t.List[int]:
+        """Bit positions of the key
+
+        :param key: key
+        :returns: list -- bit offsets
+        """
+        return bloom_positions(key, self.bits, self.hashes)
+
+    def _bitfield(self, op: t.List[t.Any], keys: t.Sequence[t.Any]) -> t.List:
+        """Run one `BITFIELD` with `op` for all positions of keys and return
+        results grouped by key"""
+        args: t.List[t.Any] = []
+        for key in keys:
+            for pos in self.positions(key):
+                args.extend(op)
+                args.append(pos)
+                if op[0] == "SET":
+                    args.append(1)
+        if op[0] == "SET":
+            # preallocate bitmap in the same round trip
+            pipe = self.db.pipeline(transaction=False)
+            script = self.db.register_script(PREALLOCATE_SCRIPT)
+            script(keys=[self.name], args=[self.nbytes], client=pipe)
+            pipe.execute_command("BITFIELD", self.name, *args)
+            res = pipe.execute()[1]
+        else:
+            res = self.db.execute_command("BITFIELD", self.name, *args)
+        return [
+            res[i : i + self.hashes] for i in range(0, len(res), self.hashes)
+        ]
+
+    def add_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Add keys in one round trip
+
+        :param keys: keys to add
+        :returns: list -- true for every key which wasn't in filter (key
+            repeated in the batch is new only first time)
+        """
+        if not keys:
+            return []
+        old = self._bitfield(["SET", "u1"], keys)
+        return [not all(bits) for bits in old]
+
+    def add(self, *keys: t.Any) -> int:
+        """Add key or keys into the filter
+
+        :param keys: one or more keys to add
+        :returns: int -- number of keys which weren't in filter
+        """
+        return sum(self.add_bulk(keys))
+
+    def add_and_push(
+        self,
+        queue_name: str,
+        keys: t.Sequence[t.Any],
+        payloads: t.Sequence[t.Any],
+    ) -> PutResult:
+        """Add keys and `RPUSH` payloads of new keys into the list with one
+        server side script call
+
+        :param queue_name: list key
+        :param keys: keys to add
+        :param payloads: serialized items, one per key
+        :returns: PutResult -- number of pushed items, indexes of rejected
+            items and length of the list
+        """
+        args: t.List[t.Any] = [self.hashes, self.nbytes]
+        for key, payload in zip(keys, payloads):
+            args.extend(self.positions(key))
+            args.append(payload)
+        script = self.db.register_script(BITMAP_PUSH_SCRIPT)
+        return _put_result(script(keys=[self.name, queue_name], args=args))
+
+    def exists_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys in one round trip
+
+        :param keys: keys to check
+        :returns: list -- true for every key probably in filter
+        """
+        if not keys:
+            return []
+        return [all(bits) for bits in self._bitfield(["GET", "u1"], keys)]
+
+    def exists(self, key: t.Any) -> bool:
+        """Check if key is (probably) in filter
+
+        :param key: key to check
+        :returns: bool -- true if key probably in filter
+        """
+        return self.exists_bulk([key])[0]
+
+    def count(self) -> int:
+        """Estimate number of keys in filter from number of set bits
+
+        :returns: int -- approximate number of added keys
+        """
+        return self._estimate(int(self.db.bitcount(self.name)))
+
+    def _estimate(self, ones: int) -> int:
+        if ones >= self.bits:
+            return self.capacity
+        return round(-self.bits / self.hashes * math.log(1 - ones / self.bits))
+
+    def info(self) -> t.Dict[str, t.Any]:
+        """Filter sizing and fill
+
+        :returns: dict -- capacity, size in bytes, bits, hashes, estimated
+            number of items, share of set bits and current false positive
+            probability
+        """
+        ones = int(self.db.bitcount(self.name))
+        fill = ones / self.bits
+        return {
+            "Capacity": self.capacity,
+            "Size": self.sizeof(),
+            "Bits": self.bits,
+            "Hashes": self.hashes,
+            "Number of items inserted": self._estimate(ones),
+            "Fill ratio": fill,
+            "Estimated error rate": fill**self.hashes,
+        }
+
+    def sizeof(self) -> int:
+        """Size of bitmap in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return int(self.db.memory_usage(self.name, samples=0) or 0)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisBitmapBloomFilter name={} <{}>>".format(
+            self.name, self.db
+        )
+
+
+class RedisCountingBloomFilter:
+    """Counting bloom filter on plain redis string, 4 bit counter instead
+    of every bit (`BITFIELD` u4), so keys could be removed. Takes 4 times
+    more memory than `RedisBitmapBloomFilter` of the same capacity.
+
+    Add, remove and check of any number of keys is one round trip (server
+    side script for add and remove, so counters of keys already in filter
+    aren't incremented twice). Removing key never added could remove other
+    key sharing its counters (false positive), counters saturated at 15
+    are never decremented. Number of keys is kept in `<name>:count`, sizing
+    in `<name>:params`.
+    """
+
+    __slots__ = ["__db", "name", "capacity", "error_rate", "counters", "hashes"]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        capacity: int = 1000000,
+        error_rate: float = 0.01,
+    ):
+        """RedisCountingBloomFilter
+
+        :param name: key of counters in redis
+        :param r: redis client instance
+        :param capacity: expected number of elements
+        :param error_rate: false positive probability at capacity
+        """
+        self.__db = r
+        self.name = name
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.counters, self.hashes = bloom_size(capacity, error_rate)
+        assert self.counters * 4 <= MAX_BITS, "filter doesn't fit into string"
+        _check_params(
+            self.db, self.name, "{}:{}".format(self.counters, self.hashes)
+        )
+
+    @property
+    def count_name(self) -> str:
+        """Key of number of keys in filter"""
+        return "{}:count".format(self.name)
+
+    def positions(self, key: t.Any) -> t.List[int]:
+        """Counter indexes of the key
+
+        :param key: key
+        :returns: list -- counter indexes
+        """
+        return bloom_positions(key, self.counters, self.hashes)
+
+    def _add(self, queue_name: t.Optional[str], keys, payloads) -> t.List:
+        args: t.List[t.Any] = [
+            self.hashes,
+            (self.counters * 4 + 7) // 8,
+            0 if queue_name is None else 1,
+        ]
+        if queue_name is None:
+            for key in keys:
+                args.extend(self.positions(key))
+            script_keys = [self.name, self.count_name]
+        else:
+            for key, payload in zip(keys, payloads):
+                args.extend(self.positions(key))
+                args.append(payload)
+            script_keys = [self.name, self.count_name, queue_name]
+        script = self.db.register_script(COUNTING_ADD_SCRIPT)
+        return script(keys=script_keys, args=args)
+
+    def add_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Add keys in one round trip
+
+        :param keys: keys to add
+        :returns: list -- true for every key which wasn't in filter
+        """
+        if not keys:
+            return []
+        added, _ = self._add(None, keys, None)
+        return [bool(x) for x in added]
+
+    def add(self, *keys: t.Any) -> int:
+        """Add key or keys into the filter
+
+        :param keys: one or more keys to add
+        :returns: int -- number of keys which weren't in filter
+        """
+        return sum(self.add_bulk(keys))
+
+    def add_and_push(
+        self,
+        queue_name: str,
+        keys: t.Sequence[t.Any],
+        payloads: t.Sequence[t.Any],
+    ) -> PutResult:
+        """Add keys and `RPUSH` payloads of new keys into the list with one
+        server side script call
+
+        :param queue_name: list key
+        :param keys: keys to add
+        :param payloads: serialized items, one per key
+        :returns: PutResult -- number of pushed items, indexes of rejected
+            items and length of the list
+        """
+        added, length = self._add(queue_name, keys, payloads)
+        rejected = [i for i, flag in enumerate(added) if not flag]
+        return PutResult(len(added) - len(rejected), rejected, int(length))
+
+    def remove_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Remove keys in one round trip
+
+        :param keys: keys to remove
+        :returns: list -- true for every key which was in filter
+        """
+        if not keys:
+            return []
+        args: t.List[t.Any] = [self.hashes]
+        for key in keys:
+            args.extend(self.positions(key))
+        script = self.db.register_script(COUNTING_REMOVE_SCRIPT)
+        res = script(keys=[self.name, self.count_name], args=args)
+        return [bool(x) for x in res]
+
+    def remove(self, *keys: t.Any) -> int:
+        """Remove key or keys from the filter
+
+        :param keys: one or more keys to remove
+        :returns: int -- number of keys which were in filter
+        """
+        return sum(self.remove_bulk(keys))
+
+    def exists_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys with one `BITFIELD` command
+
+        :param keys: keys to check
+        :returns: list -- true for every key probably in filter
+        """
+        if not keys:
+            return []
+        args: t.List[t.Any] = []
+        for key in keys:
+            for pos in self.positions(key):
+                args.extend(["GET", "u4", "#{}".format(pos)])
+        res = self.db.execute_command("BITFIELD", self.name, *args)
+        return [
+            all(res[i : i + self.hashes])
+            for i in range(0, len(res), self.hashes)
+        ]
+
+    def exists(self, key: t.Any) -> bool:
+        """Check if key is (probably) in filter
+
+        :param key: key to check
+        :returns: bool -- true if key probably in filter
+        """
+        return self.exists_bulk([key])[0]
+
+    def count(self) -> int:
+        """Number of keys in filter, counted by add and remove scripts
+
+        :returns: int -- number of added and not removed keys
+        """
+        return int(self.db.get(self.count_name) or 0)
+
+    def sizeof(self) -> int:
+        """Size of counters in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return int(self.db.memory_usage(self.name, samples=0) or 0)
+
+    def info(self) -> t.Dict[str, t.Any]:
+        """Filter sizing
+
+        :returns: dict -- capacity, size in bytes, number of counters,
+            hashes and estimated number of items
+        """
+        return {
+            "Capacity": self.capacity,
+            "Size": self.sizeof(),
+            "Counters": self.counters,
+            "Hashes": self.hashes,
+            "Number of items inserted": self.count(),
+        }
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisCountingBloomFilter name={} <{}>>".format(
+            self.name, self.db
+        )
+
+
+def scalable_hash(key: t.Any) -> t.Tuple[int, int]:
+    """Two 32 bit halves of murmur3 x64 hash of the key, positions of
+    scalable filter are computed from them by server side script (lua
+    numbers are doubles, so 64 bit values can't be used)
+
+    :param key: str, bytes or value converted with `str`
+    :returns: tuple -- two unsigned 32 bit ints
+    """
+    if not isinstance(key, (str, bytes)):
+        key = str(key)
+    h1 = mmh3.hash64(key, signed=False)[0]
+    return h1 & 0xFFFFFFFF, h1 >> 32
+
+
+class RedisScalableBloomFilter:
+    """Scalable bloom filter (Almeida et al.) on plain redis bitmaps.
+
+    Starts with one sub-filter of `capacity`, when it's full new sub-filter
+    `expansion` times bigger with `tightening` times lower error rate is
+    added, so overall false positive probability stays below `error_rate`
+    however many keys are added. Key is checked against all sub-filters
+    and added into the last one by server side script, every call is one
+    round trip. Sub-filter parameters and counters are kept in hash
+    `{name}`, bitmaps are `{name}:0`, `{name}:1`, ... Sub-filters are
+    created by the script, so their keys aren't declared, hash tag keeps
+    them in the same redis cluster slot as the hash (queue list pushed by
+    `add_and_push` should share the slot as well, e.g. `{name}:queue`).
+    """
+
+    __slots__ = [
+        "__db",
+        "name",
+        "capacity",
+        "error_rate",
+        "expansion",
+        "tightening",
+    ]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        capacity: int = 1000000,
+        error_rate: float = 0.01,
+        expansion: int = 2,
+        tightening: float = 0.5,
+    ):
+        """RedisScalableBloomFilter
+
+        :param name: filter name, hash tag of sub-filter keys
+        :param r: redis client instance
+        :param capacity: capacity of first sub-filter
+        :param error_rate: bound of overall false positive probability
+        :param expansion: growth factor of sub-filter capacity
+        :param tightening: ratio of error rates of next and previous
+            sub-filters, in (0, 1)
+        """
+        assert capacity > 0, "capacity should be positive"
+        assert 0 < error_rate < 1, "error rate should be in (0, 1)"
+        assert expansion >= 1, "expansion should be at least 1"
+        assert 0 < tightening < 1, "tightening should be in (0, 1)"
+        self.__db = r
+        self.name = name
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.expansion = expansion
+        self.tightening = tightening
+
+    @property
+    def meta_name(self) -> str:
+        """Key of sub-filters hash, prefix of sub-filter bitmaps"""
+        return "{%s}" % self.name
+
+    def _args(self) -> t.List[t.Any]:
+        return [self.capacity, self.error_rate, self.expansion, self.tightening]
+
+    def _add(self, queue_name: t.Optional[str], keys, payloads) -> t.List:
+        args = self._args()
+        if queue_name is None:
+            args.append(2)
+            for key in keys:
+                args.extend(scalable_hash(key))
+            script_keys = [self.meta_name]
+        else:
+            args.append(3)
+            for key, payload in zip(keys, payloads):
+                args.extend(scalable_hash(key))
+                args.append(payload)
+            script_keys = [self.meta_name, queue_name]
+        script = self.db.register_script(SCALABLE_ADD_SCRIPT)
+        return script(keys=script_keys, args=args)
+
+    def add_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Add keys in one round trip
+
+        :param keys: keys to add
+        :returns: list -- true for every key which wasn't in filter
+        """
+        if not keys:
+            return []
+        added, _ = self._add(None, keys, None)
+        return [bool(x) for x in added]
+
+    def add(self, *keys: t.Any) -> int:
+        """Add key or keys into the filter
+
+        :param keys: one or more keys to add
+        :returns: int -- number of keys which weren't in filter
+        """
+        return sum(self.add_bulk(keys))
+
+    def add_and_push(
+        self,
+        queue_name: str,
+        keys: t.Sequence[t.Any],
+        payloads: t.Sequence[t.Any],
+    ) -> PutResult:
+        """Add keys and `RPUSH` payloads of new keys into the list with one
+        server side script call
+
+        :param queue_name: list key
+        :param keys: keys to add
+        :param payloads: serialized items, one per key
+        :returns: PutResult -- number of pushed items, indexes of rejected
+            items and length of the list
+        """
+        added, length = self._add(queue_name, keys, payloads)
+        rejected = [i for i, flag in enumerate(added) if not flag]
+        return PutResult(len(added) - len(rejected), rejected, int(length))
+
+    def exists_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys against all sub-filters in one round trip
+
+        :param keys: keys to check
+        :returns: list -- true for every key probably in filter
+        """
+        if not keys:
+            return []
+        args = self._args()
+        for key in keys:
+            args.extend(scalable_hash(key))
+        script = self.db.register_script(SCALABLE_EXISTS_SCRIPT)
+        return [bool(x) for x in script(keys=[self.meta_name], args=args)]
+
+    def exists(self, key: t.Any) -> bool:
+        """Check if key is (probably) in filter
+
+        :param key: key to check
+        :returns: bool -- true if key probably in filter
+        """
+        return self.exists_bulk([key])[0]
+
+    def filters(self) -> t.List[t.Dict[str, int]]:
+        """Parameters of sub-filters
+
+        :returns: list -- dicts with bits, hashes, capacity and count
+            of every sub-filter
+        """
+        meta = {
+            k.decode("utf-8"): int(v)
+            for k, v in self.db.hgetall(self.meta_name).items()
+        }
+        return [
+            {
+                field: meta["{}:{}".format(field, i)]
+                for field in ("bits", "hashes", "capacity", "count")
+            }
+            for i in range(meta.get("filters", 0))
+        ]
+
+    def count(self) -> int:
+        """Number of keys added into filter
+
+        :returns: int -- number of inserted items
+        """
+        return sum(f["count"] for f in self.filters())
+
+    def _sizeof(self, filters: t.List[t.Dict[str, int]]) -> int:
+        keys = [self.meta_name]
+        keys.extend(
+            "{}:{}".format(self.meta_name, i) for i in range(len(filters))
+        )
+        pipe = self.db.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+        return sum(int(x or 0) for x in pipe.execute())
+
+    def sizeof(self) -> int:
+        """Size of sub-filters and their parameters in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return self._sizeof(self.filters())
+
+    def info(self) -> t.Dict[str, t.Any]:
+        """Filter sizing and fill
+
+        :returns: dict -- capacity of all sub-filters, size in bytes, number
+            of sub-filters, number of items, share of set bits of the current
+            sub-filter and estimated false positive probability
+        """
+        filters = self.filters()
+        # key is false positive if it's false positive of any sub-filter
+        negative = 1.0
+        for f in filters:
+            negative *= 1 - expected_error_rate(
+                f["bits"], f["hashes"], f["count"]
+            )
+        fill = 0.0
+        if filters:
+            key = "{}:{}".format(self.meta_name, len(filters) - 1)
+            fill = int(self.db.bitcount(key)) / filters[-1]["bits"]
+        return {
+            "Capacity": sum(f["capacity"] for f in filters),
+            "Size": self._sizeof(filters),
+            "Number of filters": len(filters),
+            "Number of items inserted": sum(f["count"] for f in filters),
+            "Fill ratio": fill,
+            "Estimated error rate": 1 - negative,
+        }
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisScalableBloomFilter name={} <{}>>".format(
+            self.name, self.db
+        )
+
+
+class RedisBloomModuleFilter:
+    """Bloom filter of redisbloom module (`BF.*` commands), same interface
+    as `RedisBitmapBloomFilter`. Commands are sent with plain redis client,
+    so redisbloom python client isn't required.
+    """
+
+    __slots__ = ["__db", "name", "capacity", "error_rate"]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        capacity: int = 1000000,
+        error_rate: float = 0.01,
+    ):
+        """RedisBloomModuleFilter, create filter if not exist
+
+        :param name: filter key in redis
+        :param r: redis client instance
+        :param capacity: expected number of elements
+        :param error_rate: false positive probability at capacity
+        """
+        self.__db = r
+        self.name = name
+        self.capacity = capacity
+        self.error_rate = error_rate
+        if not self.db.exists(self.name):
+            try:
+                self.db.execute_command(
+                    "BF.RESERVE", self.name, error_rate, capacity
+                )
+            except redis.exceptions.ResponseError as err:
+                # created by other client
+                if "exists" not in str(err):
+                    raise
+
+    def add_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Add keys in one round trip (`BF.MADD`)
+
+        :param keys: keys to add
+        :returns: list -- true for every key which wasn't in filter
+        """
+        if not keys:
+            return []
+        res = self.db.execute_command("BF.MADD", self.name, *keys)
+        return [bool(x) for x in res]
+
+    def add(self, *keys: t.Any) -> int:
+        """Add key or keys into the filter
+
+        :param keys: one or more keys to add
+        :returns: int -- number of keys which weren't in filter
+        """
+        return sum(self.add_bulk(keys))
+
+    def add_and_push(
+        self,
+        queue_name: str,
+        keys: t.Sequence[t.Any],
+        payloads: t.Sequence[t.Any],
+    ) -> PutResult:
+        """Add keys (`BF.MADD`) and `RPUSH` payloads of new keys into
+        the list with one server side script call
+
+        :param queue_name: list key
+        :param keys: keys to add
+        :param payloads: serialized items, one per key
+        :returns: PutResult -- number of pushed items, indexes of rejected
+            items and length of the list
+        """
+        args: t.List[t.Any] = []
+        for key, payload in zip(keys, payloads):
+            args.append(key)
+            args.append(payload)
+        script = self.db.register_script(MODULE_PUSH_SCRIPT)
+        return _put_result(script(keys=[self.name, queue_name], args=args))
+
+    def exists_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys in one round trip (`BF.MEXISTS`)
+
+        :param keys: keys to check
+        :returns: list -- true for every key probably in filter
+        """
+        if not keys:
+            return []
+        res = self.db.execute_command("BF.MEXISTS", self.name, *keys)
+        return [bool(x) for x in res]
+
+    def exists(self, key: t.Any) -> bool:
+        """Check if key is (probably) in filter
+
+        :param key: key to check
+        :returns: bool -- true if key probably in filter
+        """
+        return self.exists_bulk([key])[0]
+
+    def info(self) -> t.Dict[str, t.Any]:
+        """Filter information (`BF.INFO`)
+
+        :returns: dict -- capacity, size, number of filters, items inserted
+        """
+        res = self.db.execute_command("BF.INFO", self.name)
+        if isinstance(res, dict):
+            items = res.items()
+        else:
+            items = zip(res[::2], res[1::2])
+        return {
+            (k.decode("utf-8") if isinstance(k, bytes) else k): v
+            for k, v in items
+        }
+
+    def count(self) -> int:
+        """Number of keys added into filter
+
+        :returns: int -- number of inserted items
+        """
+        return int(self.info()["Number of items inserted"])
+
+    def sizeof(self) -> int:
+        """Size of filter in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return int(self.db.memory_usage(self.name, samples=0) or 0)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisBloomModuleFilter name={} <{}>>".format(
+            self.name, self.db
+        )
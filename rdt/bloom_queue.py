@@ -1,20 +1,37 @@
-"""Queues based on redisbloom https://oss.redis.com/redisbloom/
-required to compile and load additional redis module
+"""Queues based on bloom filter, either redisbloom module
+https://oss.redis.com/redisbloom/ (required to compile and load additional
+redis module) or plain redis bitmap (`rdt.bloom_filters`)
 """
-# pylint: disable=too-many-arguments
-from typing import Union, Callable, Dict, List, Any, Optional
+# pylint: disable=too-many-arguments,consider-using-f-string
+import typing as t
 
-from redisbloom import client as RedisBloom
+import redis
 
-from rdt.serializers import ItemSerializer
+from rdt.bloom_filters import (
+    RedisBitmapBloomFilter,
+    RedisBloomModuleFilter,
+    RedisCountingBloomFilter,
+    RedisScalableBloomFilter,
+)
+from rdt.common import PutResult, blpop_bulk, iter_queue_items, lpop_bulk
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+from rdt.unique_queue import Same
 
 
-Same = lambda x: x
+BLOOM_BACKENDS = {
+    "redisbloom": RedisBloomModuleFilter,
+    "bitmap": RedisBitmapBloomFilter,
+    "scalable": RedisScalableBloomFilter,
+    "counting": RedisCountingBloomFilter,
+}
 
 
 class RedisBloomQueue:
-    """Combine redis list and bloom filter extension to implement
-    memory-efficient message queue. Required redisbloom
+    """Combine redis list and bloom filter to implement memory-efficient
+    message queue. Filter is `BF.*` of redisbloom module by default,
+    `backend="bitmap"` works on any redis without modules, `"scalable"`
+    grows past `capacity` keeping false positive rate below `error_rate`,
+    `"counting"` allows removing keys from filter (`remove_from_filter`).
     """
 
     __slots__ = [
@@ -25,15 +42,18 @@ class RedisBloomQueue:
         "keygetter",
         "error_rate",
         "capacity",
+        "filter",
     ]
 
+    __serializer: BaseSerializer
+
     @property
-    def db(self) -> RedisBloom.Client:
+    def db(self) -> redis.client.Redis:
         """Getter for database client"""
         return self.__db
 
     @property
-    def serializer(self) -> ItemSerializer:
+    def serializer(self) -> BaseSerializer:
         """Current serializer
 
         :returns: ItemSerializer -- current serializer instance
@@ -42,12 +62,13 @@ class RedisBloomQueue:
 
     def __init__(
         self,
-        name: Union[str, Dict[str, str]],
-        r: RedisBloom.Client,
-        serializer: str = "json",
-        keygetter: Callable[[Dict], Any] = Same,
+        name: t.Union[str, t.Dict[str, str]],
+        r: redis.client.Redis,
+        serializer: BaseSerializer = JsonItemSerializer,
+        keygetter: t.Callable[[t.Dict], t.Any] = Same,
         error_rate=0.01,
         capacity=1000000,
+        backend: str = "redisbloom",
     ):
         """Trivial LIFO redis queue implementation, with
         memory-efficient filtering using BloomFilter.
@@ -61,9 +82,12 @@ class RedisBloomQueue:
             element
         :param error_rate: error rate
         :param capacity: number of elements
+        :param backend: "redisbloom" (module), "bitmap", "scalable" or
+            "counting" (plain redis, see `rdt.bloom_filters`)
         """
+        assert backend in BLOOM_BACKENDS, "unknown backend {}".format(backend)
         self.__db = r
-        self.__serializer = ItemSerializer(serializer)
+        self.__serializer = serializer()
 
         # define names for queue and filter
         if isinstance(name, dict):
@@ -80,9 +104,10 @@ class RedisBloomQueue:
         self.error_rate = error_rate
         self.capacity = capacity
 
-        # create bloom filter if not exist
-        if not self.db.exists(self.filter_name):
-            self.db.bfCreate(self.filter_name, self.error_rate, self.capacity)
+        # module filter is created here if not exist
+        self.filter = BLOOM_BACKENDS[backend](
+            self.filter_name, r, capacity=capacity, error_rate=error_rate
+        )
 
     def is_empty(self) -> bool:
         """Check if queue is empty
@@ -91,49 +116,73 @@ class RedisBloomQueue:
         """
         return len(self) == 0
 
-    def in_filter(self, value: Dict) -> bool:
+    def in_filter(self, value: t.Dict) -> bool:
         """Check if element already in filter"""
-        key = self.keygetter(value)
-        return bool(self.db.bfExists(self.filter_name, key))
+        return self.filter.exists(self.keygetter(value))
+
+    def in_filter_bulk(self, items: t.List[t.Dict]) -> t.List[bool]:
+        """Check if elements already in filter in one round trip
 
-    def put(self, item: Dict) -> int:
+        :param items: items (or items with same keys)
+        :returns: list -- true for every item probably in filter
+        """
+        return self.filter.exists_bulk([self.keygetter(i) for i in items])
+
+    def put(self, item: t.Dict) -> int:
         """Put item into the queue.
 
+        Filter check and push are done atomically in one round trip.
+
         :param item: serializable item to push into the queue
-        :param key: uniq key in item to check against set
-        :returns: int -- the length of the list after the push operation
+        :returns: int -- the length of the list after the push operation,
+            0 if item already in filter
         """
-        key = self.keygetter(item)
-        if self.db.bfExists(self.filter_name, key):
-            return 0
+        result = self.put_bulk_result([item])
+        if result.accepted:
+            return result.length
+        return 0
 
-        pipe = self.db.pipeline()
-        pipe.bfAdd(self.filter_name, key)
-        pipe.rpush(self.queue_name, self.serializer.dumps(item))
-        res = pipe.execute()
+    def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Push bulk into the queue, skipping items already in filter
+        :param items: list of serializables to push into the queue
+        :returns: bool - true if at least one item was pushed
+        """
+        return bool(self.put_bulk_result(items).accepted)
+
+    def put_bulk_result(self, items: t.List[t.Dict]) -> PutResult:
+        """Push bulk into the queue with one server side script call.
 
-        # last result contains len of queue after operations
-        return int(res[-1])
+        Keys are added into filter (`BF.MADD` or `BITFIELD`) and only
+        payloads of newly added keys are pushed, atomically, so concurrent
+        producers can't push the same key twice (duplicates inside
+        the batch are rejected as well).
 
-    def put_bulk(self, items: List[Dict]) -> bool:
-        """Use redis pipelines to push bulk into the queue
         :param items: list of serializables to push into the queue
-        :returns: bool - if return fit number of items in queue
-        """
-        pipe = self.db.pipeline()
-        for item in items:
-            key = self.keygetter(item)
-            if not self.db.bfExists(self.filter_name, key):
-                pipe.bfAdd(self.filter_name, key)
-                pipe.rpush(self.queue_name, self.serializer.dumps(item))
-        res = pipe.execute()
-        # if all given `items` already in filter `res` will be []
-        if not res:
-            return False
-        # last result contains len of queue after operations
-        return bool(res[-1] == self.__len__())
-
-    def get(self) -> Any:  # define type
+        :returns: PutResult -- number of accepted items, indexes of rejected
+            items and length of the queue after the push
+        """
+        if not items:
+            return PutResult(0, [], len(self))
+        return self.filter.add_and_push(
+            self.queue_name,
+            [self.keygetter(item) for item in items],
+            [self.serializer.dumps(item) for item in items],
+        )
+
+    def remove_from_filter(self, items: t.List[t.Dict]) -> t.List[bool]:
+        """Remove keys of items from filter in one round trip, so items
+        could be put again (retry of failed item). Supported only by
+        "counting" backend
+
+        :param items: items (or items with same keys)
+        :returns: list -- true for every item which was in filter
+        """
+        assert isinstance(
+            self.filter, RedisCountingBloomFilter
+        ), "only counting filter supports removal"
+        return self.filter.remove_bulk([self.keygetter(i) for i in items])
+
+    def get(self) -> t.Any:  # define type
         """Pop first element from the list
         :returns: dict - serialized item
         """
@@ -142,7 +191,7 @@ class RedisBloomQueue:
             return None
         return self.serializer.loads(item)
 
-    def get_block(self, timeout=None) -> Optional[Dict]:
+    def get_block(self, timeout=None) -> t.Optional[t.Dict]:
         """Pop item from the queue.
 
         If optional args block is true and timeout is None (the default), block
@@ -150,20 +199,46 @@ class RedisBloomQueue:
         item = self.db.blpop(self.queue_name, timeout=timeout)
 
         if item:
-            return dict(self.serializer.loads(item[1]))
+            return self.serializer.loads(item[1])
         return None
 
-    def get_bulk(self, number_of_items) -> List[Any]:
-        """Remove and return part of list from queue"""
-        items_list = []
-        for _ in range(number_of_items):
-            item = self.db.lpop(self.queue_name)
+    def get_bulk(self, number_of_items) -> t.List[t.Any]:
+        """Remove and return part of list from queue in one round trip
 
-            if item:
-                items_list.append(self.serializer.loads(item))
-            else:
-                break
-        return items_list
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        items = lpop_bulk(self.db, self.queue_name, number_of_items)
+        return list(map(self.serializer.loads, items))
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Any]:
+        """Block until at least one item is available, then remove and
+        return up to `max_items` in the same round trip
+
+        :param max_items: max number of items to pop
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        items = blpop_bulk(self.db, self.queue_name, max_items, timeout=timeout)
+        return list(map(self.serializer.loads, items))
+
+    def iter_items(
+        self,
+        batch_size: int = 100,
+        block: bool = False,
+        timeout: t.Optional[float] = None,
+    ) -> t.Iterator[t.Any]:
+        """Iterate over items popping them in bulk, drain queue until empty
+        or with `block` wait for new items up to `timeout` seconds.
+        Not consumed items are returned into the queue if iteration
+        stopped early (see `rdt.common.iter_queue_items`)
+
+        :param batch_size: max number of items popped in one round trip
+        :param block: wait for new items instead of stopping on empty queue
+        :param timeout: seconds to wait for new items in blocking mode
+        :returns: iterator -- deserialized items
+        """
+        return iter_queue_items(self, batch_size, block, timeout)
 
     def sizeof(self) -> int:
         """Size of data structure in redis
@@ -171,23 +246,22 @@ class RedisBloomQueue:
         :returns: int -- memory used in bytes
         """
         queue_mu = self.db.memory_usage(self.queue_name)  # type: ignore
-        filter_mu = self.db.memory_usage(self.filter_name)  # type: ignore
         if queue_mu is None:
             queue_mu = 0
-        if filter_mu is None:
-            filter_mu = 0
-        return int(queue_mu + filter_mu)
+        return int(queue_mu + self.filter.sizeof())
 
-    def filter_info(self) -> RedisBloom.BFInfo:
-        """Return bloom filter related information"""
-        return self.db.bfInfo(self.filter_name)
+    def filter_info(self) -> t.Dict[str, t.Any]:
+        """Return bloom filter related information: capacity, size, number
+        of items (`BF.INFO` of redisbloom backend), fill ratio and estimated
+        error rate of bitmap backends"""
+        return self.filter.info()
 
     def filter_len(self) -> int:
-        """Return number of elements in filter set
+        """Return number of elements in filter (estimated for "bitmap")
 
-        :returns: int -- number of elements in queue
+        :returns: int -- number of elements in filter
         """
-        return int(self.filter_info().size)
+        return self.filter.count()
 
     def __len__(self) -> int:
         """Queue length.
@@ -0,0 +1,106 @@
+"""Bloom filter sizing: bits, hashes and memory for target error rate"""
+import math
+import typing as t
+
+
+class BloomSizing(t.NamedTuple):
+    """Parameters of bloom filter sized for capacity and error rate"""
+
+    capacity: int
+    error_rate: float
+    # number of bits (counters of counting filter)
+    bits: int
+    hashes: int
+    # 1 for bitmap filter, 4 for counting filter
+    counter_bits: int = 1
+
+    @property
+    def memory(self) -> int:
+        """Size of redis string value in bytes"""
+        return (self.bits * self.counter_bits + 7) // 8
+
+    @property
+    def bits_per_item(self) -> float:
+        """Memory bits per element at capacity"""
+        return self.bits * self.counter_bits / self.capacity
+
+
+def bloom_size(capacity: int, error_rate: float) -> t.Tuple[int, int]:
+    """Optimal number of bits and hash functions for bloom filter
+
+    :param capacity: expected number of elements
+    :param error_rate: false positive probability at capacity
+    :returns: tuple -- number of bits, number of hash functions
+    """
+    assert capacity > 0, "capacity should be positive"
+    assert 0 < error_rate < 1, "error rate should be in (0, 1)"
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def bloom_sizing(
+    capacity: int, error_rate: float, counter_bits: int = 1
+) -> BloomSizing:
+    """Size bloom filter (`RedisBitmapBloomFilter`, or
+    `RedisCountingBloomFilter` with `counter_bits=4`)
+
+    :param capacity: expected number of elements
+    :param error_rate: false positive probability at capacity
+    :param counter_bits: bits per position
+    :returns: BloomSizing -- bits, hashes and memory
+    """
+    bits, hashes = bloom_size(capacity, error_rate)
+    return BloomSizing(capacity, error_rate, bits, hashes, counter_bits)
+
+
+def expected_error_rate(bits: int, hashes: int, items: int) -> float:
+    """False positive probability of filter with `items` added
+
+    :param bits: number of bits
+    :param hashes: number of hash functions
+    :param items: number of added elements
+    :returns: float -- probability
+    """
+    return (1 - math.exp(-hashes * items / bits)) ** hashes
+
+
+def max_capacity(memory: int, error_rate: float, counter_bits: int = 1) -> int:
+    """Number of elements fitting into memory budget with error rate
+
+    :param memory: bytes
+    :param error_rate: false positive probability at capacity
+    :param counter_bits: bits per position
+    :returns: int -- capacity
+    """
+    assert 0 < error_rate < 1, "error rate should be in (0, 1)"
+    bits = memory * 8 // counter_bits
+    return int(-bits * math.log(2) ** 2 / math.log(error_rate))
+
+
+def scalable_sizing(
+    items: int,
+    capacity: int,
+    error_rate: float,
+    expansion: int = 2,
+    tightening: float = 0.5,
+) -> t.List[BloomSizing]:
+    """Sub-filters `RedisScalableBloomFilter` creates to hold `items`
+
+    :param items: number of elements
+    :param capacity: capacity of first sub-filter
+    :param error_rate: bound of overall false positive probability
+    :param expansion: growth factor of sub-filter capacity
+    :param tightening: ratio of error rates of next and previous sub-filters
+    :returns: list -- sizing of every sub-filter
+    """
+    filters: t.List[BloomSizing] = []
+    while True:
+        index = len(filters)
+        sub_capacity = math.floor(capacity * expansion**index)
+        rate = error_rate * (1 - tightening) * tightening**index
+        filters.append(bloom_sizing(sub_capacity, rate))
+        # next sub-filter is created as soon as current one is full
+        if items < sub_capacity:
+            return filters
+        items -= sub_capacity
@@ -0,0 +1,229 @@
+"""Local read-only copy of bitmap bloom filter for in-process prefiltering"""
+# pylint: disable=consider-using-f-string
+import mmap
+import time
+import typing as t
+
+import mmh3
+
+from rdt.bloom_filters import RedisBitmapBloomFilter
+
+
+# number of GETRANGE commands sent in one pipeline
+PIPELINE_CHUNKS = 16
+
+
+class SnapshotStats(t.NamedTuple):
+    """Snapshot of bloom snapshot counters"""
+
+    # keys found in local copy, no round trip needed
+    local_hits: int
+    # keys confirmed against redis
+    remote_checks: int
+    # number of bytes fetched by refreshes
+    fetched_bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of checks answered locally"""
+        total = self.local_hits + self.remote_checks
+        return self.local_hits / total if total else 0.0
+
+
+class BloomSnapshot:
+    """Local copy of `RedisBitmapBloomFilter` bitmap, fetched in chunks
+    with `GETRANGE` into `bytearray` (or memory mapped file if `path` is
+    given, to share page cache between workers).
+
+    Bits of bloom filter are only set, so key found in the copy is in
+    redis filter as well, even if the copy is stale. Keys not found locally
+    ("maybe new") are checked in redis with one round trip. Refresh the copy
+    periodically (`max_age`) or incrementally by few chunks with
+    `refresh(chunks)`.
+    """
+
+    __slots__ = [
+        "bloom",
+        "chunk_size",
+        "path",
+        "max_age",
+        "refreshed_at",
+        "__data",
+        "__file",
+        "__next_chunk",
+        "__counters",
+    ]
+
+    def __init__(
+        self,
+        bloom: RedisBitmapBloomFilter,
+        chunk_size: int = 1 << 20,
+        path: t.Optional[str] = None,
+        max_age: t.Optional[float] = None,
+    ):
+        """Bloom snapshot, fetch whole bitmap
+
+        :param bloom: bitmap bloom filter (`RedisBloomQueue.filter` with
+            "bitmap" backend)
+        :param chunk_size: bytes fetched by one `GETRANGE`
+        :param path: keep copy in memory mapped file instead of heap
+        :param max_age: seconds after which `exists_bulk` refreshes whole
+            copy, None to refresh only explicitly
+        """
+        assert isinstance(bloom, RedisBitmapBloomFilter), "bitmap required"
+        assert chunk_size > 0, "chunk size should be positive"
+        self.bloom = bloom
+        self.chunk_size = chunk_size
+        self.path = path
+        self.max_age = max_age
+        self.refreshed_at = 0.0
+        self.__next_chunk = 0
+        self.__counters = [0, 0, 0]
+        self.__file: t.Optional[t.BinaryIO] = None
+
+        size = self.nbytes
+        self.__data: t.Union[bytearray, mmap.mmap]
+        if path is None:
+            self.__data = bytearray(size)
+        else:
+            # pylint: disable=consider-using-with
+            self.__file = open(path, "w+b")
+            self.__file.truncate(size)
+            self.__data = mmap.mmap(self.__file.fileno(), size)
+        self.refresh()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of local copy in bytes"""
+        return self.bloom.nbytes
+
+    @property
+    def chunks(self) -> int:
+        """Number of chunks in bitmap"""
+        return (self.nbytes + self.chunk_size - 1) // self.chunk_size
+
+    @property
+    def stats(self) -> SnapshotStats:
+        """Snapshot counters"""
+        return SnapshotStats(*self.__counters)
+
+    def refresh(self, chunks: t.Optional[int] = None) -> int:
+        """Fetch chunks of bitmap, continuing from the chunk where previous
+        partial refresh stopped
+
+        :param chunks: number of chunks to fetch, None for whole bitmap
+        :returns: int -- number of bytes fetched
+        """
+        total = self.chunks
+        if chunks is None or chunks >= total:
+            todo = list(range(total))
+            self.__next_chunk = 0
+        else:
+            todo = [(self.__next_chunk + i) % total for i in range(chunks)]
+            self.__next_chunk = (self.__next_chunk + chunks) % total
+
+        fetched = 0
+        name, size = self.bloom.name, self.nbytes
+        for first in range(0, len(todo), PIPELINE_CHUNKS):
+            group = todo[first : first + PIPELINE_CHUNKS]
+            pipe = self.bloom.db.pipeline(transaction=False)
+            for chunk in group:
+                start = chunk * self.chunk_size
+                pipe.getrange(name, start, start + self.chunk_size - 1)
+            for chunk, part in zip(group, pipe.execute()):
+                start = chunk * self.chunk_size
+                end = min(start + self.chunk_size, size)
+                part = part[: end - start]
+                self.__data[start : start + len(part)] = part
+                # bitmap shorter than filter size (or deleted)
+                self.__data[start + len(part) : end] = bytes(
+                    end - start - len(part)
+                )
+                fetched += len(part)
+
+        if chunks is None or self.__next_chunk == 0:
+            self.refreshed_at = time.monotonic()
+        self.__counters[2] += fetched
+        return fetched
+
+    def contains_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys in local copy only
+
+        :param keys: keys to check
+        :returns: list -- true for keys in filter, false for "maybe new"
+        """
+        data, bits, hashes = self.__data, self.bloom.bits, self.bloom.hashes
+        hash64 = mmh3.hash64
+        res = []
+        for key in keys:
+            if not isinstance(key, (str, bytes)):
+                key = str(key)
+            # same positions as `rdt.bloom_filters.bloom_positions`
+            h1, h2 = hash64(key, signed=False)
+            pos, step = h1 % bits, h2 % bits
+            found = True
+            for _ in range(hashes):
+                if not data[pos >> 3] & (128 >> (pos & 7)):
+                    found = False
+                    break
+                pos = (pos + step) % bits
+            res.append(found)
+        return res
+
+    def contains(self, key: t.Any) -> bool:
+        """Check key in local copy only
+
+        :param key: key to check
+        :returns: bool -- true if key in filter, false for "maybe new"
+        """
+        return self.contains_bulk([key])[0]
+
+    def exists_bulk(self, keys: t.Sequence[t.Any]) -> t.List[bool]:
+        """Check keys locally, then keys not found locally in redis with one
+        round trip
+
+        :param keys: keys to check
+        :returns: list -- true for every key probably in filter
+        """
+        if (
+            self.max_age is not None
+            and time.monotonic() - self.refreshed_at > self.max_age
+        ):
+            self.refresh()
+        res = self.contains_bulk(keys)
+        unknown = [i for i, found in enumerate(res) if not found]
+        self.__counters[0] += len(res) - len(unknown)
+        self.__counters[1] += len(unknown)
+        if unknown:
+            remote = self.bloom.exists_bulk([keys[i] for i in unknown])
+            for i, found in zip(unknown, remote):
+                res[i] = found
+        return res
+
+    def exists(self, key: t.Any) -> bool:
+        """Check if key is (probably) in filter
+
+        :param key: key to check
+        :returns: bool -- true if key probably in filter
+        """
+        return self.exists_bulk([key])[0]
+
+    def close(self):
+        """Close memory mapped file"""
+        if self.__file is not None:
+            self.__data.close()  # type: ignore
+            self.__file.close()
+            self.__file = None
+
+    def __enter__(self) -> "BloomSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, size and wrapped filter
+        """
+        return "<BloomSnapshot size={} {}>".format(self.nbytes, self.bloom)
@@ -0,0 +1,333 @@
+"""Client side cache of positive filter membership results"""
+# pylint: disable=consider-using-f-string
+import collections
+import sys
+import threading
+import time
+import typing as t
+
+import redis
+
+
+# approximate memory used by one cache entry besides member itself
+ENTRY_OVERHEAD = 200
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class CacheStats(t.NamedTuple):
+    """Snapshot of membership cache counters"""
+
+    hits: int
+    misses: int
+    # entries removed to fit into the budget
+    evictions: int
+    # entries removed by server invalidation messages
+    invalidations: int
+    # number of cached entries and their approximate size in bytes
+    size: int
+    memory: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered from local cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MembershipCache:
+    """Local LRU of (key, member) pairs known to be in filter, so repeated
+    `exists` for hot values don't do a round trip.
+
+    Only positive results are cached, since members are removed from
+    filters rarely. Cache is kept correct with redis (>= 6) server assisted
+    client side caching: background thread holds connection subscribed to
+    `__redis__:invalidate` with `CLIENT TRACKING ON REDIRECT <self> BCAST`
+    for `prefixes`, any change of tracked key drop cached members of this
+    key (RESP2 pubsub messages and RESP3 `invalidate` pushes are handled).
+    Prefixes are required with tracking, otherwise every write into the
+    database is sent to the listener.
+
+    Any write to the key (`SADD` as well) invalidates it, so cache helps
+    only read-mostly filters (or bucket filters, where writes invalidate
+    only one bucket), not filters written on every check like filter of
+    unique queue.
+
+    If tracking is off or connection is lost, entries expire after `ttl`
+    seconds. Same cache instance could be shared by few filters.
+    """
+
+    __slots__ = [
+        "__db",
+        "__entries",
+        "__keys",
+        "__lock",
+        "__memory",
+        "__epoch",
+        "__counters",
+        "__closed",
+        "__pubsub",
+        "__thread",
+        "max_entries",
+        "max_memory",
+        "ttl",
+        "prefixes",
+        "tracking",
+    ]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    def __init__(
+        self,
+        r: redis.client.Redis,
+        max_entries: int = 100000,
+        max_memory: t.Optional[int] = None,
+        ttl: t.Optional[float] = 60.0,
+        tracking: bool = True,
+        prefixes: t.Sequence[str] = (),
+    ):
+        """Membership cache, start invalidation listener if `tracking`
+
+        :param r: redis client instance
+        :param max_entries: max number of cached members
+        :param max_memory: approximate memory budget in bytes
+        :param ttl: seconds entry is valid, None - keep until invalidated
+            (only with tracking)
+        :param tracking: use server assisted invalidation
+        :param prefixes: prefixes of tracked keys (filter keys), required
+            with tracking
+        """
+        assert ttl is not None or tracking, "ttl required without tracking"
+        assert prefixes or not tracking, "prefixes required with tracking"
+        self.__db = r
+        self.__entries: t.OrderedDict[
+            t.Tuple[str, t.Any], t.Any
+        ] = collections.OrderedDict()
+        self.__keys: t.Dict[str, t.Set[t.Any]] = {}
+        self.__lock = threading.Lock()
+        self.__memory = 0
+        self.__epoch = 0
+        self.__counters: t.Counter[str] = collections.Counter()
+        self.__closed = threading.Event()
+        self.__pubsub: t.Any = None
+        self.__thread: t.Optional[threading.Thread] = None
+        self.max_entries = max_entries
+        self.max_memory = max_memory
+        self.ttl = ttl
+        self.prefixes = list(prefixes)
+        self.tracking = False
+
+        if tracking:
+            self._subscribe()
+            self.__thread = threading.Thread(target=self._listen, daemon=True)
+            self.__thread.start()
+
+    def covers(self, key: str) -> bool:
+        """Check if changes of the key invalidate cache
+
+        :param key: redis key (or prefix of keys) of filter
+        :returns: bool -- true if key is tracked or cache isn't tracking
+            (entries expire by ttl)
+        """
+        if self.__thread is None:
+            return True
+        return any(key.startswith(prefix) for prefix in self.prefixes)
+
+    @property
+    def epoch(self) -> int:
+        """Number of invalidations received, take it before reading from
+        redis and pass to `add`, so result isn't cached if key was changed
+        while request was in flight"""
+        return self.__epoch
+
+    @property
+    def stats(self) -> CacheStats:
+        """Cache counters"""
+        return CacheStats(
+            hits=self.__counters["hits"],
+            misses=self.__counters["misses"],
+            evictions=self.__counters["evictions"],
+            invalidations=self.__counters["invalidations"],
+            size=len(self.__entries),
+            memory=self.__memory,
+        )
+
+    def _subscribe(self):
+        """Open connection receiving invalidation messages of tracked keys"""
+        pubsub = self.db.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.execute_command("CLIENT", "ID")
+            client_id = pubsub.parse_response(block=True)
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args.extend(["PREFIX", prefix])
+            pubsub.execute_command(*args)
+            pubsub.parse_response(block=True)
+            # RESP3 connection receive invalidations as push messages
+            parser = getattr(pubsub.connection, "_parser", None)
+            set_handler = getattr(parser, "set_invalidation_push_handler", None)
+            if set_handler is not None:
+                set_handler(lambda msg: self._invalidate(msg[1]))
+            pubsub.subscribe(
+                **{
+                    INVALIDATE_CHANNEL: lambda msg: self._invalidate(
+                        msg["data"]
+                    )
+                }
+            )
+        except (redis.exceptions.RedisError, OSError):
+            pubsub.close()
+            self.tracking = False
+            return
+        self.__pubsub = pubsub
+        self.tracking = True
+
+    def _listen(self):
+        """Background thread, dispatch invalidation messages"""
+        while not self.__closed.is_set():
+            if self.__pubsub is None:
+                self.__closed.wait(1.0)
+                if not self.__closed.is_set():
+                    self._subscribe()
+                continue
+            try:
+                self.__pubsub.get_message(timeout=1.0)
+            except (redis.exceptions.RedisError, OSError, ValueError):
+                if self.__closed.is_set():
+                    return
+                # invalidations could be lost, start from scratch
+                self.tracking = False
+                self.__pubsub.close()
+                self.__pubsub = None
+                self.invalidate()
+
+    def _invalidate(self, keys: t.Optional[t.List[bytes]]):
+        if keys is None:
+            # FLUSHDB / FLUSHALL
+            self.invalidate()
+            return
+        for key in keys:
+            self.invalidate(
+                key.decode("utf-8") if isinstance(key, bytes) else key
+            )
+
+    def _remove(self, entry: t.Tuple[str, t.Any]):
+        """Remove entry, lock should be held"""
+        del self.__entries[entry]
+        self.__memory -= sys.getsizeof(entry[1]) + ENTRY_OVERHEAD
+        members = self.__keys[entry[0]]
+        members.discard(entry[1])
+        if not members:
+            del self.__keys[entry[0]]
+
+    def contains(self, key: str, member: t.Any) -> bool:
+        """Check if member of key is cached
+
+        :param key: redis key of filter
+        :param member: member of set
+        :returns: bool -- True if member known to be in filter
+        """
+        entry = (key, member)
+        with self.__lock:
+            expires = self.__entries.get(entry, False)
+            if expires is not False:
+                if expires is None or expires > time.monotonic():
+                    self.__entries.move_to_end(entry)
+                    self.__counters["hits"] += 1
+                    return True
+                self._remove(entry)
+            self.__counters["misses"] += 1
+            return False
+
+    def add(self, key: str, member: t.Any, epoch: t.Optional[int] = None):
+        """Cache member known to be in filter
+
+        :param key: redis key of filter
+        :param member: member of set
+        :param epoch: `epoch` taken before reading from redis
+        """
+        entry = (key, member)
+        with self.__lock:
+            if epoch is not None and epoch != self.__epoch:
+                return
+            if entry in self.__entries:
+                self._remove(entry)
+            expires = None
+            if self.ttl is not None:
+                expires = time.monotonic() + self.ttl
+            self.__entries[entry] = expires
+            self.__keys.setdefault(key, set()).add(member)
+            self.__memory += sys.getsizeof(member) + ENTRY_OVERHEAD
+
+            while self.__entries and (
+                len(self.__entries) > self.max_entries
+                or (
+                    self.max_memory is not None
+                    and self.__memory > self.max_memory
+                )
+            ):
+                self._remove(next(iter(self.__entries)))
+                self.__counters["evictions"] += 1
+
+    def discard(self, key: str, member: t.Any):
+        """Remove member from cache (removed from filter)
+
+        :param key: redis key of filter
+        :param member: member of set
+        """
+        with self.__lock:
+            self.__epoch += 1
+            if (key, member) in self.__entries:
+                self._remove((key, member))
+
+    def invalidate(self, key: t.Optional[str] = None):
+        """Drop cached members of the key or whole cache
+
+        :param key: redis key, None to drop all entries
+        """
+        with self.__lock:
+            self.__epoch += 1
+            if key is None:
+                self.__counters["invalidations"] += len(self.__entries)
+                self.__entries.clear()
+                self.__keys.clear()
+                self.__memory = 0
+                return
+            for member in list(self.__keys.get(key, ())):
+                self._remove((key, member))
+                self.__counters["invalidations"] += 1
+
+    def close(self):
+        """Stop listener thread and close tracking connection"""
+        self.__closed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        if self.__pubsub is not None:
+            self.__pubsub.close()
+            self.__pubsub = None
+        self.tracking = False
+
+    def __enter__(self) -> "MembershipCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of cached members
+
+        :returns: int -- cache size
+        """
+        return len(self.__entries)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, size and Redis connection
+        """
+        return "<MembershipCache size={} tracking={} <{}>>".format(
+            len(self), self.tracking, self.db
+        )
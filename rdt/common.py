@@ -1,2 +1,230 @@
 """Defince common types and functions"""
+import collections
+import os
+import socket
 import typing as t
+import weakref
+
+import redis
+
+
+# remove and return up to ARGV[1] elements from the head of the list,
+# used as atomic fallback for servers without LPOP count (redis < 6.2)
+LPOP_BULK_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+end
+return items
+"""
+
+# KEYS[1] - filter set, KEYS[2] - queue list,
+# ARGV - flat list of (key, payload) pairs. For every pair atomically
+# check and add key into the filter and push payload only for new keys.
+# Returns {accepted, length of the list, {0-based indexes of rejected pairs}}
+UNIQUE_PUSH_SCRIPT = """
+local accepted = 0
+local rejected = {}
+for i = 1, #ARGV, 2 do
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('RPUSH', KEYS[2], ARGV[i + 1])
+        accepted = accepted + 1
+    else
+        rejected[#rejected + 1] = (i - 1) / 2
+    end
+end
+return {accepted, redis.call('LLEN', KEYS[2]), rejected}
+"""
+
+
+class PutResult(t.NamedTuple):
+    """Result of putting batch of items into the queue with filtering"""
+
+    # number of items pushed into the queue
+    accepted: int
+    # indexes (in given batch) of items rejected by the filter
+    rejected: t.List[int]
+    # length of the queue after the operation
+    length: int
+
+
+# cache server capabilities and registered scripts per client instance
+_LPOP_COUNT_SUPPORTED: "weakref.WeakKeyDictionary[t.Any, bool]" = (
+    weakref.WeakKeyDictionary()
+)
+_LPOP_BULK_SCRIPTS: "weakref.WeakKeyDictionary[t.Any, t.Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def lpop_count_unsupported(err: Exception) -> bool:
+    """Check if error of `LPOP key count` means count isn't supported
+    (wrong number of arguments or syntax error, depends on server)
+
+    :param err: error returned by server
+    :returns: bool -- true if server doesn't accept count
+    """
+    return not str(err).startswith("WRONGTYPE")
+
+
+def lpop_count_supported(db: redis.client.Redis, name: str) -> bool:
+    """Check if server support LPOP with count argument (redis >= 6.2),
+    tried once per client instance with zero count (list isn't changed),
+    so proxies and forks are detected by behaviour, not by version
+
+    :param db: redis client instance
+    :param name: list key
+    :returns: bool -- true if LPOP accept count
+    """
+    try:
+        return _LPOP_COUNT_SUPPORTED[db]
+    except KeyError:
+        pass
+    try:
+        db.execute_command("LPOP", name, 0)
+        supported = True
+    except redis.exceptions.ResponseError as err:
+        if not lpop_count_unsupported(err):
+            raise
+        supported = False
+    _LPOP_COUNT_SUPPORTED[db] = supported
+    return supported
+
+
+def lpop_bulk_script(db: redis.client.Redis) -> t.Any:
+    """Script popping elements for servers without LPOP count, registered
+    once per client instance
+
+    :param db: redis client instance
+    :returns: Script -- callable script object
+    """
+    try:
+        return _LPOP_BULK_SCRIPTS[db]
+    except KeyError:
+        script = db.register_script(LPOP_BULK_SCRIPT)
+        _LPOP_BULK_SCRIPTS[db] = script
+        return script
+
+
+def lpop_bulk(db: redis.client.Redis, name: str, count: int) -> t.List[bytes]:
+    """Remove and return up to `count` elements from the head of the list
+    in one round trip. `LPOP` with count is tried once per client, script
+    is used if server doesn't support it (redis < 6.2).
+
+    :param db: redis client instance
+    :param name: list key
+    :param count: max number of elements to pop
+    :returns: list -- raw (not deserialized) elements
+    """
+    if count <= 0:
+        return []
+    supported = _LPOP_COUNT_SUPPORTED.get(db)
+    if supported is not False:
+        try:
+            # raw command to stay compatible with clients without `count`
+            items = db.execute_command("LPOP", name, count)
+        except redis.exceptions.ResponseError as err:
+            if supported or not lpop_count_unsupported(err):
+                raise
+            _LPOP_COUNT_SUPPORTED[db] = False
+        else:
+            _LPOP_COUNT_SUPPORTED[db] = True
+            return list(items or [])
+    return list(lpop_bulk_script(db)(keys=[name], args=[count]) or [])
+
+
+def blpop_bulk(
+    db: redis.client.Redis,
+    name: str,
+    count: int,
+    timeout: t.Optional[float] = None,
+) -> t.List[bytes]:
+    """Block until at least one element available, then remove and return
+    up to `count` elements from the head of the list.
+
+    `BLPOP` and bulk pop are sent in one pipeline, server executes bulk pop
+    right after `BLPOP` returns, so it takes single round trip.
+
+    :param db: redis client instance
+    :param name: list key
+    :param count: max number of elements to pop
+    :param timeout: seconds to wait, None to wait forever
+    :returns: list -- raw elements, empty on timeout
+    """
+    if count <= 0:
+        return []
+    pipe = db.pipeline(transaction=False)
+    pipe.blpop(name, timeout=timeout or 0)
+    if count > 1:
+        if lpop_count_supported(db, name):
+            pipe.execute_command("LPOP", name, count - 1)
+        else:
+            lpop_bulk_script(db)(keys=[name], args=[count - 1], client=pipe)
+    res = pipe.execute()
+    if not res[0]:
+        return []
+    items = [res[0][1]]
+    if count > 1 and res[1]:
+        items.extend(res[1])
+    return items
+
+
+def queue_list_key(queue: t.Any) -> str:
+    """Name of redis list holding items of the queue,
+    `RedisUniqueQueue` and alike store it as `queue_name`,
+    `RedisLifoQueue` as `name`
+
+    :param queue: queue instance
+    :returns: str -- list key
+    """
+    return getattr(queue, "queue_name", None) or queue.name
+
+
+def default_consumer_name() -> str:
+    """Consumer name unique for the process
+
+    :returns: str -- hostname and process id
+    """
+    return "{}:{}".format(socket.gethostname(), os.getpid())
+
+
+def iter_queue_items(
+    queue: t.Any,
+    batch_size: int = 100,
+    block: bool = False,
+    timeout: t.Optional[float] = None,
+) -> t.Iterator[t.Any]:
+    """Yield items of list based queue, popping them in bulk.
+
+    Without `block` stop when queue is drained, with `block` wait for
+    items with `get_block_bulk` and stop after `timeout` seconds without
+    items (None - wait forever). If generator is closed early (`break`,
+    exception in consumer loop), items popped but not yielded yet are
+    returned into the head of the queue preserving their order.
+
+    :param queue: queue instance with `get_bulk` and `get_block_bulk`
+    :param batch_size: max number of items popped in one round trip
+    :param block: wait for new items instead of stopping on empty queue
+    :param timeout: seconds to wait for new items in blocking mode
+    :returns: iterator -- deserialized items
+    """
+    while True:
+        if block:
+            items = queue.get_block_bulk(batch_size, timeout=timeout)
+        else:
+            items = queue.get_bulk(batch_size)
+        if not items:
+            return
+
+        pending = collections.deque(items)
+        try:
+            while pending:
+                yield pending.popleft()
+        finally:
+            if pending:
+                # packed queue keep later items in local remainder
+                return_remainder = getattr(queue, "return_remainder", None)
+                if return_remainder is not None:
+                    return_remainder()
+                payloads = [queue.serializer.dumps(item) for item in pending]
+                queue.db.lpush(queue_list_key(queue), *reversed(payloads))
@@ -0,0 +1,205 @@
+"""Delayed queue, items become available in target queue after given time"""
+# pylint: disable=consider-using-f-string
+import time
+import typing as t
+
+import redis
+from rdt.common import queue_list_key
+from rdt.serializers import BaseSerializer
+
+
+# KEYS[1] - schedule sorted set, KEYS[2] - target list;
+# ARGV[1] - current timestamp, ARGV[2] - batch size.
+# Move all due items into the target list batch by batch,
+# return {number of moved items, score of next scheduled item or false}
+DELAYED_PROMOTE_SCRIPT = """
+local batch = tonumber(ARGV[2])
+local moved = 0
+while true do
+    local due = redis.call(
+        'ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, batch)
+    if #due == 0 then
+        break
+    end
+    -- chunks, since unpack is limited by lua stack size
+    for i = 1, #due, 1000 do
+        local last = math.min(i + 999, #due)
+        redis.call('RPUSH', KEYS[2], unpack(due, i, last))
+        redis.call('ZREM', KEYS[1], unpack(due, i, last))
+    end
+    moved = moved + #due
+    if #due < batch then
+        break
+    end
+end
+local next_due = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {moved, next_due[2] or false}
+"""
+
+
+class RedisDelayedQueue:
+    """Schedule items into sorted set by `not_before` timestamp, due items
+    are moved into the target queue (`RedisLifoQueue` or compatible).
+
+    Item is a member of sorted set, so same item scheduled twice
+    is kept once with the latest timestamp.
+    """
+
+    __slots__ = ["queue", "name", "batch_size", "max_wait"]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.queue.db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Serializer of target queue"""
+        return self.queue.serializer
+
+    def __init__(
+        self,
+        name: str,
+        queue: t.Any,
+        batch_size: int = 1000,
+        max_wait: float = 5.0,
+    ):
+        """Delayed queue
+
+        :param name: sorted set key in redis
+        :param queue: target queue, items are pushed into its list
+        :param batch_size: number of items moved by one command
+        :param max_wait: max seconds `get_block` sleep before checking
+            schedule again, to notice items scheduled by other producers
+        """
+        self.queue = queue
+        self.name = name
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+    def is_empty(self) -> bool:
+        """Check if there are no scheduled items
+
+        :returns bool: True if empty and False if not
+        """
+        return len(self) == 0
+
+    def put(
+        self,
+        item: t.Any,
+        not_before: t.Optional[float] = None,
+        delay: float = 0,
+    ) -> int:
+        """Schedule item
+
+        :param item: serializable item
+        :param not_before: unix timestamp when item become available,
+            by default now plus `delay`
+        :param delay: seconds from now, used if `not_before` isn't defined
+        :returns: int -- number of new scheduled items (0 if rescheduled)
+        """
+        if not_before is None:
+            not_before = time.time() + delay
+        return int(
+            self.db.zadd(self.name, {self.serializer.dumps(item): not_before})
+        )
+
+    def put_bulk(
+        self,
+        items: t.List[t.Any],
+        not_before: t.Union[None, float, t.Sequence[float]] = None,
+        delay: float = 0,
+    ) -> int:
+        """Schedule items with one command
+
+        :param items: list of serializable items
+        :param not_before: timestamp for all items or for every item
+        :param delay: seconds from now, used if `not_before` isn't defined
+        :returns: int -- number of new scheduled items
+        """
+        if not items:
+            return 0
+        if not_before is None:
+            not_before = time.time() + delay
+        if isinstance(not_before, (int, float)):
+            not_before = [not_before] * len(items)
+        mapping = {
+            self.serializer.dumps(item): ts
+            for item, ts in zip(items, not_before)
+        }
+        return int(self.db.zadd(self.name, mapping))
+
+    def _promote(self, now: t.Optional[float] = None):
+        script = self.db.register_script(DELAYED_PROMOTE_SCRIPT)
+        moved, next_due = script(
+            keys=[self.name, queue_list_key(self.queue)],
+            args=[time.time() if now is None else now, self.batch_size],
+        )
+        return int(moved), float(next_due) if next_due else None
+
+    def promote(self, now: t.Optional[float] = None) -> int:
+        """Atomically move all due items into the target queue
+
+        :param now: current timestamp, `time.time()` by default
+        :returns: int -- number of moved items
+        """
+        return self._promote(now)[0]
+
+    def next_due(self) -> t.Optional[float]:
+        """Timestamp of the earliest scheduled item
+
+        :returns: float -- timestamp or None if nothing scheduled
+        """
+        res = self.db.zrange(self.name, 0, 0, withscores=True)
+        if res:
+            return float(res[0][1])
+        return None
+
+    def get_block(self, timeout=None) -> t.Any:
+        """Pop item from the target queue, promoting due items.
+
+        Instead of polling, block on the target list until next scheduled
+        item is due (or `max_wait` passed), so items pushed into the target
+        queue directly or by other promoters wake it up immediately.
+
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: deserialized item or None on timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            _, next_due = self._promote()
+            now = time.time()
+            wait = self.max_wait
+            if next_due is not None:
+                wait = min(wait, next_due - now)
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            # BLPOP treat 0 as infinity, so keep minimal positive timeout
+            item = self.db.blpop(
+                queue_list_key(self.queue), timeout=max(wait, 0.01)
+            )
+            if item:
+                return self.serializer.loads(item[1])
+            if deadline is not None and time.time() >= deadline:
+                return None
+
+    def sizeof(self) -> int:
+        """Size of schedule in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return int(self.db.memory_usage(self.name, samples=0) or 0)
+
+    def __len__(self) -> int:
+        """Number of scheduled (not yet due) items
+
+        :returns: int -- number of items in schedule
+        """
+        return int(self.db.zcard(self.name))
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisDelayedQueue name={} <{}>>".format(self.name, self.db)
@@ -1,5 +1,182 @@
+import math
+import time
+import typing as t
+
 import mmh3
 import redis
+from rdt.cache import MembershipCache
+
+
+DIGEST_BITS = (64, 128)
+
+
+def key_digest(key: t.Any, bits: int = 64) -> bytes:
+    """Fixed width murmur3 (x64, 128 bit) digest of the key, 64 bit digest
+    is the first half of 128 bit one.
+
+    Digest replace raw key in filter to save memory, distinct keys with the
+    same digest are treated as duplicates, see
+    `digest_collision_probability`.
+
+    :param key: str, bytes or value converted with `str`
+    :param bits: 64 or 128
+    :returns: bytes -- digest of `bits // 8` bytes
+    """
+    assert bits in DIGEST_BITS, "digest should be 64 or 128 bits"
+    if not isinstance(key, (str, bytes)):
+        key = str(key)
+    return mmh3.hash_bytes(key)[: bits // 8]
+
+
+def digest_collision_probability(number_of_keys: int, bits: int = 64) -> float:
+    """Probability that at least two of `number_of_keys` distinct keys have
+    the same digest (birthday bound `1 - exp(-n * (n - 1) / 2 ** (bits + 1))`).
+
+    For 64 bit digests: 1e6 keys - 2.7e-8, 1e8 keys - 2.7e-4,
+    1e9 keys - 2.7%, chance for a new key to be falsely rejected is
+    about `n / 2 ** bits` (5.4e-11 with 1e9 keys). 128 bit digests are
+    safe for any practical number of keys.
+
+    :param number_of_keys: number of keys in filter
+    :param bits: digest size
+    :returns: float -- collision probability
+    """
+    pairs = number_of_keys * (number_of_keys - 1) / 2
+    return -math.expm1(-pairs / 2**bits)
+
+
+def migrate_set_to_digest(
+    db: redis.client.Redis,
+    name: str,
+    bits: int = 64,
+    batch_size: int = 1000,
+    target: t.Optional[str] = None,
+) -> int:
+    """Convert existing filter set of raw keys into set of digests.
+
+    Members are scanned with `SSCAN` and added into temporary set in
+    pipelined batches, then temporary set atomically replace `name`
+    (or become `target`). Keys added into the source set during
+    migration may be lost, so stop producers first.
+
+    Converted set is marked with key `<set>:digest-bits` holding digest
+    size, migration of marked set is refused (digests would be hashed
+    again and real keys wouldn't match any more).
+
+    :param db: redis client instance
+    :param name: key of set with raw keys
+    :param bits: digest size, 64 or 128
+    :param batch_size: number of members processed by one round trip
+    :param target: key for digest set, by default replace source set
+    :returns: int -- number of converted members
+    """
+    assert bits in DIGEST_BITS, "digest should be 64 or 128 bits"
+    assert not db.exists(
+        digest_marker_key(name)
+    ), "{} is already set of digests".format(name)
+    tmp = "{}:digest-migration".format(name)
+    db.delete(tmp)
+    migrated = 0
+    batch: t.List[bytes] = []
+    for member in db.sscan_iter(name, count=batch_size):
+        batch.append(key_digest(member, bits))
+        if len(batch) >= batch_size:
+            migrated += db.sadd(tmp, *batch)
+            batch = []
+    if batch:
+        migrated += db.sadd(tmp, *batch)
+    pipe = db.pipeline(transaction=True)
+    if migrated:
+        pipe.rename(tmp, target or name)
+    elif target is None:
+        pipe.delete(name)
+    pipe.set(digest_marker_key(target or name), bits)
+    pipe.execute()
+    return migrated
+
+
+def digest_marker_key(name: str) -> str:
+    """Key marking set `name` converted by `migrate_set_to_digest`
+
+    :param name: key of set
+    :returns: str -- marker key, holds digest size
+    """
+    return "{}:digest-bits".format(name)
+
+
+def filter_cache(
+    db: redis.client.Redis,
+    cache: t.Union[MembershipCache, bool, None],
+    prefix: str,
+) -> t.Optional[MembershipCache]:
+    """Membership cache of filter, new one tracking filter keys if `cache`
+    is True
+
+    :param db: redis client instance
+    :param cache: shared cache, True to create cache of the filter or None
+    :param prefix: prefix of filter keys
+    :returns: MembershipCache -- cache or None
+    """
+    if cache is True:
+        return MembershipCache(db, prefixes=[prefix])
+    if cache is None or cache is False:
+        return None
+    assert cache.covers(prefix), "cache doesn't track {}".format(prefix)
+    return cache
+
+
+def cached_sismember(
+    db: redis.client.Redis,
+    cache: t.Optional[MembershipCache],
+    name: str,
+    member: t.Any,
+) -> bool:
+    """`SISMEMBER` answered from local cache if member is known to be in set,
+    positive results are cached
+
+    :param db: redis client instance
+    :param cache: membership cache or None
+    :param name: key of set
+    :param member: member of set
+    :returns: bool -- true if member in set
+    """
+    if cache is None:
+        return bool(db.sismember(name, member))
+    if cache.contains(name, member):
+        return True
+    epoch = cache.epoch
+    found = bool(db.sismember(name, member))
+    if found:
+        cache.add(name, member, epoch)
+    return found
+
+
+# KEYS[1] - registry of generations, KEYS[2] - current generation set,
+# KEYS[3..] - older live generations; ARGV[1] - unix time when current
+# generation expires, ARGV[2] - current generation number, ARGV[3..] - values.
+# Add values not present in any live generation into the current one,
+# return number of added values
+GENERATIONAL_ADD_SCRIPT = """
+local added = 0
+for i = 3, #ARGV do
+    local seen = false
+    for k = 2, #KEYS do
+        if redis.call('SISMEMBER', KEYS[k], ARGV[i]) == 1 then
+            seen = true
+            break
+        end
+    end
+    if not seen then
+        added = added + redis.call('SADD', KEYS[2], ARGV[i])
+    end
+end
+if added > 0 then
+    redis.call('EXPIREAT', KEYS[2], ARGV[1])
+    redis.call('SADD', KEYS[1], ARGV[2])
+    redis.call('EXPIREAT', KEYS[1], ARGV[1])
+end
+return added
+"""
 
 
 class RedisSetFilter:
@@ -10,30 +187,59 @@ class RedisSetFilter:
     (4294967295, more than 4 billion of members per set).
 
     Useful to filter urls already crawled, request parameters etc
+
+    With `digest_bits` (64 or 128) set stores fixed width digests of values
+    instead of raw values (see `key_digest`), existing set could be
+    converted with `migrate_set_to_digest`.
+
+    Pass `cache` to keep positive `exists` results locally (see
+    `rdt.cache.MembershipCache`), only for filters rarely written.
     """
 
-    __slots__ = ["__db", "name"]
+    __slots__ = ["__db", "name", "digest_bits", "cache"]
 
     @property
     def db(self) -> redis.client.Redis:
         return self.__db
 
-    def __init__(self, name: str, r: redis.client.Redis):
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        digest_bits: t.Optional[int] = None,
+        cache: t.Union[MembershipCache, bool, None] = None,
+    ):
         """RedisSetFilter
 
         :param name: filter name
         :param r: redis client instance
+        :param digest_bits: store 64 or 128 bit digests of values,
+            None (the default) to store raw values
+        :param cache: local cache of members known to be in filter, cache
+            shared with other filters should track `name`, True to create
+            cache tracking `name` (close it with `cache.close()`)
         """
+        assert digest_bits is None or digest_bits in DIGEST_BITS
         self.__db = r
         self.name = name
+        self.digest_bits = digest_bits
+        self.cache = filter_cache(r, cache, name)
+
+    def _member(self, value: t.Any) -> t.Any:
+        if self.digest_bits is None:
+            return value
+        return key_digest(value, self.digest_bits)
 
     def to_set(self) -> set:
         """Return redis set as python set object
 
         Redis store stings as raw data, and we need decode them back
         https://stackoverflow.com/q/10599147/1376206
-        :returns: set -- set of items in redis structure
+        :returns: set -- set of items in redis structure (raw digests
+            in digest mode)
         """
+        if self.digest_bits is not None:
+            return set(self.db.smembers(self.name))
         return set([x.decode("utf-8") for x in self.db.smembers(self.name)])
 
     def add(self, *values: str) -> int:
@@ -42,7 +248,7 @@ class RedisSetFilter:
         :param values: one or more values to add
         :returns: int -- number of elements added
         """
-        return self.db.sadd(self.name, *values)
+        return self.db.sadd(self.name, *map(self._member, values))
 
     def remove(self, value: str) -> bool:
         """Remove specified value from set
@@ -50,7 +256,10 @@ class RedisSetFilter:
         :param value: delete this value from set
         :returns: bool -- true if element deleted
         """
-        return bool(self.db.srem(self.name, value))
+        member = self._member(value)
+        if self.cache is not None:
+            self.cache.discard(self.name, member)
+        return bool(self.db.srem(self.name, member))
 
     def exists(self, value: str) -> bool:
         """Check if element exists
@@ -58,7 +267,9 @@ class RedisSetFilter:
         :param value: check if value present in set
         :returns: bool -- true if exists
         """
-        return bool(self.db.sismember(self.name, value))
+        return cached_sismember(
+            self.db, self.cache, self.name, self._member(value)
+        )
 
     def sizeof(self) -> int:
         """Size of data structure in redis
@@ -90,16 +301,23 @@ class RedisBucketFilter:
 
     >> mmh3.hash('B10E7oDEO6-', signed=False).to_bytes(
     >>           4, byteorder='big').hex()
+
+    Pass `cache` to keep positive `exists` results locally (see
+    `rdt.cache.MembershipCache`), writes invalidate cache of one bucket.
     """
 
-    __slots__ = ["__db", "name", "bucket_digits"]
+    __slots__ = ["__db", "name", "bucket_digits", "cache"]
 
     @property
     def db(self) -> redis.client.Redis:
         return self.__db
 
     def __init__(
-        self, name: str, r: redis.client.Redis, bucket_digits: int = 3
+        self,
+        name: str,
+        r: redis.client.Redis,
+        bucket_digits: int = 3,
+        cache: t.Union[MembershipCache, bool, None] = None,
     ):
         """RedisSetFilter
 
@@ -108,10 +326,14 @@ class RedisBucketFilter:
         :param bucket_digits: number of digits to cut from mmr3 hash, so with 1
         number of buckets would be 10, with 2 - 100, with 3 - 1000 etc,
         default 3
+        :param cache: local cache of members known to be in filter, cache
+            shared with other filters should track `name:`, True to create
+            cache tracking buckets (close it with `cache.close()`)
         """
         self.__db = r
         self.name = name
         self.bucket_digits = bucket_digits
+        self.cache = filter_cache(r, cache, "{}:".format(name))
 
     def _build_key(self, value: str) -> str:
         """Calculate redis key (with bucket) according to value
@@ -147,7 +369,7 @@ class RedisBucketFilter:
         :returns: bool -- true if exists
         """
         k = self._build_key(value)
-        return bool(self.db.sismember(k, value))
+        return cached_sismember(self.db, self.cache, k, value)
 
     def add(self, *values: str) -> int:
         """Add value or values into the filter
@@ -168,6 +390,8 @@ class RedisBucketFilter:
         :returns: bool -- true if element deleted
         """
         key = self._build_key(value)
+        if self.cache is not None:
+            self.cache.discard(key, value)
         return bool(self.db.srem(key, value))
 
     def sizeof(self) -> int:
@@ -198,3 +422,177 @@ class RedisBucketFilter:
         :returns: str -- class, key name and Redis connection
         """
         return "<RedisBucketFilter name={} <{}>>".format(self.name, self.db)
+
+
+class RedisGenerationalFilter:
+    """Filter forgetting values after `window * generations` seconds.
+
+    Values are added into set of current time window (generation),
+    `exists` check all live generations in one pipeline. Generations
+    older than `generations` windows are dropped as whole with one
+    `UNLINK` by `expire` (called on first add in new window), so expiry
+    doesn't scan members. Numbers of generations are kept in
+    `{name}:generations` set, all keys have `EXPIREAT` as well.
+
+    Value is forgotten `generations - 1` to `generations` windows after it
+    was added, adding value again doesn't prolong its life.
+    """
+
+    __slots__ = [
+        "__db",
+        "__generation",
+        "name",
+        "registry_name",
+        "window",
+        "generations",
+        "digest_bits",
+        "clock",
+    ]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        return self.__db
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        window: int = 86400,
+        generations: int = 7,
+        digest_bits: t.Optional[int] = None,
+        clock: t.Callable[[], float] = time.time,
+    ):
+        """RedisGenerationalFilter
+
+        :param name: filter name, prefix of generation keys
+        :param r: redis client instance
+        :param window: seconds in one generation
+        :param generations: number of live generations
+        :param digest_bits: store 64 or 128 bit digests of values
+        :param clock: function returning current unix time
+        """
+        assert generations > 0, "at least one generation required"
+        assert digest_bits is None or digest_bits in DIGEST_BITS
+        self.__db = r
+        self.__generation: t.Optional[int] = None
+        self.name = name
+        self.registry_name = f"{name}:generations"
+        self.window = window
+        self.generations = generations
+        self.digest_bits = digest_bits
+        self.clock = clock
+
+    def _member(self, value: t.Any) -> t.Any:
+        if self.digest_bits is None:
+            return value
+        return key_digest(value, self.digest_bits)
+
+    def generation(self) -> int:
+        """Number of current generation
+
+        :returns: int -- number of windows since epoch
+        """
+        return int(self.clock() // self.window)
+
+    def generation_keys(self) -> t.List[str]:
+        """Keys of live generations, current first
+
+        :returns: list -- redis keys
+        """
+        current = self.generation()
+        return [
+            "{}:{}".format(self.name, current - i)
+            for i in range(self.generations)
+        ]
+
+    def expire(self) -> int:
+        """Drop generations older than live ones
+
+        :returns: int -- number of dropped generation sets
+        """
+        oldest = self.generation() - self.generations + 1
+        old = [
+            int(x)
+            for x in self.db.smembers(self.registry_name)
+            if int(x) < oldest
+        ]
+        if not old:
+            return 0
+        pipe = self.db.pipeline(transaction=False)
+        pipe.unlink(*["{}:{}".format(self.name, x) for x in old])
+        pipe.srem(self.registry_name, *old)
+        return int(pipe.execute()[0])
+
+    def add(self, *values: str) -> int:
+        """Add values not present in live generations into current one
+
+        :param values: one or more values to add
+        :returns: int -- number of added values
+        """
+        if not values:
+            return 0
+        generation = self.generation()
+        if generation != self.__generation:
+            self.__generation = generation
+            self.expire()
+        expire_at = (generation + self.generations) * self.window
+        script = self.db.register_script(GENERATIONAL_ADD_SCRIPT)
+        return int(
+            script(
+                keys=[self.registry_name, *self.generation_keys()],
+                args=[int(expire_at), generation, *map(self._member, values)],
+            )
+        )
+
+    def exists(self, value: str) -> bool:
+        """Check if value present in any live generation
+
+        :param value: value to check
+        :returns: bool -- true if exists
+        """
+        member = self._member(value)
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.generation_keys():
+            pipe.sismember(key, member)
+        return any(pipe.execute())
+
+    def remove(self, value: str) -> bool:
+        """Remove value from all live generations
+
+        :param value: value to remove
+        :returns: bool -- true if value was deleted
+        """
+        member = self._member(value)
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.generation_keys():
+            pipe.srem(key, member)
+        return any(pipe.execute())
+
+    def sizeof(self) -> int:
+        """Size of live generations in redis
+
+        :returns: int -- memory used in bytes
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.generation_keys():
+            pipe.memory_usage(key, samples=0)
+        return sum(int(x or 0) for x in pipe.execute())
+
+    def __len__(self) -> int:
+        """Number of values in live generations
+
+        :returns: int -- number of elements
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.generation_keys():
+            pipe.scard(key)
+        return sum(pipe.execute())
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisGenerationalFilter name={} <{}>>".format(
+            self.name, self.db
+        )
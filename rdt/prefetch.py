@@ -0,0 +1,203 @@
+"""Client side prefetching consumer for list based queues"""
+# pylint: disable=consider-using-f-string
+import collections
+import threading
+import time
+import typing as t
+
+from rdt.common import queue_list_key
+
+
+class PrefetchingConsumer:
+    """Keep local buffer of items filled by background thread with bulk
+    pops, so `get` is a local deque pop instead of network round trip.
+
+    Works with list based queues having `get_block_bulk`
+    (`RedisLifoQueue`, `RedisUniqueQueue`, `RedisBloomQueue`). Items left in
+    the buffer are returned into the head of the queue on `close`, items
+    are lost if process crash, so keep `high_watermark` reasonably small.
+    Errors of background fetch (lost connection) are raised on next call,
+    fetching is retried after `block_timeout`.
+    """
+
+    __slots__ = [
+        "queue",
+        "low_watermark",
+        "high_watermark",
+        "batch_size",
+        "block_timeout",
+        "__buffer",
+        "__cond",
+        "__closed",
+        "__error",
+        "__thread",
+    ]
+
+    def __init__(
+        self,
+        queue: t.Any,
+        low_watermark: int = 100,
+        high_watermark: int = 1000,
+        batch_size: t.Optional[int] = None,
+        block_timeout: float = 1.0,
+    ):
+        """Prefetching consumer, start background thread
+
+        :param queue: queue instance
+        :param low_watermark: fetch more items when buffer size drops to it
+        :param high_watermark: max number of items in buffer
+        :param batch_size: max number of items per pop, by default up to
+            `high_watermark`
+        :param block_timeout: seconds background thread block on empty queue
+            before checking if consumer closed
+        """
+        assert 0 <= low_watermark < high_watermark, "low < high watermark"
+        self.queue = queue
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.batch_size = batch_size or high_watermark
+        self.block_timeout = block_timeout
+
+        self.__buffer: t.Deque[t.Any] = collections.deque()
+        self.__cond = threading.Condition()
+        self.__closed = False
+        self.__error: t.Optional[BaseException] = None
+        self.__thread = threading.Thread(target=self._fill, daemon=True)
+        self.__thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """True if consumer closed"""
+        return self.__closed
+
+    def _fill(self):
+        """Background thread, fill buffer up to high watermark"""
+        while True:
+            with self.__cond:
+                while (
+                    not self.__closed
+                    and len(self.__buffer) > self.low_watermark
+                ):
+                    self.__cond.wait()
+                if self.__closed:
+                    return
+                need = self.high_watermark - len(self.__buffer)
+
+            try:
+                items = self.queue.get_block_bulk(
+                    min(need, self.batch_size), timeout=self.block_timeout
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                # raised to consumer on next call, retried after timeout
+                with self.__cond:
+                    self.__error = err
+                    self.__cond.notify_all()
+                    if not self.__closed:
+                        self.__cond.wait(self.block_timeout)
+                continue
+
+            with self.__cond:
+                self.__buffer.extend(items)
+                if items:
+                    self.__cond.notify_all()
+                if self.__closed:
+                    return
+
+    def _raise_error(self):
+        """Raise error of background thread, lock should be held"""
+        if self.__error is not None:
+            err, self.__error = self.__error, None
+            raise err
+
+    def get(self) -> t.Any:
+        """Pop item from local buffer without waiting
+
+        :returns: item or None if buffer is empty
+        """
+        with self.__cond:
+            self._raise_error()
+            if not self.__buffer:
+                return None
+            item = self.__buffer.popleft()
+            if len(self.__buffer) <= self.low_watermark:
+                self.__cond.notify_all()
+            return item
+
+    def get_bulk(self, number_of_items: int) -> t.List[t.Any]:
+        """Pop up to `number_of_items` from local buffer without waiting
+
+        :param number_of_items: max number of items
+        :returns: list -- items
+        """
+        with self.__cond:
+            self._raise_error()
+            count = min(number_of_items, len(self.__buffer))
+            items = [self.__buffer.popleft() for _ in range(count)]
+            if len(self.__buffer) <= self.low_watermark:
+                self.__cond.notify_all()
+            return items
+
+    def get_block(self, timeout=None) -> t.Any:
+        """Pop item, wait until buffer filled if necessary
+
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: item or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__cond:
+            while not self.__buffer:
+                self._raise_error()
+                if self.__closed:
+                    return None
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        return None
+                self.__cond.wait(wait)
+            item = self.__buffer.popleft()
+            if len(self.__buffer) <= self.low_watermark:
+                self.__cond.notify_all()
+            return item
+
+    def close(self) -> int:
+        """Stop background thread and return not consumed items into the
+        head of the queue, preserving their order
+
+        :returns: int -- number of items returned into the queue
+        """
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+        self.__thread.join()
+
+        with self.__cond:
+            items = list(self.__buffer)
+            self.__buffer.clear()
+        if not items:
+            return 0
+        payloads = [self.queue.serializer.dumps(item) for item in items]
+        self.queue.db.lpush(queue_list_key(self.queue), *reversed(payloads))
+        return len(items)
+
+    def __enter__(self) -> "PrefetchingConsumer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of items in local buffer
+
+        :returns: int -- buffer size
+        """
+        return len(self.__buffer)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class and wrapped queue
+        """
+        return "<PrefetchingConsumer buffer={} {}>".format(
+            len(self), self.queue
+        )
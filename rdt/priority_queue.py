@@ -0,0 +1,309 @@
+"""Priority queue on top of redis sorted set"""
+# pylint: disable=consider-using-f-string
+import typing as t
+
+import redis
+from rdt.common import PutResult
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+from rdt.unique_queue import Same
+
+
+# KEYS[1] - sorted set of ids, KEYS[2] - hash id -> payload,
+# KEYS[3] - id counter, KEYS[4] - filter set;
+# ARGV[1] - '1' for unique mode, ARGV[2..] - triples (key, score, payload).
+# In unique mode key is used as id and checked against filter, otherwise
+# id is zero padded counter, so items with same priority kept in FIFO order
+PRIORITY_PUT_SCRIPT = """
+local unique = ARGV[1] == '1'
+local accepted = 0
+local rejected = {}
+for i = 2, #ARGV, 3 do
+    local id = false
+    if unique then
+        if redis.call('SADD', KEYS[4], ARGV[i]) == 1 then
+            id = ARGV[i]
+        end
+    else
+        id = string.format('%016d', redis.call('INCR', KEYS[3]))
+    end
+    if id then
+        redis.call('ZADD', KEYS[1], ARGV[i + 1], id)
+        redis.call('HSET', KEYS[2], id, ARGV[i + 2])
+        accepted = accepted + 1
+    else
+        rejected[#rejected + 1] = (i - 2) / 3
+    end
+end
+return {accepted, redis.call('ZCARD', KEYS[1]), rejected}
+"""
+
+# KEYS[1] - sorted set of ids, KEYS[2] - hash id -> payload;
+# ARGV[1] - number of items. Pop ids with lowest score and their payloads
+PRIORITY_POP_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1], tonumber(ARGV[1]))
+local items = {}
+for i = 1, #popped, 2 do
+    local payload = redis.call('HGET', KEYS[2], popped[i])
+    if payload then
+        redis.call('HDEL', KEYS[2], popped[i])
+        items[#items + 1] = payload
+    end
+end
+return items
+"""
+
+# same as PRIORITY_POP_SCRIPT, ARGV[2] - id popped by BZPOPMIN, ARGV[3] - its
+# score. Id is pushed back first, so it's popped with the batch atomically
+PRIORITY_REPOP_SCRIPT = (
+    """
+redis.call('ZADD', KEYS[1], 'NX', ARGV[3], ARGV[2])
+"""
+    + PRIORITY_POP_SCRIPT
+)
+
+
+class RedisPriorityQueue:
+    """Priority queue, items with lower priority value are popped first.
+
+    Ids ordered by priority stored in sorted set, payloads in hash.
+    With `unique=True` item key (see `keygetter`) is used as id and
+    filtered against set, same as in `RedisUniqueQueue`.
+    """
+
+    __slots__ = [
+        "__db",
+        "__serializer",
+        "name",
+        "queue_name",
+        "items_name",
+        "ids_name",
+        "filter_name",
+        "unique",
+        "keygetter",
+        "prioritygetter",
+    ]
+
+    __serializer: BaseSerializer
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Current serializer
+
+        :returns: ItemSerializer -- current serializer instance
+        """
+        return self.__serializer
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        serializer: BaseSerializer = JsonItemSerializer,
+        unique: bool = False,
+        keygetter: t.Callable[[t.Dict], t.Any] = Same,
+        prioritygetter: t.Optional[t.Callable[[t.Dict], float]] = None,
+    ):
+        """Priority queue
+
+        :param name: queue name, used as prefix for redis keys
+        :param r: redis client instance
+        :param serializer: serializer class
+        :param unique: filter items by key
+        :param keygetter: function to access to item key in unique mode,
+            by default return same element
+        :param prioritygetter: function to get priority from item, used
+            when priority isn't passed explicitly, by default priority is 0
+        """
+        self.__db = r
+        self.__serializer = serializer()
+        self.name = name
+        self.queue_name = f"{name}:queue"
+        self.items_name = f"{name}:items"
+        self.ids_name = f"{name}:ids"
+        self.filter_name = f"{name}:filter"
+        self.unique = unique
+        self.keygetter = keygetter
+        self.prioritygetter = prioritygetter
+
+    def _priority(self, item: t.Any, priority: t.Optional[float]) -> float:
+        if priority is not None:
+            return priority
+        if self.prioritygetter is not None:
+            return self.prioritygetter(item)
+        return 0
+
+    def is_empty(self) -> bool:
+        """Check if queue is empty
+
+        :returns bool: True if empty and False if not
+        """
+        return len(self) == 0
+
+    def in_filter(self, value: t.Dict) -> bool:
+        """Check if element already in filter (unique mode)"""
+        key = self.keygetter(value)
+        return bool(self.db.sismember(self.filter_name, key))
+
+    def put(self, item: t.Dict, priority: t.Optional[float] = None) -> int:
+        """Put item into the queue.
+
+        :param item: serializable item to push into the queue
+        :param priority: lower values popped first
+        :returns: int -- the length of the queue after the operation,
+            0 if item already in filter
+        """
+        result = self.put_bulk_result([item], [priority])
+        if result.accepted:
+            return result.length
+        return 0
+
+    def put_bulk(
+        self,
+        items: t.List[t.Dict],
+        priorities: t.Optional[t.Sequence[t.Optional[float]]] = None,
+    ) -> bool:
+        """Put items into the queue with one server side script call
+
+        :param items: list of serializables to push into the queue
+        :param priorities: priority for every item
+        :returns: bool - true if at least one item was pushed
+        """
+        return bool(self.put_bulk_result(items, priorities).accepted)
+
+    def put_bulk_result(
+        self,
+        items: t.List[t.Dict],
+        priorities: t.Optional[t.Sequence[t.Optional[float]]] = None,
+    ) -> PutResult:
+        """Put items into the queue with one server side script call
+
+        :param items: list of serializables to push into the queue
+        :param priorities: priority for every item
+        :returns: PutResult -- number of accepted items, indexes of rejected
+            items and length of the queue after the operation
+        """
+        if not items:
+            return PutResult(0, [], len(self))
+        if priorities is None:
+            priorities = [None] * len(items)
+        assert len(priorities) == len(items), "priority required for each item"
+
+        args: t.List[t.Any] = [int(self.unique)]
+        for item, priority in zip(items, priorities):
+            args.append(self.keygetter(item) if self.unique else "")
+            args.append(self._priority(item, priority))
+            args.append(self.serializer.dumps(item))
+
+        script = self.db.register_script(PRIORITY_PUT_SCRIPT)
+        accepted, length, rejected = script(
+            keys=[
+                self.queue_name,
+                self.items_name,
+                self.ids_name,
+                self.filter_name,
+            ],
+            args=args,
+        )
+        return PutResult(int(accepted), [int(i) for i in rejected], int(length))
+
+    def get(self) -> t.Any:
+        """Pop item with the lowest priority value
+
+        :returns: deserialized item or None if queue is empty
+        """
+        items = self.get_bulk(1)
+        if items:
+            return items[0]
+        return None
+
+    def get_bulk(self, number_of_items: int) -> t.List[t.Any]:
+        """Pop up to `number_of_items` with lowest priority values using
+        `ZPOPMIN` with count, in one round trip
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        if number_of_items <= 0:
+            return []
+        script = self.db.register_script(PRIORITY_POP_SCRIPT)
+        items = script(
+            keys=[self.queue_name, self.items_name], args=[number_of_items]
+        )
+        return list(map(self.serializer.loads, items))
+
+    def get_block(self, timeout=None) -> t.Any:
+        """Pop item with the lowest priority value, block if necessary
+        until an item is available (`BZPOPMIN`).
+
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: deserialized item or None on timeout
+        """
+        items = self.get_block_bulk(1, timeout=timeout)
+        if items:
+            return items[0]
+        return None
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Any]:
+        """Block until at least one item is available, then pop up to
+        `max_items` with lowest priority values
+
+        Items are popped with ids and payloads atomically in one round trip
+        if queue isn't empty. `BZPOPMIN` (can't be called from script) is
+        used only to wait on empty queue, popped id is pushed back and
+        popped with the batch by one script call.
+
+        :param max_items: max number of items to pop
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        if max_items <= 0:
+            return []
+        items = self.get_bulk(max_items)
+        if items:
+            return items
+
+        popped = self.db.bzpopmin(self.queue_name, timeout=timeout or 0)
+        if not popped:
+            return []
+        _, item_id, score = popped
+        repop = self.db.register_script(PRIORITY_REPOP_SCRIPT)
+        items = repop(
+            keys=[self.queue_name, self.items_name],
+            args=[max_items, item_id, repr(float(score))],
+        )
+        return list(map(self.serializer.loads, items))
+
+    def sizeof(self) -> int:
+        """Size of data structures in redis
+
+        :returns: int -- memory used in bytes
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for key in (self.queue_name, self.items_name, self.filter_name):
+            pipe.memory_usage(key)
+        return sum(int(x or 0) for x in pipe.execute())
+
+    def filter_len(self) -> int:
+        """Return number of elements in filter set (unique mode)
+
+        :returns: int -- number of elements in filter
+        """
+        return int(self.db.scard(self.filter_name))
+
+    def __len__(self) -> int:
+        """Queue length.
+
+        :returns: int -- number of elements in queue
+        """
+        return int(self.db.zcard(self.queue_name))
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisPriorityQueue name={} <{}>>".format(self.name, self.db)
@@ -0,0 +1,233 @@
+"""Write-behind producer, buffer puts and flush them in bulk"""
+# pylint: disable=consider-using-f-string
+import threading
+import time
+import typing as t
+
+
+class ProducerStats(t.NamedTuple):
+    """Snapshot of producer flush statistics"""
+
+    # number of flushes done
+    flushes: int
+    # number of items sent to the queue
+    items: int
+    # number of items rejected by queue filter
+    dropped: int
+    # largest flushed batch
+    max_batch_size: int
+    # total and max seconds spent in flushes
+    flush_time: float
+    max_flush_time: float
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of items per flush"""
+        return self.items / self.flushes if self.flushes else 0.0
+
+    @property
+    def mean_flush_time(self) -> float:
+        """Average flush latency in seconds"""
+        return self.flush_time / self.flushes if self.flushes else 0.0
+
+
+class BufferedProducer:
+    """Buffer items in memory and push them into the queue with one
+    `put_bulk` call when buffer reach `max_items` or oldest item waited
+    `flush_interval_ms`.
+
+    Thread-safe, flushes are serialized so items order is preserved.
+    Use as context manager to flush on exit. Buffered items are lost
+    if process crash.
+
+    Items are never dropped by failed flush: batch is returned into the
+    buffer and retried, error of the flush is raised by the next call
+    after its items are buffered, so caller shouldn't put them again.
+    Only `BufferError` (buffer reached `max_buffer` while queue is
+    unavailable) means items weren't buffered.
+    """
+
+    __slots__ = [
+        "queue",
+        "max_items",
+        "max_buffer",
+        "flush_interval_ms",
+        "__buffer",
+        "__first_put",
+        "__cond",
+        "__flush_lock",
+        "__closed",
+        "__error",
+        "__stats",
+        "__thread",
+    ]
+
+    def __init__(
+        self,
+        queue: t.Any,
+        max_items: int = 100,
+        flush_interval_ms: int = 50,
+        max_buffer: int = 10000,
+    ):
+        """Buffered producer, start background flushing thread
+
+        :param queue: queue instance with `put_bulk` method
+        :param max_items: flush when buffer reach this number of items
+        :param flush_interval_ms: flush items buffered longer than this
+        :param max_buffer: max number of buffered items, puts beyond it
+            raise `BufferError` (queue unavailable and flushes fail)
+        """
+        assert max_items > 0, "max_items should be positive"
+        assert max_buffer >= max_items, "max_buffer less than max_items"
+        self.queue = queue
+        self.max_items = max_items
+        self.max_buffer = max_buffer
+        self.flush_interval_ms = flush_interval_ms
+
+        self.__buffer: t.List[t.Any] = []
+        self.__first_put = 0.0
+        self.__cond = threading.Condition()
+        self.__flush_lock = threading.Lock()
+        self.__closed = False
+        self.__error: t.Optional[BaseException] = None
+        self.__stats = ProducerStats(0, 0, 0, 0, 0.0, 0.0)
+        self.__thread = threading.Thread(target=self._run, daemon=True)
+        self.__thread.start()
+
+    @property
+    def stats(self) -> ProducerStats:
+        """Flush statistics"""
+        return self.__stats
+
+    def _run(self):
+        """Background thread, flush items waiting longer than interval"""
+        interval = self.flush_interval_ms / 1000
+        while True:
+            with self.__cond:
+                while not self.__closed and not self.__buffer:
+                    self.__cond.wait()
+                if self.__closed:
+                    return
+                wait = self.__first_put + interval - time.monotonic()
+                if wait > 0:
+                    self.__cond.wait(wait)
+                    continue
+            try:
+                self.flush()
+            except Exception as err:  # pylint: disable=broad-except
+                # raised to producer on next call, batch is kept in buffer
+                # and retried after interval
+                self.__error = err
+                with self.__cond:
+                    if not self.__closed:
+                        self.__cond.wait(interval)
+
+    def _raise_error(self):
+        if self.__error is not None:
+            err, self.__error = self.__error, None
+            raise err
+
+    def put(self, item: t.Any) -> int:
+        """Buffer item, flush if buffer is full. Error of failed flush is
+        raised after item is buffered
+
+        :param item: serializable item
+        :returns: int -- number of buffered items
+        """
+        return self.put_bulk([item])
+
+    def put_bulk(self, items: t.List[t.Any]) -> int:
+        """Buffer items, flush if buffer is full. Error of failed flush is
+        raised after items are buffered
+
+        :param items: list of serializables
+        :returns: int -- number of buffered items
+        """
+        with self.__cond:
+            if self.__closed:
+                raise RuntimeError("producer is closed")
+            if len(self.__buffer) + len(items) > self.max_buffer:
+                # not buffered, caller could retry later
+                raise BufferError("producer buffer is full")
+            if not self.__buffer:
+                self.__first_put = time.monotonic()
+                self.__cond.notify_all()
+            self.__buffer.extend(items)
+            full = len(self.__buffer) >= self.max_items
+        if full:
+            self.flush()
+        self._raise_error()
+        return len(self)
+
+    def flush(self) -> int:
+        """Push all buffered items into the queue with one bulk call,
+        if it fails items are returned into the head of the buffer
+
+        :returns: int -- number of items flushed
+        """
+        with self.__flush_lock:
+            with self.__cond:
+                batch, self.__buffer = self.__buffer, []
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            dropped = 0
+            try:
+                if hasattr(self.queue, "put_bulk_result"):
+                    dropped = len(self.queue.put_bulk_result(batch).rejected)
+                else:
+                    self.queue.put_bulk(batch)
+            except Exception:
+                with self.__cond:
+                    if not self.__buffer:
+                        self.__first_put = time.monotonic()
+                    self.__buffer[:0] = batch
+                raise
+            elapsed = time.perf_counter() - started
+            # error of previous flush is stale, its batch is pushed
+            self.__error = None
+
+            stats = self.__stats
+            self.__stats = ProducerStats(
+                flushes=stats.flushes + 1,
+                items=stats.items + len(batch),
+                dropped=stats.dropped + dropped,
+                max_batch_size=max(stats.max_batch_size, len(batch)),
+                flush_time=stats.flush_time + elapsed,
+                max_flush_time=max(stats.max_flush_time, elapsed),
+            )
+            return len(batch)
+
+    def close(self) -> int:
+        """Stop background thread and flush buffered items
+
+        :returns: int -- number of items flushed
+        """
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+        self.__thread.join()
+        flushed = self.flush()
+        self._raise_error()
+        return flushed
+
+    def __enter__(self) -> "BufferedProducer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of buffered items
+
+        :returns: int -- buffer size
+        """
+        return len(self.__buffer)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class and wrapped queue
+        """
+        return "<BufferedProducer buffer={} {}>".format(len(self), self.queue)
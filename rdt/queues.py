@@ -1,17 +1,144 @@
 """Different types of queues for redis"""
+import collections
+import time
 import typing as t
 
 import redis
+from rdt.common import PutResult, blpop_bulk, iter_queue_items, lpop_bulk
 from rdt.serializers import BaseSerializer, JsonItemSerializer
 
 
+# Packed list element: magic, "t" (text) or "b" (binary) payloads flag,
+# number of items and length prefixed payloads:
+#   b"\xfeRDTt2:7:{"a": 1}7:{"a": 2}"
+PACKED_MAGIC = b"\xfeRDT"
+
+# KEYS[1] - list, KEYS[2] - counter of extra items in packed elements;
+# ARGV[1] - number of extra items, ARGV[2..] - elements.
+# Return number of items in the queue
+PACKED_PUSH_SCRIPT = """
+local length = 0
+-- chunks, since unpack is limited by lua stack size
+for i = 2, #ARGV, 1000 do
+    length = redis.call(
+        'RPUSH', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+local extra = redis.call('INCRBY', KEYS[2], ARGV[1])
+return length + extra
+"""
+
+# KEYS[1] - list, KEYS[2] - counter of extra items in packed elements;
+# ARGV[1] - number of items. Pop elements until they contain at least
+# requested number of items, return popped elements
+PACKED_POP_SCRIPT = """
+local need = tonumber(ARGV[1])
+local elements = {}
+local extra = 0
+while need > 0 do
+    local element = redis.call('LPOP', KEYS[1])
+    if not element then
+        break
+    end
+    elements[#elements + 1] = element
+    local count = 1
+    if string.sub(element, 1, 4) == '\\254RDT' then
+        count = tonumber(string.match(element, '^....[tb](%d+):'))
+    end
+    extra = extra + count - 1
+    need = need - count
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('DEL', KEYS[2])
+elseif extra > 0 then
+    redis.call('DECRBY', KEYS[2], extra)
+end
+return elements
+"""
+
+# KEYS[1] - list, KEYS[2] - notification list; ARGV[1] - max length,
+# ARGV[2] - overflow policy, ARGV[3..] - elements.
+# "drop_oldest" push last `maxlen` elements and trim the head, "reject"
+# and "block" push elements while there is free space. In "block" mode
+# notification list holds one token while there is free space.
+# Return {number of accepted elements, length of the list}
+BOUNDED_PUSH_SCRIPT = """
+local maxlen = tonumber(ARGV[1])
+local total = #ARGV - 2
+local length = redis.call('LLEN', KEYS[1])
+local accepted = 0
+-- RPUSH of ARGV[first..last] in chunks, unpack is limited by lua stack
+local function push(first, last)
+    for i = first, last, 1000 do
+        length = redis.call(
+            'RPUSH', KEYS[1], unpack(ARGV, i, math.min(i + 999, last)))
+    end
+end
+if ARGV[2] == 'drop_oldest' then
+    -- elements over the limit would be trimmed at once, don't push them
+    accepted = math.min(total, maxlen)
+    push(#ARGV - accepted + 1, #ARGV)
+    if length > maxlen then
+        redis.call('LTRIM', KEYS[1], -maxlen, -1)
+        length = maxlen
+    end
+else
+    accepted = math.max(math.min(maxlen - length, total), 0)
+    push(3, 2 + accepted)
+end
+if ARGV[2] == 'block' then
+    if length >= maxlen then
+        redis.call('DEL', KEYS[2])
+    elseif redis.call('EXISTS', KEYS[2]) == 0 then
+        redis.call('RPUSH', KEYS[2], 1)
+    end
+end
+return {accepted, length}
+"""
+
+# KEYS[1] - list, KEYS[2] - notification list; ARGV[1] - max length.
+# Put token into notification list if there is free space
+BOUNDED_NOTIFY_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) < tonumber(ARGV[1])
+    and redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('RPUSH', KEYS[2], 1)
+end
+"""
+
+OVERFLOW_POLICIES = ("reject", "drop_oldest", "block")
+
+
 class RedisLifoQueue:
-    """Simple Last-In-First-Out queue implemented on redis list datatype"""
+    """Simple Last-In-First-Out queue implemented on redis list datatype
+
+    With `pack_size` > 1 `put_bulk` serialize up to `pack_size` items
+    into one list element to save memory on per-element overhead for
+    small items. Packed elements are unpacked on get, items over requested
+    number are kept in local remainder buffer of the instance (use
+    `return_remainder` to push them back before exit). Number of items in
+    packed elements is tracked in `{name}:packed` counter, so `__len__`
+    returns number of items. Plain elements pushed by other producers are
+    supported. Blocking gets in packed mode require redis >= 6.2.
+
+    With `maxlen` queue length is limited by server side script on every
+    put, `overflow` policy define what to do with items over the limit:
+    "reject" them, "drop_oldest" items from the head of the queue or
+    "block" producer until consumers free space. Blocked producers wait
+    for token in `{name}:notify` list pushed by consumers of the class
+    after pops, items popped by other clients are noticed after
+    `max_wait` seconds. Bounded packed queue isn't supported.
+    """
 
     __slots__ = [
         "__db",
         "__serializer",
+        "__remainder",
         "name",
+        "pack_size",
+        "counter_name",
+        "maxlen",
+        "overflow",
+        "max_wait",
+        "notify_name",
     ]
 
     __serializer: BaseSerializer
@@ -34,6 +161,10 @@ class RedisLifoQueue:
         name: str,
         r: redis.client.Redis,
         serializer: BaseSerializer = JsonItemSerializer,
+        pack_size: int = 1,
+        maxlen: t.Optional[int] = None,
+        overflow: str = "reject",
+        max_wait: float = 1.0,
     ):
         """Trivial LIFO redis queue implementation,
         store data as serialized json
@@ -41,10 +172,97 @@ class RedisLifoQueue:
         :param name: queue name
         :param r: redis client instance
         :serializer str: string representation of json library
+        :param pack_size: max number of items packed into one list element
+            by `put_bulk`, 1 (the default) to disable packing
+        :param maxlen: max number of items in the queue, None - unbounded
+        :param overflow: "reject", "drop_oldest" or "block"
+        :param max_wait: max seconds blocked producer wait for notification
+            before checking free space again
         """
+        assert overflow in OVERFLOW_POLICIES, "unknown overflow policy"
+        assert maxlen is None or maxlen > 0, "maxlen should be positive"
+        assert maxlen is None or pack_size <= 1, "bounded packed queue"
         self.__db = r
         self.__serializer = serializer()
+        self.__remainder: t.Deque[t.Any] = collections.deque()
         self.name = name
+        self.pack_size = pack_size
+        self.counter_name = f"{name}:packed"
+        self.maxlen = maxlen
+        self.overflow = overflow
+        self.max_wait = max_wait
+        self.notify_name = f"{name}:notify"
+
+    @property
+    def packed(self) -> bool:
+        """True if packed mode is enabled"""
+        return self.pack_size > 1
+
+    def _pack(self, items: t.Sequence[t.Any]) -> t.Any:
+        payloads = [self.serializer.dumps(item) for item in items]
+        if len(payloads) == 1:
+            return payloads[0]
+        flag = b"b"
+        if isinstance(payloads[0], str):
+            payloads = [p.encode("utf-8") for p in payloads]
+            flag = b"t"
+        parts = [PACKED_MAGIC, flag, b"%d:" % len(payloads)]
+        for payload in payloads:
+            parts.append(b"%d:" % len(payload))
+            parts.append(payload)
+        return b"".join(parts)
+
+    def _unpack(self, element: t.Any) -> t.List[t.Any]:
+        if not element.startswith(PACKED_MAGIC):
+            return [self.serializer.loads(element)]
+        text = element[4:5] == b"t"
+        pos = element.index(b":", 5)
+        count = int(element[5:pos])
+        items = []
+        for _ in range(count):
+            start = element.index(b":", pos + 1) + 1
+            end = start + int(element[pos + 1 : start - 1])
+            payload = element[start:end]
+            items.append(
+                self.serializer.loads(
+                    payload.decode("utf-8") if text else payload
+                )
+            )
+            pos = end - 1
+        return items
+
+    def _take(self, number_of_items: int, elements: t.List[t.Any]) -> t.List:
+        """Items from local remainder and popped elements, keep the rest
+        in remainder"""
+        items = []
+        while self.__remainder and len(items) < number_of_items:
+            items.append(self.__remainder.popleft())
+        for element in elements:
+            items.extend(self._unpack(element))
+        self.__remainder.extend(items[number_of_items:])
+        return items[:number_of_items]
+
+    def _pop_packed(self, number_of_items: int, client=None) -> t.Any:
+        script = self.db.register_script(PACKED_POP_SCRIPT)
+        return script(
+            keys=[self.name, self.counter_name],
+            args=[number_of_items],
+            client=client,
+        )
+
+    def return_remainder(self) -> int:
+        """Push items left in local remainder buffer back into the head
+        of the queue, preserving their order
+
+        :returns: int -- number of returned items
+        """
+        items = list(self.__remainder)
+        self.__remainder.clear()
+        if items:
+            self.db.lpush(
+                self.name, *reversed(list(map(self.serializer.dumps, items)))
+            )
+        return len(items)
 
     def is_empty(self) -> bool:
         """Check if queue is empty
@@ -61,19 +279,41 @@ class RedisLifoQueue:
         """
         return bool(self.db.exists(name))
 
-    def put(self, item: dict) -> int:
+    def put(self, item: dict, timeout: t.Optional[float] = None) -> int:
         """Put item into the queue.
 
         :param item: serializable item to push into the queue
-        :returns: int -- the length of the list after the push operation
+        :param timeout: seconds to wait for free space with "block" overflow
+            policy, None (the default) to wait forever
+        :returns: int -- the length of the list after the push operation,
+            0 if item rejected by bounded queue
         """
+        if self.maxlen is not None:
+            result = self.put_bulk_result([item], timeout=timeout)
+            return result.length if result.accepted else 0
+        if self.packed:
+            script = self.db.register_script(PACKED_PUSH_SCRIPT)
+            return int(
+                script(
+                    keys=[self.name, self.counter_name],
+                    args=[0, self.serializer.dumps(item)],
+                )
+            )
         return int(self.db.rpush(self.name, self.serializer.dumps(item)))
 
-    def put_bulk(self, items: t.List[t.Dict]) -> bool:
+    def put_bulk(
+        self, items: t.List[t.Dict], timeout: t.Optional[float] = None
+    ) -> bool:
         """Use redis pipelines to push bulk into the queue
         :param items: list of serializables to push into the queue
+        :param timeout: seconds to wait for free space with "block" overflow
+            policy, None (the default) to wait forever
         :returns: bool - if return fit number of items in queue
         """
+        if self.maxlen is not None:
+            return not self.put_bulk_result(items, timeout=timeout).rejected
+        if self.packed:
+            return self._put_packed(items)
         pipe = self.db.pipeline()
         for item in items:
             pipe.rpush(self.name, self.serializer.dumps(item))
@@ -81,37 +321,164 @@ class RedisLifoQueue:
         # last result contains len of queue after operations
         return bool(res[-1] == len(self))
 
+    def put_bulk_result(
+        self, items: t.List[t.Dict], timeout: t.Optional[float] = None
+    ) -> PutResult:
+        """Push items into bounded queue, items are accepted in order
+        while there is free space.
+
+        :param items: list of serializables to push into the queue
+        :param timeout: seconds to wait for free space with "block" overflow
+            policy, None (the default) to wait forever
+        :returns: PutResult -- number of accepted items, indexes of rejected
+            items and length of the queue after the operation
+        """
+        if not items:
+            return PutResult(0, [], len(self))
+        payloads = [self.serializer.dumps(item) for item in items]
+        if self.maxlen is None:
+            length = self.db.rpush(self.name, *payloads)
+            return PutResult(len(payloads), [], int(length))
+
+        script = self.db.register_script(BOUNDED_PUSH_SCRIPT)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        offset = 0
+        while True:
+            accepted, length = script(
+                keys=[self.name, self.notify_name],
+                args=[self.maxlen, self.overflow, *payloads[offset:]],
+            )
+            offset += int(accepted)
+            if self.overflow != "block" or offset == len(payloads):
+                break
+            wait = self.max_wait
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    break
+            # BLPOP treat 0 as infinity, so keep minimal positive timeout
+            self.db.blpop(self.notify_name, timeout=max(wait, 0.01))
+        if self.overflow == "drop_oldest":
+            # only last `maxlen` items of the batch stay in the queue
+            rejected = list(range(len(payloads) - offset))
+        else:
+            # items are accepted in order, so the tail is rejected
+            rejected = list(range(offset, len(payloads)))
+        return PutResult(offset, rejected, int(length))
+
+    def _notify(self, items: t.Sized):
+        """Wake up producer blocked on full queue if items were popped"""
+        if items and self.maxlen is not None and self.overflow == "block":
+            script = self.db.register_script(BOUNDED_NOTIFY_SCRIPT)
+            script(keys=[self.name, self.notify_name], args=[self.maxlen])
+
+    def _put_packed(self, items: t.List[t.Dict]) -> bool:
+        if not items:
+            return False
+        elements, extra = [], 0
+        for i in range(0, len(items), self.pack_size):
+            chunk = items[i : i + self.pack_size]
+            elements.append(self._pack(chunk))
+            extra += len(chunk) - 1
+        script = self.db.register_script(PACKED_PUSH_SCRIPT)
+        script(keys=[self.name, self.counter_name], args=[extra, *elements])
+        return True
+
     def get(self) -> t.Optional[t.Dict]:
         """Pop first element from the list
         :returns: dict - serialized item
         """
+        if self.packed:
+            items = self.get_bulk(1)
+            return items[0] if items else None
         item = self.db.lpop(self.name)
         if item is None:
             return None
-        return dict(self.serializer.loads(item))
+        self._notify([item])
+        return self.serializer.loads(item)
 
     def get_block(self, timeout=None) -> t.Optional[t.Dict]:
         """Pop item from the queue.
 
         If optional args block is true and timeout is None (the default), block
         if necessary until an item is available."""
+        if self.packed:
+            items = self.get_block_bulk(1, timeout=timeout)
+            return items[0] if items else None
         item = self.db.blpop(self.name, timeout=timeout)
 
         if item:
-            return dict(self.serializer.loads(item[1]))
+            self._notify(item)
+            return self.serializer.loads(item[1])
         return None
 
     def get_bulk(self, number_of_items) -> t.List[t.Dict]:
-        """Remove and return part of list from queue"""
-        items_list = []
-        for _ in range(number_of_items):
-            item = self.db.lpop(self.name)
-
-            if item:
-                items_list.append(self.serializer.loads(item))
-            else:
-                break
-        return items_list
+        """Remove and return part of list from queue in one round trip
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        if self.packed:
+            need = number_of_items - len(self.__remainder)
+            elements = self._pop_packed(need) if need > 0 else []
+            return self._take(number_of_items, elements)
+        items = lpop_bulk(self.db, self.name, number_of_items)
+        self._notify(items)
+        return list(map(self.serializer.loads, items))
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Dict]:
+        """Block until at least one item is available, then remove and
+        return up to `max_items` in the same round trip
+
+        :param max_items: max number of items to pop
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        if self.packed:
+            return self._get_block_packed(max_items, timeout)
+        items = blpop_bulk(self.db, self.name, max_items, timeout=timeout)
+        self._notify(items)
+        return list(map(self.serializer.loads, items))
+
+    def _get_block_packed(self, max_items: int, timeout=None) -> t.List:
+        if self.__remainder:
+            return self.get_bulk(max_items)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.0
+            if deadline is not None:
+                # BLMOVE treat 0 as infinity, so keep minimal positive timeout
+                wait = max(deadline - time.monotonic(), 0.01)
+            # move head element to the head of the same list only to block
+            # until queue isn't empty, then pop in the same round trip
+            pipe = self.db.pipeline(transaction=False)
+            pipe.blmove(self.name, self.name, wait, "LEFT", "LEFT")
+            self._pop_packed(max_items, client=pipe)
+            ready, elements = pipe.execute()
+            if elements:
+                return self._take(max_items, elements)
+            if ready is None or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                return []
+
+    def iter_items(
+        self,
+        batch_size: int = 100,
+        block: bool = False,
+        timeout: t.Optional[float] = None,
+    ) -> t.Iterator[t.Any]:
+        """Iterate over items popping them in bulk, drain queue until empty
+        or with `block` wait for new items up to `timeout` seconds.
+        Not consumed items are returned into the queue if iteration
+        stopped early (see `rdt.common.iter_queue_items`)
+
+        :param batch_size: max number of items popped in one round trip
+        :param block: wait for new items instead of stopping on empty queue
+        :param timeout: seconds to wait for new items in blocking mode
+        :returns: iterator -- deserialized items
+        """
+        return iter_queue_items(self, batch_size, block, timeout)
 
     def sizeof(self) -> t.Optional[int]:
         """Size of data structure in redis
@@ -128,6 +495,12 @@ class RedisLifoQueue:
 
         :returns: int -- number of elements in queue
         """
+        if self.packed:
+            pipe = self.db.pipeline(transaction=False)
+            pipe.llen(self.name)
+            pipe.get(self.counter_name)
+            length, extra = pipe.execute()
+            return int(length) + int(extra or 0) + len(self.__remainder)
         return int(self.db.llen(self.name))
 
     def __str__(self) -> str:
@@ -0,0 +1,338 @@
+"""Reliable queue, items are not lost if consumer crash during processing
+
+Every popped item atomically moved into per-consumer processing list
+(`LMOVE` inside of server side script) and got deadline in sorted set.
+Consumer should `ack` processed items or `nack` them to return into the
+queue, items with expired visibility timeout are returned into the queue
+by `reap`.
+
+Items in processing list are matched by serialized value. Acknowledge
+`ReliableMessage` returned by `read` to match by exact payload, plain items
+are serialized again, so serializer should produce same output for same
+item (true for json-like serializers).
+"""
+# pylint: disable=consider-using-f-string
+import time
+import typing as t
+
+import redis
+from rdt.common import default_consumer_name, queue_list_key
+from rdt.serializers import BaseSerializer
+
+
+# KEYS[1] - source list, KEYS[2] - processing list, KEYS[3] - deadlines zset,
+# KEYS[4] - consumers set; ARGV[1] - number of items, ARGV[2] - visibility
+# timeout in seconds, ARGV[3] - consumer name
+RELIABLE_GET_SCRIPT = """
+local now = redis.call('TIME')
+local deadline = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    + tonumber(ARGV[2])
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not item then
+        break
+    end
+    redis.call('ZADD', KEYS[3], deadline, item)
+    items[#items + 1] = item
+end
+if #items > 0 then
+    redis.call('SADD', KEYS[4], ARGV[3])
+end
+return items
+"""
+
+# KEYS[1] - processing list, KEYS[2] - deadlines zset, KEYS[3] - source list
+# ARGV[1] - 1 to return items into the source list (nack), 0 to drop (ack),
+# ARGV[2..] - serialized items
+RELIABLE_ACK_SCRIPT = """
+local done = 0
+for i = #ARGV, 2, -1 do
+    if redis.call('LREM', KEYS[1], 1, ARGV[i]) > 0 then
+        done = done + 1
+        if not redis.call('LPOS', KEYS[1], ARGV[i]) then
+            redis.call('ZREM', KEYS[2], ARGV[i])
+        end
+        if ARGV[1] == '1' then
+            redis.call('LPUSH', KEYS[3], ARGV[i])
+        end
+    end
+end
+return done
+"""
+
+# KEYS[1] - processing list, KEYS[2] - deadlines zset, KEYS[3] - source list
+# ARGV[1] - max number of expired items to return into the source list
+RELIABLE_REAP_SCRIPT = """
+local now = redis.call('TIME')
+local ts = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local expired = redis.call(
+    'ZRANGEBYSCORE', KEYS[2], '-inf', ts, 'LIMIT', 0, tonumber(ARGV[1]))
+local requeued = 0
+-- push in reverse order to keep original order in the head of the queue
+for i = #expired, 1, -1 do
+    local item = expired[i]
+    local removed = redis.call('LREM', KEYS[1], 0, item)
+    for _ = 1, removed do
+        redis.call('LPUSH', KEYS[3], item)
+    end
+    requeued = requeued + removed
+    redis.call('ZREM', KEYS[2], item)
+end
+return requeued
+"""
+
+
+class ReliableMessage(t.NamedTuple):
+    """Item moved into processing list, `payload` is used to acknowledge it"""
+
+    payload: bytes
+    item: t.Any
+
+
+class RedisReliableQueue:
+    """Reliable mode on top of `RedisLifoQueue` or `RedisUniqueQueue`.
+
+    Puts are delegated to wrapped queue, so filtering still works.
+    Requires redis >= 6.2 (`LMOVE`).
+    """
+
+    __slots__ = [
+        "queue",
+        "consumer",
+        "visibility_timeout",
+        "processing_name",
+        "deadlines_name",
+        "consumers_name",
+    ]
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.queue.db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Serializer of wrapped queue"""
+        return self.queue.serializer
+
+    @property
+    def name(self) -> str:
+        """Key of the source list"""
+        return queue_list_key(self.queue)
+
+    def __init__(
+        self,
+        queue: t.Any,
+        consumer: t.Optional[str] = None,
+        visibility_timeout: float = 300,
+    ):
+        """Reliable queue
+
+        :param queue: `RedisLifoQueue` or `RedisUniqueQueue` instance
+        :param consumer: consumer name, processing list is per consumer,
+            by default hostname and pid
+        :param visibility_timeout: seconds before not acknowledged item
+            could be returned into the queue by `reap`
+        """
+        self.queue = queue
+        self.consumer = consumer or default_consumer_name()
+        self.visibility_timeout = visibility_timeout
+
+        self.consumers_name = f"{self.name}:consumers"
+        self.processing_name = self.processing_key(self.consumer)
+        self.deadlines_name = f"{self.processing_name}:deadlines"
+
+    def processing_key(self, consumer: str) -> str:
+        """Key of processing list for given consumer
+
+        :param consumer: consumer name
+        :returns: str -- processing list key
+        """
+        return f"{self.name}:processing:{consumer}"
+
+    def _get_keys(self) -> t.List[str]:
+        return [
+            self.name,
+            self.processing_name,
+            self.deadlines_name,
+            self.consumers_name,
+        ]
+
+    def put(self, item: t.Dict) -> int:
+        """Put item into the wrapped queue"""
+        return self.queue.put(item)
+
+    def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Put items into the wrapped queue"""
+        return self.queue.put_bulk(items)
+
+    def get(self) -> t.Any:
+        """Move first item into processing list and return it
+
+        :returns: item or None if queue is empty
+        """
+        items = self.get_bulk(1)
+        if items:
+            return items[0]
+        return None
+
+    def _move(
+        self, count: int, block: bool, timeout: t.Optional[float] = None
+    ) -> t.List[bytes]:
+        """Move up to `count` payloads into processing list by script, with
+        `block` wait for items up to `timeout` seconds (None - forever).
+
+        Waiting is `BLMOVE` of the head of the list into the head of the
+        same list (list isn't changed), script moving items is sent in the
+        same pipeline, so items are never moved without deadline.
+        """
+        if count <= 0:
+            return []
+        script = self.db.register_script(RELIABLE_GET_SCRIPT)
+        args = [count, self.visibility_timeout, self.consumer]
+        if not block:
+            return script(keys=self._get_keys(), args=args)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.0
+            if deadline is not None:
+                # 0 is infinite timeout for redis
+                wait = max(deadline - time.monotonic(), 0.01)
+            pipe = self.db.pipeline(transaction=False)
+            pipe.execute_command(
+                "BLMOVE", self.name, self.name, "LEFT", "LEFT", wait
+            )
+            script(keys=self._get_keys(), args=args, client=pipe)
+            woken, payloads = pipe.execute()
+            if payloads:
+                return payloads
+            if woken is None or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                return []
+            # items taken by other consumer between commands, wait again
+
+    def get_bulk(self, number_of_items: int) -> t.List[t.Any]:
+        """Move up to `number_of_items` into processing list in one
+        round trip
+
+        :param number_of_items: max number of items
+        :returns: list -- deserialized items
+        """
+        payloads = self._move(number_of_items, block=False)
+        return list(map(self.serializer.loads, payloads))
+
+    def get_block(self, timeout=None) -> t.Any:
+        """Move item into processing list, block until item is available.
+
+        Wait and move are sent in one pipeline, so it's single round trip
+        (unless item was taken by other consumer).
+
+        :param timeout: seconds to wait, None to wait forever
+        :returns: item or None on timeout
+        """
+        payloads = self._move(1, block=True, timeout=timeout or None)
+        if not payloads:
+            return None
+        return self.serializer.loads(payloads[0])
+
+    def read(
+        self, count: int = 1, timeout: t.Optional[float] = None
+    ) -> t.List[ReliableMessage]:
+        """Move up to `count` items into processing list, acknowledge
+        returned messages to match items by exact payload
+
+        :param count: max number of items
+        :param timeout: seconds to block if queue is empty, None - don't
+            block, 0 - block forever
+        :returns: list -- ReliableMessage tuples (payload, item)
+        """
+        if timeout is None:
+            payloads = self._move(count, block=False)
+        else:
+            payloads = self._move(count, block=True, timeout=timeout or None)
+        return [ReliableMessage(p, self.serializer.loads(p)) for p in payloads]
+
+    def _finish(self, items: t.Sequence[t.Any], requeue: bool) -> int:
+        if not items:
+            return 0
+        script = self.db.register_script(RELIABLE_ACK_SCRIPT)
+        args = [int(requeue)] + [
+            x.payload
+            if isinstance(x, ReliableMessage)
+            else self.serializer.dumps(x)
+            for x in items
+        ]
+        return int(
+            script(
+                keys=[self.processing_name, self.deadlines_name, self.name],
+                args=args,
+            )
+        )
+
+    def ack(self, *items: t.Any) -> int:
+        """Acknowledge processed items, remove them from processing list.
+        Any number of items acknowledged in one round trip.
+
+        :param items: messages returned by `read` or items returned by get
+            methods
+        :returns: int -- number of acknowledged items
+        """
+        return self._finish(items, requeue=False)
+
+    def nack(self, *items: t.Any) -> int:
+        """Return items from processing list into the head of the queue
+        in one round trip
+
+        :param items: messages returned by `read` or items returned by get
+            methods
+        :returns: int -- number of returned items
+        """
+        return self._finish(items, requeue=True)
+
+    def reap(self, limit: int = 1000) -> int:
+        """Return items with expired visibility timeout of all consumers
+        into the queue. Scripts for every consumer sent in one pipeline.
+
+        :param limit: max number of items to return per consumer
+        :returns: int -- number of items returned into the queue
+        """
+        consumers = self.db.smembers(self.consumers_name)
+        if not consumers:
+            return 0
+        script = self.db.register_script(RELIABLE_REAP_SCRIPT)
+        pipe = self.db.pipeline(transaction=False)
+        for consumer in consumers:
+            processing_name = self.processing_key(consumer.decode("utf-8"))
+            script(
+                keys=[
+                    processing_name,
+                    f"{processing_name}:deadlines",
+                    self.name,
+                ],
+                args=[limit],
+                client=pipe,
+            )
+        return sum(pipe.execute())
+
+    def processing_len(self) -> int:
+        """Number of items in processing list of current consumer
+
+        :returns: int -- number of not acknowledged items
+        """
+        return int(self.db.llen(self.processing_name))
+
+    def __len__(self) -> int:
+        """Length of wrapped queue"""
+        return len(self.queue)
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and consumer
+        """
+        return "<RedisReliableQueue name={} consumer={} <{}>>".format(
+            self.name, self.consumer, self.db
+        )
@@ -1,7 +1,10 @@
 # pylint: disable=missing-function-docstring,bad-mcs-method-argument
 import abc
+import functools
 import importlib
+import lzma
 import typing as t
+import zlib
 
 
 class BaseSerializer(abc.ABCMeta):
@@ -77,7 +80,7 @@ class BsonJsonItemSerializer(BaseJsonItemSerializer):
 
     @property
     def serializer_name(self) -> str:
-        return "bson.json_url"
+        return "bson.json_util"
 
 
 class BsonItemSerializer(BaseJsonItemSerializer):
@@ -93,3 +96,121 @@ class BsonItemSerializer(BaseJsonItemSerializer):
         _importer = importlib.import_module
         self._loads = _importer(self.serializer_name).BSON.decode
         self._dumps = _importer(self.serializer_name).BSON.encode
+
+
+class OrjsonItemSerializer(BaseJsonItemSerializer):
+    """Serialize items using orjson library, dumps return bytes"""
+
+    @property
+    def serializer_name(self) -> str:
+        return "orjson"
+
+
+class MsgpackItemSerializer(BaseJsonItemSerializer):
+    """Serialize items using msgpack library (binary)"""
+
+    @property
+    def serializer_name(self) -> str:
+        return "msgpack"
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        """Use following serializer for json-like data:"""
+        assert self.serializer_name is not None
+        msgpack = importlib.import_module(self.serializer_name)
+        self._loads = functools.partial(msgpack.unpackb, raw=False)
+        self._dumps = msgpack.packb
+
+
+class CompressedItemSerializer(metaclass=BaseSerializer):
+    """Wrap other serializer and compress payloads larger than `threshold`.
+
+    First byte of payload is header: codec id (0 - raw, 1 - zlib, 2 - lzma)
+    plus `TEXT` flag if wrapped serializer returns str, so items stored
+    with different settings are decoded correctly. Payloads are bytes,
+    so redis client shouldn't use `decode_responses`.
+
+    Serializer is passed to queues as class, use `functools.partial` or
+    subclass to change defaults:
+
+        partial(CompressedItemSerializer, threshold=512, codec="lzma")
+    """
+
+    RAW, ZLIB, LZMA = 0, 1, 2
+    TEXT = 0x80
+    codecs = {"raw": RAW, "zlib": ZLIB, "lzma": LZMA}
+
+    def __init__(
+        self,
+        serializer: t.Optional[BaseSerializer] = None,
+        threshold: int = 1024,
+        codec: str = "zlib",
+        level: t.Optional[int] = None,
+    ):
+        """Compressing serializer
+
+        :param serializer: wrapped serializer class, json by default
+        :param threshold: compress payloads of at least this number of bytes
+        :param codec: "zlib" or "lzma"
+        :param level: compression level, codec default if not defined
+        """
+        assert codec in self.codecs, "unknown codec {}".format(codec)
+        self.serializer = (serializer or JsonItemSerializer)()
+        self.threshold = threshold
+        self.codec = self.codecs[codec]
+        self.level = level
+
+    @property
+    def serializer_name(self) -> str:
+        return "compressed-{}".format(self.serializer.serializer_name)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == self.ZLIB:
+            return zlib.compress(data, -1 if self.level is None else self.level)
+        if self.codec == self.LZMA:
+            return lzma.compress(data, preset=self.level)
+        return data
+
+    def dumps(self, item) -> bytes:
+        data = self.serializer.dumps(item)
+        flags = 0
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+            flags = self.TEXT
+        codec = self.RAW
+        if len(data) >= self.threshold and self.codec != self.RAW:
+            compressed = self._compress(data)
+            # keep raw payload if it doesn't compress
+            if len(compressed) < len(data):
+                codec, data = self.codec, compressed
+        return bytes((codec | flags,)) + data
+
+    def loads(self, item):
+        if isinstance(item, str):
+            item = item.encode("utf-8")
+        header, data = item[0], memoryview(item)[1:]
+        codec = header & ~self.TEXT
+        if codec == self.ZLIB:
+            data = zlib.decompress(data)
+        elif codec == self.LZMA:
+            data = lzma.decompress(data)
+        elif codec == self.RAW:
+            data = bytes(data)
+        else:
+            raise ValueError("unknown compression codec {}".format(codec))
+        if header & self.TEXT:
+            return self.serializer.loads(data.decode("utf-8"))
+        return self.serializer.loads(data)
+
+
+# serializers by name, libraries are imported on instantiation,
+# so serializers for not installed libraries raise ImportError
+SERIALIZERS: t.Dict[str, BaseSerializer] = {
+    "str": StrItemSerializer,
+    "json": JsonItemSerializer,
+    "ujson": UjsonItemSerializer,
+    "orjson": OrjsonItemSerializer,
+    "bson": BsonItemSerializer,
+    "bson.json_util": BsonJsonItemSerializer,
+    "msgpack": MsgpackItemSerializer,
+    "compressed": CompressedItemSerializer,
+}
@@ -0,0 +1,296 @@
+"""Queue spreading one logical queue across few redis lists (shards)"""
+# pylint: disable=consider-using-f-string
+import itertools
+import typing as t
+
+import mmh3
+import redis
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+
+
+# pop up to ARGV[1] elements from lists in KEYS, one element from every
+# non-empty list per round, so shards are drained fairly
+SHARDED_POP_SCRIPT = """
+local count = tonumber(ARGV[1])
+local items = {}
+local active = KEYS
+while #items < count and #active > 0 do
+    local left = {}
+    for _, key in ipairs(active) do
+        if #items >= count then
+            break
+        end
+        local item = redis.call('LPOP', key)
+        if item then
+            items[#items + 1] = item
+            left[#left + 1] = key
+        end
+    end
+    active = left
+end
+return items
+"""
+
+
+class RedisShardedQueue:
+    """Queue spread across `shards` redis lists to avoid single hot key.
+
+    Every shard key contain own hash tag, so under Redis Cluster shards
+    are placed into different slots. Since multi-key commands don't work
+    across slots, with `cluster=True` pops are done shard by shard using
+    pipelines instead of multi-key `BLPOP` and scripts (requires
+    redis >= 6.2 for `LPOP` with count).
+    """
+
+    __slots__ = [
+        "__db",
+        "__serializer",
+        "__counter",
+        "__offset",
+        "name",
+        "shards",
+        "keygetter",
+        "cluster",
+    ]
+
+    __serializer: BaseSerializer
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Current serializer
+
+        :returns: ItemSerializer -- current serializer instance
+        """
+        return self.__serializer
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        shards: int = 4,
+        serializer: BaseSerializer = JsonItemSerializer,
+        keygetter: t.Optional[t.Callable[[t.Dict], t.Any]] = None,
+        cluster: bool = False,
+    ):
+        """Sharded queue
+
+        :param name: queue name, shard keys are `{name:N}`
+        :param r: redis (or redis cluster) client instance
+        :param shards: number of shards
+        :param serializer: serializer class
+        :param keygetter: if defined, shard chosen by murmur3 hash of item key,
+            round-robin otherwise
+        :param cluster: don't use multi-key commands across shards
+        """
+        assert shards > 0, "number of shards should be positive"
+        self.__db = r
+        self.__serializer = serializer()
+        self.__counter = itertools.count()
+        self.__offset = 0
+        self.name = name
+        self.shards = shards
+        self.keygetter = keygetter
+        self.cluster = cluster
+
+    @property
+    def shard_keys(self) -> t.List[str]:
+        """Redis keys of all shards"""
+        return [self.shard_key(index) for index in range(self.shards)]
+
+    def shard_key(self, index: int) -> str:
+        """Redis key of the shard
+
+        :param index: shard index
+        :returns: str -- key with hash tag
+        """
+        return "{%s:%d}" % (self.name, index)
+
+    def get_shard(self, item: t.Any) -> int:
+        """Choose shard for the item
+
+        :param item: item to put
+        :returns: int -- shard index
+        """
+        if self.keygetter is None:
+            return next(self.__counter) % self.shards
+        key = str(self.keygetter(item))
+        return mmh3.hash(key, signed=False) % self.shards
+
+    def _rotated_keys(self) -> t.List[str]:
+        """Shard keys starting from next shard on every call,
+        so multi-key pops don't prefer first shards"""
+        keys = self.shard_keys
+        self.__offset = (self.__offset + 1) % self.shards
+        return keys[self.__offset :] + keys[: self.__offset]
+
+    def is_empty(self) -> bool:
+        """Check if queue is empty
+
+        :returns bool: True if empty and False if not
+        """
+        return len(self) == 0
+
+    def put(self, item: t.Dict) -> int:
+        """Put item into the queue.
+
+        :param item: serializable item to push into the queue
+        :returns: int -- the length of the shard after the push operation
+        """
+        key = self.shard_key(self.get_shard(item))
+        return int(self.db.rpush(key, self.serializer.dumps(item)))
+
+    def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Push bulk into the queue, one `RPUSH` per shard in one pipeline
+
+        :param items: list of serializables to push into the queue
+        :returns: bool - true if items were pushed
+        """
+        by_shard: t.Dict[int, t.List[t.Any]] = {}
+        for item in items:
+            shard = self.get_shard(item)
+            by_shard.setdefault(shard, []).append(self.serializer.dumps(item))
+        if not by_shard:
+            return False
+
+        pipe = self.db.pipeline(transaction=False)
+        for shard, payloads in by_shard.items():
+            pipe.rpush(self.shard_key(shard), *payloads)
+        pipe.execute()
+        return True
+
+    def _pop_bulk(self, number_of_items: int) -> t.List[bytes]:
+        if number_of_items <= 0:
+            return []
+        keys = self._rotated_keys()
+        if not self.cluster:
+            script = self.db.register_script(SHARDED_POP_SCRIPT)
+            return list(script(keys=keys, args=[number_of_items]))
+
+        # split remaining count between shards, repeat while shards which
+        # returned full share may still have items
+        result: t.List[bytes] = []
+        while keys and len(result) < number_of_items:
+            share, extra = divmod(number_of_items - len(result), len(keys))
+            shares = [share + int(i < extra) for i in range(len(keys))]
+            pipe = self.db.pipeline(transaction=False)
+            for key, count in zip(keys, shares):
+                if count:
+                    pipe.execute_command("LPOP", key, count)
+            popped = iter(pipe.execute())
+            left = []
+            for key, count in zip(keys, shares):
+                items = (next(popped) or []) if count else []
+                result.extend(items)
+                if len(items) == count:
+                    left.append(key)
+            keys = left
+        return result
+
+    def get(self) -> t.Optional[t.Dict]:
+        """Pop item from the next non-empty shard
+
+        :returns: dict - deserialized item or None
+        """
+        items = self.get_bulk(1)
+        if items:
+            return items[0]
+        return None
+
+    def get_bulk(self, number_of_items: int) -> t.List[t.Dict]:
+        """Remove and return up to `number_of_items` taking them evenly
+        from all shards
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        return list(map(self.serializer.loads, self._pop_bulk(number_of_items)))
+
+    def get_block(self, timeout=None) -> t.Optional[t.Dict]:
+        """Pop item from any shard, block until item is available.
+
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: dict - deserialized item or None on timeout
+        """
+        items = self.get_block_bulk(1, timeout=timeout)
+        if items:
+            return items[0]
+        return None
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Dict]:
+        """Block until at least one item is available in any shard, then
+        remove and return up to `max_items`.
+
+        Without cluster mode it's single round trip: multi-key `BLPOP`
+        and fair pop script sent in one pipeline. In cluster mode shards
+        are checked one by one, blocking on each for a part of `timeout`.
+
+        :param max_items: max number of items to pop
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        if max_items <= 0:
+            return []
+        if not self.cluster:
+            keys = self._rotated_keys()
+            pipe = self.db.pipeline(transaction=False)
+            pipe.blpop(keys, timeout=timeout or 0)
+            if max_items > 1:
+                script = self.db.register_script(SHARDED_POP_SCRIPT)
+                script(keys=keys, args=[max_items - 1], client=pipe)
+            res = pipe.execute()
+            if not res[0]:
+                return []
+            items = [res[0][1]] + (list(res[1]) if max_items > 1 else [])
+            return list(map(self.serializer.loads, items))
+
+        items = self._pop_bulk(max_items)
+        # block on shards in turn, one second (or less) slice per shard
+        waited = 0.0
+        while not items and (not timeout or waited < timeout):
+            wait = 1 if not timeout else max(min(1, timeout - waited), 0.01)
+            item = self.db.blpop(self._rotated_keys()[0], timeout=wait)
+            waited += wait
+            if item:
+                items = [item[1]] + self._pop_bulk(max_items - 1)
+        return list(map(self.serializer.loads, items))
+
+    def shard_lengths(self) -> t.List[int]:
+        """Length of every shard, in one pipeline
+
+        :returns: list -- number of items per shard
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.shard_keys:
+            pipe.llen(key)
+        return [int(x) for x in pipe.execute()]
+
+    def sizeof(self) -> int:
+        """Size of all shards in redis, in one pipeline
+
+        :returns: int -- memory used in bytes
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for key in self.shard_keys:
+            pipe.memory_usage(key, samples=0)
+        return sum(int(x or 0) for x in pipe.execute())
+
+    def __len__(self) -> int:
+        """Queue length, sum of shard lengths
+
+        :returns: int -- number of elements in queue
+        """
+        return sum(self.shard_lengths())
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name and Redis connection
+        """
+        return "<RedisShardedQueue name={} shards={} <{}>>".format(
+            self.name, self.shards, self.db
+        )
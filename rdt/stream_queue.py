@@ -0,0 +1,326 @@
+"""Queue on top of redis streams with consumer groups
+
+Every consumer group reads whole stream, so few worker pools could
+process same items without copying data. Requires redis >= 6.2.
+"""
+# pylint: disable=consider-using-f-string
+import typing as t
+
+import redis
+from rdt.common import default_consumer_name
+from rdt.serializers import BaseSerializer, JsonItemSerializer
+
+
+class StreamMessage(t.NamedTuple):
+    """Item read from the stream, `id` is used to acknowledge it"""
+
+    id: str
+    item: t.Any
+
+
+class RedisStreamQueue:
+    """Stream backed queue with `RedisLifoQueue`-like interface.
+
+    `get`, `get_bulk` and `get_block` read with `NOACK`, so items are not
+    tracked after delivery (same as popping from list). Use `read` with
+    `ack` to keep items in group pending list until processed and
+    `claim_stale` to take over items of crashed consumers.
+
+    Entries stay in the stream after delivery (other groups could read
+    them), so length is number of entries not yet delivered to the group
+    and stream is trimmed to `maxlen` entries on every put.
+    """
+
+    __slots__ = [
+        "__db",
+        "__serializer",
+        "name",
+        "group",
+        "consumer",
+        "maxlen",
+    ]
+
+    __serializer: BaseSerializer
+
+    field = "data"
+
+    @property
+    def db(self) -> redis.client.Redis:
+        """Getter for database client"""
+        return self.__db
+
+    @property
+    def serializer(self) -> BaseSerializer:
+        """Current serializer
+
+        :returns: ItemSerializer -- current serializer instance
+        """
+        return self.__serializer
+
+    def __init__(
+        self,
+        name: str,
+        r: redis.client.Redis,
+        group: str = "rdt",
+        consumer: t.Optional[str] = None,
+        serializer: BaseSerializer = JsonItemSerializer,
+        maxlen: t.Optional[int] = 100000,
+        start_id: str = "0",
+    ):
+        """Stream queue, create stream and consumer group if not exist
+
+        :param name: stream key in redis
+        :param r: redis client instance
+        :param group: consumer group name
+        :param consumer: consumer name, by default hostname and pid
+        :param serializer: serializer class
+        :param maxlen: approximate max length of stream (`MAXLEN ~`),
+            old entries trimmed on every put (even if not delivered to
+            slow group), None for unbounded stream
+        :param start_id: id to start reading from for new group,
+            "0" - whole stream, "$" - only new items
+        """
+        self.__db = r
+        self.__serializer = serializer()
+        self.name = name
+        self.group = group
+        self.consumer = consumer or default_consumer_name()
+        self.maxlen = maxlen
+
+        try:
+            self.db.xgroup_create(name, group, id=start_id, mkstream=True)
+        except redis.exceptions.ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    def is_empty(self) -> bool:
+        """Check if group has no undelivered items
+
+        :returns bool: True if empty and False if not
+        """
+        return not self._undelivered(1)
+
+    def _undelivered(self, limit: t.Optional[int] = None) -> int:
+        """Number of entries after last delivered id of the group (`lag`
+        of `XINFO GROUPS` on redis >= 7, counted with `XRANGE` otherwise),
+        counting stops at `limit`"""
+        last_id = "0-0"
+        for info in self.db.xinfo_groups(self.name):
+            name = info["name"]
+            if isinstance(name, bytes):
+                name = name.decode("utf-8")
+            if name == self.group:
+                if info.get("lag") is not None:
+                    return int(info["lag"])
+                last_id = info["last-delivered-id"]
+                if isinstance(last_id, bytes):
+                    last_id = last_id.decode("utf-8")
+                break
+        count = 0
+        while limit is None or count < limit:
+            batch = 1000 if limit is None else min(1000, limit - count)
+            entries = self.db.xrange(
+                self.name, "({}".format(last_id), "+", count=batch
+            )
+            count += len(entries)
+            if len(entries) < batch:
+                break
+            last_id = entries[-1][0]
+            if isinstance(last_id, bytes):
+                last_id = last_id.decode("utf-8")
+        return count
+
+    def _add(self, client: t.Any, item: t.Any) -> t.Any:
+        return client.xadd(
+            self.name,
+            {self.field: self.serializer.dumps(item)},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+    def put(self, item: t.Any) -> str:
+        """Append item into the stream
+
+        :param item: serializable item
+        :returns: str -- id of the stream entry
+        """
+        entry_id = self._add(self.db, item)
+        if isinstance(entry_id, bytes):
+            return entry_id.decode("utf-8")
+        return entry_id
+
+    def put_bulk(self, items: t.List[t.Any]) -> bool:
+        """Append items into the stream using pipeline
+
+        :param items: list of serializables
+        :returns: bool - true if all items were added
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for item in items:
+            self._add(pipe, item)
+        res = pipe.execute()
+        return bool(res) and all(res)
+
+    def _to_messages(self, entries: t.Iterable) -> t.List[StreamMessage]:
+        messages = []
+        for entry_id, fields in entries:
+            if not fields:
+                # entry deleted from stream while was pending
+                continue
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode("utf-8")
+            payload = fields.get(self.field.encode("utf-8"))
+            if payload is None:
+                payload = fields.get(self.field)
+            messages.append(
+                StreamMessage(entry_id, self.serializer.loads(payload))
+            )
+        return messages
+
+    def _read(
+        self, count: int, block: t.Optional[int], noack: bool
+    ) -> t.List[StreamMessage]:
+        if count <= 0:
+            return []
+        res = self.db.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.name: ">"},
+            count=count,
+            block=block,
+            noack=noack,
+        )
+        if not res:
+            return []
+        return self._to_messages(res[0][1])
+
+    def read(
+        self, count: int = 1, timeout: t.Optional[float] = None
+    ) -> t.List[StreamMessage]:
+        """Read new items, they stay in pending list until `ack`
+
+        :param count: max number of items
+        :param timeout: seconds to block if no new items, None - don't block,
+            0 - block forever
+        :returns: list -- StreamMessage tuples (id, item)
+        """
+        block = None if timeout is None else int(timeout * 1000)
+        return self._read(count, block, noack=False)
+
+    def ack(self, *ids: str) -> int:
+        """Acknowledge processed items in one command
+
+        :param ids: ids of messages returned by `read` or `claim_stale`
+        :returns: int -- number of acknowledged items
+        """
+        if not ids:
+            return 0
+        return int(self.db.xack(self.name, self.group, *ids))
+
+    def claim_stale(
+        self, min_idle_time: float = 60, count: int = 100
+    ) -> t.List[StreamMessage]:
+        """Take over items pending longer than `min_idle_time` in any
+        consumer of the group (`XAUTOCLAIM`)
+
+        :param min_idle_time: seconds item should be pending
+        :param count: max number of items to claim
+        :returns: list -- StreamMessage tuples (id, item)
+        """
+        res = self.db.xautoclaim(
+            self.name,
+            self.group,
+            self.consumer,
+            int(min_idle_time * 1000),
+            start_id="0-0",
+            count=count,
+        )
+        return self._to_messages(res[1])
+
+    def pending_len(self) -> int:
+        """Number of delivered but not acknowledged items of the group
+
+        :returns: int -- number of pending items
+        """
+        return int(self.db.xpending(self.name, self.group)["pending"])
+
+    def get(self) -> t.Any:
+        """Read next item of the group without tracking
+
+        :returns: deserialized item or None
+        """
+        items = self.get_bulk(1)
+        if items:
+            return items[0]
+        return None
+
+    def get_bulk(self, number_of_items: int) -> t.List[t.Any]:
+        """Read up to `number_of_items` new items without tracking,
+        in one round trip
+
+        :param number_of_items: max number of items
+        :returns: list -- deserialized items
+        """
+        return [m.item for m in self._read(number_of_items, None, noack=True)]
+
+    def get_block(self, timeout=None) -> t.Any:
+        """Read next item, block until item is available
+
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: deserialized item or None on timeout
+        """
+        items = self.get_block_bulk(1, timeout=timeout)
+        if items:
+            return items[0]
+        return None
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Any]:
+        """Block until at least one item is available, then read up to
+        `max_items` without tracking
+
+        :param max_items: max number of items
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        block = int((timeout or 0) * 1000)
+        return [m.item for m in self._read(max_items, block, noack=True)]
+
+    def trim(self, maxlen: int) -> int:
+        """Trim stream to approximately `maxlen` entries
+
+        :param maxlen: max number of entries
+        :returns: int -- number of removed entries
+        """
+        return int(self.db.xtrim(self.name, maxlen=maxlen, approximate=True))
+
+    def sizeof(self) -> int:
+        """Size of stream in redis
+
+        :returns: int -- memory used in bytes
+        """
+        return int(self.db.memory_usage(self.name, samples=0) or 0)
+
+    def stream_len(self) -> int:
+        """Number of entries in the stream (for all groups, delivered
+        entries included)
+
+        :returns: int -- stream length
+        """
+        return int(self.db.xlen(self.name))
+
+    def __len__(self) -> int:
+        """Number of entries not yet delivered to the group, in-flight
+        items of `read` are counted by `pending_len`
+
+        :returns: int -- queue length
+        """
+        return self._undelivered()
+
+    def __str__(self) -> str:
+        """String representation of object
+
+        :returns: str -- class, key name, group and Redis connection
+        """
+        return "<RedisStreamQueue name={} group={} <{}>>".format(
+            self.name, self.group, self.db
+        )
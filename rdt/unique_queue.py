@@ -4,6 +4,14 @@
 import typing as t
 
 import redis
+from rdt.common import (
+    UNIQUE_PUSH_SCRIPT,
+    PutResult,
+    blpop_bulk,
+    iter_queue_items,
+    lpop_bulk,
+)
+from rdt.filters import DIGEST_BITS, key_digest
 from rdt.serializers import BaseSerializer, JsonItemSerializer
 
 
@@ -20,6 +28,7 @@ class RedisUniqueQueue:
         "queue_name",
         "filter_name",
         "keygetter",
+        "digest_bits",
     ]
 
     __serializer: BaseSerializer
@@ -43,6 +52,7 @@ class RedisUniqueQueue:
         r: redis.client.Redis,
         serializer: BaseSerializer = JsonItemSerializer,
         keygetter: t.Callable[[t.Dict], t.Any] = Same,
+        digest_bits: t.Optional[int] = None,
     ):
         """Trivial LIFO redis queue implementation, with filtering
         store data as serialized json
@@ -54,7 +64,11 @@ class RedisUniqueQueue:
         :param serializer: string representation of json library
         :param keygetter: function to access to item key, by default return same
             element
+        :param digest_bits: store 64 or 128 bit digests of keys in filter
+            instead of raw keys to save memory, see `rdt.filters.key_digest`
+            for collision probability and `migrate_set_to_digest`
         """
+        assert digest_bits is None or digest_bits in DIGEST_BITS
         self.__db = r
         self.__serializer = serializer()
 
@@ -70,6 +84,13 @@ class RedisUniqueQueue:
             self.filter_name = f"{name}:filter"
 
         self.keygetter = keygetter
+        self.digest_bits = digest_bits
+
+    def _filter_key(self, item: t.Any) -> t.Any:
+        key = self.keygetter(item)
+        if self.digest_bits is None:
+            return key
+        return key_digest(key, self.digest_bits)
 
     def is_empty(self) -> bool:
         """Check if queue is empty
@@ -80,7 +101,7 @@ class RedisUniqueQueue:
 
     def in_filter(self, value: t.Dict) -> bool:
         """Check if element already in filter"""
-        key = self.keygetter(value)
+        key = self._filter_key(value)
         return bool(self.db.sismember(self.filter_name, key))
 
     def put(
@@ -88,39 +109,48 @@ class RedisUniqueQueue:
     ) -> int:  # TODO: define item type (int, str, etc)
         """Put item into the queue.
 
+        Check against filter and push are done atomically in one round trip.
+
         :param item: serializable item to push into the queue
-        :param key: uniq key in item to check against set
-        :returns: int -- the length of the list after the push operation
+        :returns: int -- the length of the list after the push operation,
+            0 if item already in filter
         """
-        key = self.keygetter(item)
-        if self.db.sismember(self.filter_name, key):
-            return 0
+        result = self.put_bulk_result([item])
+        if result.accepted:
+            return result.length
+        return 0
+
+    def put_bulk(self, items: t.List[t.Dict]) -> bool:
+        """Push bulk into the queue, skipping items already in filter
+        :param items: list of serializables to push into the queue
+        :returns: bool - true if at least one item was pushed
+        """
+        return bool(self.put_bulk_result(items).accepted)
 
-        pipe = self.db.pipeline()
-        pipe.sadd(self.filter_name, key)
-        pipe.rpush(self.queue_name, self.serializer.dumps(item))
-        res = pipe.execute()
+    def put_bulk_result(self, items: t.List[t.Dict]) -> PutResult:
+        """Push bulk into the queue with one server side script call.
 
-        # last result contains len of queue after operations
-        return int(res[-1])
+        Filter check, `SADD` and `RPUSH` are done atomically, so concurrent
+        producers can't push the same key twice (duplicates inside
+        the batch are rejected as well).
 
-    def put_bulk(self, items: t.List[t.Dict]) -> bool:
-        """Use redis pipelines to push bulk into the queue
         :param items: list of serializables to push into the queue
-        :returns: bool - if return fit number of items in queue
+        :returns: PutResult -- number of accepted items, indexes of rejected
+            items and length of the queue after the push
         """
-        pipe = self.db.pipeline()
+        if not items:
+            return PutResult(0, [], len(self))
+
+        args: t.List[t.Any] = []
         for item in items:
-            key = self.keygetter(item)
-            if not self.db.sismember(self.filter_name, key):
-                pipe.sadd(self.filter_name, key)
-                pipe.rpush(self.queue_name, self.serializer.dumps(item))
-        res = pipe.execute()
-        # if all given `items` already in filter `res` will be []
-        if not res:
-            return False
-        # last result contains len of queue after operations
-        return bool(res[-1] == self.__len__())
+            args.append(self._filter_key(item))
+            args.append(self.serializer.dumps(item))
+
+        script = self.db.register_script(UNIQUE_PUSH_SCRIPT)
+        accepted, length, rejected = script(
+            keys=[self.filter_name, self.queue_name], args=args
+        )
+        return PutResult(int(accepted), [int(i) for i in rejected], int(length))
 
     def get(self) -> t.Any:  # define type
         """Pop first element from the list
@@ -139,28 +169,54 @@ class RedisUniqueQueue:
         item = self.db.blpop(self.queue_name, timeout=timeout)
 
         if item:
-            return dict(self.serializer.loads(item[1]))
+            return self.serializer.loads(item[1])
         return None
 
     def get_bulk(self, number_of_items) -> t.List[t.Any]:
-        """Remove and return part of list from queue"""
-        items_list = []
-        for _ in range(number_of_items):
-            item = self.db.lpop(self.queue_name)
+        """Remove and return part of list from queue in one round trip
+
+        :param number_of_items: max number of items to pop
+        :returns: list -- deserialized items
+        """
+        items = lpop_bulk(self.db, self.queue_name, number_of_items)
+        return list(map(self.serializer.loads, items))
+
+    def get_block_bulk(self, max_items: int, timeout=None) -> t.List[t.Any]:
+        """Block until at least one item is available, then remove and
+        return up to `max_items` in the same round trip
 
-            if item:
-                items_list.append(self.serializer.loads(item))
-            else:
-                break
-        return items_list
+        :param max_items: max number of items to pop
+        :param timeout: seconds to wait, None (the default) to wait forever
+        :returns: list -- deserialized items, empty list on timeout
+        """
+        items = blpop_bulk(self.db, self.queue_name, max_items, timeout=timeout)
+        return list(map(self.serializer.loads, items))
+
+    def iter_items(
+        self,
+        batch_size: int = 100,
+        block: bool = False,
+        timeout: t.Optional[float] = None,
+    ) -> t.Iterator[t.Any]:
+        """Iterate over items popping them in bulk, drain queue until empty
+        or with `block` wait for new items up to `timeout` seconds.
+        Not consumed items are returned into the queue if iteration
+        stopped early (see `rdt.common.iter_queue_items`)
+
+        :param batch_size: max number of items popped in one round trip
+        :param block: wait for new items instead of stopping on empty queue
+        :param timeout: seconds to wait for new items in blocking mode
+        :returns: iterator -- deserialized items
+        """
+        return iter_queue_items(self, batch_size, block, timeout)
 
     def sizeof(self) -> int:
         """Size of data structure in redis
 
         :returns: int -- memory used in bytes
         """
-        queue_mu = self.db.memory_usage(self.queue_name)  # type: ignore
-        filter_mu = self.db.memory_usage(self.filter_name)  # type: ignore
+        queue_mu = self.db.memory_usage(self.queue_name, samples=0)
+        filter_mu = self.db.memory_usage(self.filter_name, samples=0)
         if queue_mu is None:
             queue_mu = 0
         if filter_mu is None:
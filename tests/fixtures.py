@@ -1,5 +1,6 @@
 """Fixtures for pytest dependency injections"""
 import redis
+import redis.asyncio
 import pytest
 
 
@@ -16,3 +17,16 @@ def redis_db():
     yield r
 
     r.flushdb()
+
+
+@pytest.fixture(scope="function")
+def aio_redis_db():
+    """Factory of asyncio clients for testing redis database.
+
+    Asyncio client bound to event loop, so it should be created inside
+    of the test coroutine. Database will be flushed after execution
+    of the test function"""
+    db_uri = "redis://localhost:6379/15"
+    yield lambda: redis.asyncio.from_url(db_uri)
+
+    redis.Redis.from_url(db_uri).flushdb()
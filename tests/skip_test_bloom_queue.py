@@ -77,7 +77,7 @@ def test_redis_bloom_queue(rdb):
 
     # sizeof should return None since there is no key
     assert q.sizeof() > 0  # we have some elements in filter
-    assert q.filter_len() == 1378624
+    assert q.filter_len() == 6
 
     # print
     assert "RedisBloomQueue" in str(q)
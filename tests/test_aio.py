@@ -0,0 +1,139 @@
+"""Tests for asyncio data structures"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import asyncio
+import operator
+
+import redis.asyncio
+
+from rdt.aio import (
+    RedisLifoQueue,
+    RedisUniqueQueue,
+    RedisSetFilter,
+    RedisBucketFilter,
+    RedisCounters,
+)
+from tests.fixtures import aio_redis_db
+
+
+ardb = aio_redis_db  # asyncio redis client factory fixture
+
+
+async def close(r):
+    # `aclose` added in redis-py 5.0.1, `close` deprecated since
+    if hasattr(r, "aclose"):
+        await r.aclose()
+    else:
+        await r.close()
+
+
+def test_aio_lifo_queue(ardb):
+    async def run():
+        r = ardb()
+        q = RedisLifoQueue("rdt:test-queue", r=r)
+
+        assert isinstance(q.db, redis.asyncio.Redis)
+
+        # put / get
+        assert await q.put({"alice": 1}) == 1
+        assert await q.get() == {"alice": 1}
+        assert await q.is_empty() is True
+        assert await q.get() is None
+
+        # put bulk
+        items = [{"b": 1}, {"b": 2}, {"b": 3}]
+        assert await q.put_bulk(items) is True
+        assert await q.length() == 3
+        assert await q.exists("rdt:test-queue") is True
+        assert await q.sizeof() > 0
+
+        # get block / get bulk
+        assert await q.get_block() == {"b": 1}
+        assert await q.get_bulk(10) == [{"b": 2}, {"b": 3}]
+        assert await q.get_block(timeout=1) is None
+        assert await q.sizeof() is None
+
+        assert "RedisLifoQueue" in str(q)
+        await close(r)
+
+    asyncio.run(run())
+
+
+def test_aio_unique_queue(ardb):
+    async def run():
+        r = ardb()
+        q = RedisUniqueQueue(
+            "rdt:test-unique-queue", r=r, keygetter=operator.itemgetter("_id")
+        )
+
+        assert await q.put({"_id": 0, "a": 1}) == 1
+        assert await q.put({"_id": 0, "a": 2}) == 0
+        assert await q.in_filter({"_id": 0}) is True
+        assert await q.in_filter({"_id": 1}) is False
+
+        result = await q.put_bulk_result([{"_id": 0}, {"_id": 1}, {"_id": 2}])
+        assert result.accepted == 2
+        assert result.rejected == [0]
+        assert result.length == 3
+        assert await q.put_bulk([{"_id": 1}]) is False
+
+        assert await q.get() == {"_id": 0, "a": 1}
+        assert len(await q.get_bulk(10)) == 2
+        assert await q.is_empty() is True
+        assert await q.filter_len() == 3
+        assert await q.sizeof() > 0
+
+        assert "rdt:test-unique-queue:queue" in str(q)
+        await close(r)
+
+    asyncio.run(run())
+
+
+def test_aio_filters(ardb):
+    async def run():
+        r = ardb()
+
+        f = RedisSetFilter("rdt:test-set", r=r)
+        assert await f.add("alice") == 1
+        assert await f.add("bob", "jane") == 2
+        assert await f.to_set() == {"alice", "bob", "jane"}
+        assert await f.remove("jane") is True
+        assert await f.exists("alice") is True
+        assert await f.exists("jane") is False
+        assert await f.length() == 2
+        assert await f.sizeof() > 0
+
+        df = RedisSetFilter("rdt:test-digest-set", r=r, digest_bits=64)
+        assert await df.add("alice", "bob") == 2
+        assert await df.exists("alice") is True
+        assert await df.exists("jane") is False
+        assert all(len(x) == 8 for x in await df.to_set())
+
+        bf = RedisBucketFilter("rdt:test-bucket", r=r, bucket_digits=1)
+        assert bf.get_bucket("original__barbie") == "4"
+        assert await bf.add("bob", "john", "jane") == 3
+        assert await bf.add("bob", "john", "jane") == 0
+        assert await bf.exists("bob") is True
+        assert await bf.remove("jane") is True
+        assert await bf.remove("tom") is False
+        assert await bf.length() == 2
+        assert sum((await bf.info()).values()) == 2
+        assert await bf.sizeof() > 0
+
+        await close(r)
+
+    asyncio.run(run())
+
+
+def test_aio_counters(ardb):
+    async def run():
+        r = ardb()
+        c = RedisCounters("rdt:test-counters", r=r)
+
+        assert await c.inc("a") == 1
+        assert await c.inc("a", 5) == 6
+        assert await c.get("a") == b"6"
+        assert await c.keys() == [b"a"]
+
+        await close(r)
+
+    asyncio.run(run())
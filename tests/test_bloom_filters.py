@@ -0,0 +1,241 @@
+"""Tests for bloom filters on plain redis"""
+# pylint: disable=invalid-name
+import operator
+
+import pytest
+import redis
+
+from rdt.bloom_filters import (
+    RedisBitmapBloomFilter,
+    RedisCountingBloomFilter,
+    RedisScalableBloomFilter,
+)
+from rdt.bloom_queue import RedisBloomQueue
+from rdt.common import PutResult
+from tests.fixtures import redis_db
+
+rdb = redis_db
+
+
+def test_bitmap_bloom_filter(rdb):
+    """Test bitmap bloom filter"""
+    f = RedisBitmapBloomFilter("rdt:test-bloom", r=rdb, capacity=1000)
+
+    assert f.exists("alice") is False
+    # bitmap created at full size on first write
+    assert rdb.exists(f.name) == 0
+    assert f.add("alice") == 1
+    assert rdb.strlen(f.name) == f.nbytes
+    assert f.add("alice", "bob", "jane") == 2
+    assert f.exists("alice") is True
+    assert f.exists_bulk(["bob", "eve", "jane"]) == [True, False, True]
+
+    # duplicates inside of the batch are new only once
+    assert f.add_bulk(["eve", "eve", 1]) == [True, False, True]
+    assert f.exists(1) is True
+    assert f.add_bulk([]) == []
+
+    assert 4 <= f.count() <= 6
+    assert f.sizeof() > 0
+    assert "RedisBitmapBloomFilter" in str(f)
+
+
+def test_bitmap_bloom_filter_sizing_stored(rdb):
+    """Filter can't be opened with other bits and hashes"""
+    f = RedisBitmapBloomFilter("rdt:test-bloom", r=rdb, capacity=1000)
+    f.add("alice")
+    assert rdb.get("rdt:test-bloom:params") == b"%d:%d" % (f.bits, f.hashes)
+
+    same = RedisBitmapBloomFilter("rdt:test-bloom", r=rdb, capacity=1000)
+    assert same.exists("alice") is True
+    with pytest.raises(AssertionError):
+        RedisBitmapBloomFilter("rdt:test-bloom", r=rdb, capacity=2000)
+    with pytest.raises(AssertionError):
+        RedisBitmapBloomFilter(
+            "rdt:test-bloom", r=rdb, capacity=1000, error_rate=0.001
+        )
+
+    # client decoding responses
+    decoded = redis.Redis(
+        connection_pool=redis.ConnectionPool(
+            **rdb.connection_pool.connection_kwargs, decode_responses=True
+        )
+    )
+    same = RedisBitmapBloomFilter("rdt:test-bloom", r=decoded, capacity=1000)
+    assert same.exists("alice") is True
+    with pytest.raises(AssertionError):
+        RedisBitmapBloomFilter("rdt:test-bloom", r=decoded, capacity=2000)
+
+
+def test_bitmap_bloom_filter_error_rate(rdb):
+    """False positive rate at capacity should be close to error rate"""
+    f = RedisBitmapBloomFilter(
+        "rdt:test-bloom", r=rdb, capacity=2000, error_rate=0.01
+    )
+    f.add_bulk([f"in-{i}" for i in range(2000)])
+    assert all(f.exists_bulk([f"in-{i}" for i in range(2000)]))
+    fp = sum(f.exists_bulk([f"out-{i}" for i in range(10000)]))
+    assert fp < 10000 * 0.02
+
+
+def test_bloom_queue_bitmap_backend(rdb):
+    """Test bloom queue without redisbloom module"""
+    q = RedisBloomQueue(
+        "rdt:test-bloom-queue",
+        r=rdb,
+        keygetter=operator.itemgetter("_id"),
+        capacity=1000,
+        backend="bitmap",
+    )
+
+    assert rdb.exists(q.filter_name) == 0
+    assert q.put({"_id": 0, "alice": 1}) == 1
+    assert rdb.strlen(q.filter_name) == q.filter.nbytes
+    assert q.get() == {"_id": 0, "alice": 1}
+    assert q.is_empty() is True
+
+    # filtered
+    assert q.put({"_id": 0, "a": 1000}) == 0
+    assert q.in_filter({"_id": 0}) is True
+    assert q.in_filter({"_id": 1}) is False
+    assert q.in_filter_bulk([{"_id": 0}, {"_id": 1}]) == [True, False]
+    assert q.in_filter_bulk([]) == []
+
+    items = [{"_id": 1, "b": 1}, {"_id": 2, "b": 2}, {"_id": 2, "b": 3}]
+    assert q.put_bulk(items) is True
+    assert q.put_bulk(items) is False
+    assert len(q) == 2
+    assert q.get_bulk(10) == items[:2]
+
+    assert q.sizeof() > 0
+    assert q.filter_len() == 3
+    assert q.filter_info()["Hashes"] == 7
+
+
+def test_bloom_queue_put_bulk_result(rdb):
+    """Test atomic batch push of bloom queue"""
+    q = RedisBloomQueue(
+        "rdt:test-bloom-queue", r=rdb, capacity=10000, backend="bitmap"
+    )
+
+    res = q.put_bulk_result(["a", "b", "a", "c"])
+    assert res == PutResult(accepted=3, rejected=[2], length=3)
+    res = q.put_bulk_result(["c", "d"])
+    assert res == PutResult(accepted=1, rejected=[0], length=4)
+    assert q.put_bulk_result([]) == PutResult(0, [], 4)
+    assert q.put("e") == 5
+    assert q.put("e") == 0
+
+    # payloads are pushed in chunks inside of the script
+    urls = [f"https://example.com/{i}" for i in range(2500)]
+    res = q.put_bulk_result(urls + urls[:10])
+    assert res.rejected[-10:] == list(range(2500, 2510))
+    assert res.accepted == 2500 - len(res.rejected[:-10])
+    assert res.length == 5 + res.accepted
+    assert q.get_bulk(5) == ["a", "b", "c", "d", "e"]
+    assert q.get() == urls[0]
+
+
+def test_scalable_bloom_filter(rdb):
+    """Test scalable bloom filter grows past capacity"""
+    f = RedisScalableBloomFilter(
+        "rdt:test-scalable", r=rdb, capacity=100, error_rate=0.01
+    )
+    assert f.exists("alice") is False
+    assert f.info()["Number of filters"] == 0
+    assert f.add("alice", "bob", "alice") == 2
+    assert f.exists_bulk(["alice", "bob", "jane"]) == [True, True, False]
+
+    keys = [f"in-{i}" for i in range(1000)]
+    assert sum(f.add_bulk(keys)) > 990
+    assert all(f.exists_bulk(keys))
+    assert sum(f.add_bulk(keys)) == 0
+
+    filters = f.filters()
+    # 100 + 200 + 400 + 800 capacity
+    assert len(filters) == 4
+    assert [x["capacity"] for x in filters] == [100, 200, 400, 800]
+    assert filters[1]["hashes"] > filters[0]["hashes"]
+    assert f.count() == sum(x["count"] for x in filters) > 990
+
+    fp = sum(f.exists_bulk([f"out-{i}" for i in range(10000)]))
+    assert fp < 10000 * 0.01
+
+    # hash tagged keys, all in one cluster slot
+    assert rdb.hget("{rdt:test-scalable}", "filters") == b"4"
+    assert rdb.exists(*[f"{{rdt:test-scalable}}:{i}" for i in range(4)]) == 4
+
+    info = f.info()
+    assert info["Number of filters"] == 4
+    # share of set bits of the current sub-filter, as for bitmap filter
+    ones = rdb.bitcount("{rdt:test-scalable}:3")
+    assert info["Fill ratio"] == ones / filters[3]["bits"]
+    assert 0 < info["Fill ratio"] < 0.5
+    assert 0 < info["Estimated error rate"] < 0.01
+    assert info["Size"] == f.sizeof() > 0
+    assert "RedisScalableBloomFilter" in str(f)
+
+
+def test_bloom_queue_scalable_backend(rdb):
+    """Test bloom queue with scalable filter"""
+    q = RedisBloomQueue(
+        "rdt:test-bloom-queue", r=rdb, capacity=10, backend="scalable"
+    )
+    items = [str(i) for i in range(50)]
+    res = q.put_bulk_result(items + ["0"])
+    assert res.rejected[-1] == 50
+    assert res.length == res.accepted == 51 - len(res.rejected)
+    assert q.put("0") == 0
+    assert q.in_filter("1") is True
+    assert q.filter_info()["Number of filters"] >= 3
+    assert q.filter_len() == res.accepted
+    assert q.sizeof() > q.filter.sizeof()
+
+
+def test_counting_bloom_filter(rdb):
+    """Test counting bloom filter supports removal"""
+    f = RedisCountingBloomFilter("rdt:test-counting", r=rdb, capacity=1000)
+    assert f.add_bulk(["a", "b", "a"]) == [True, True, False]
+    assert f.exists_bulk(["a", "b", "c"]) == [True, True, False]
+    # counters incremented once
+    assert f.count() == 2
+
+    assert f.remove_bulk(["a", "c"]) == [True, False]
+    assert f.exists_bulk(["a", "b"]) == [False, True]
+    assert f.remove("a") == 0
+    assert f.add("a") == 1
+    assert f.count() == 2
+
+    keys = [f"k-{i}" for i in range(1000)]
+    added = sum(f.add_bulk(keys))
+    assert all(f.exists_bulk(keys))
+    # counted by scripts, without fetching counters
+    assert f.count() == int(rdb.get("rdt:test-counting:count")) == 2 + added
+    assert sum(f.remove_bulk(keys)) == 1000
+    assert f.count() == 2 + added - 1000
+    assert f.exists_bulk(["a", "b"]) == [True, True]
+    assert sum(f.exists_bulk(keys)) < 1000 * 0.01
+    assert f.info()["Counters"] == f.counters
+    assert "RedisCountingBloomFilter" in str(f)
+    with pytest.raises(AssertionError):
+        RedisCountingBloomFilter("rdt:test-counting", r=rdb, capacity=2000)
+
+
+def test_bloom_queue_counting_backend(rdb):
+    """Test failed item removed from filter could be put again"""
+    q = RedisBloomQueue(
+        "rdt:test-bloom-queue", r=rdb, capacity=1000, backend="counting"
+    )
+    assert q.put_bulk_result(["a", "b", "a"]) == PutResult(2, [2], 2)
+    assert q.get() == "a"
+    assert q.put("a") == 0
+
+    assert q.remove_from_filter(["a", "c"]) == [True, False]
+    assert q.in_filter_bulk(["a", "b", "c"]) == [False, True, False]
+    assert q.put("a") == 2
+    assert q.get_bulk(2) == ["b", "a"]
+    assert q.filter_len() == 2
+
+    q = RedisBloomQueue("rdt:test-bloom-queue-2", r=rdb, backend="bitmap")
+    with pytest.raises(AssertionError):
+        q.remove_from_filter(["a"])
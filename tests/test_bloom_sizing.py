@@ -0,0 +1,56 @@
+"""Tests for bloom filter sizing"""
+# pylint: disable=invalid-name
+from rdt.bloom_filters import RedisCountingBloomFilter, RedisScalableBloomFilter
+from rdt.bloom_sizing import (
+    bloom_size,
+    bloom_sizing,
+    expected_error_rate,
+    max_capacity,
+    scalable_sizing,
+)
+from tests.fixtures import redis_db
+
+rdb = redis_db
+
+
+def test_bloom_sizing():
+    """Test optimal number of bits, hashes and memory"""
+    assert bloom_size(1000000, 0.01) == (9585059, 7)
+
+    sizing = bloom_sizing(1000000, 0.01)
+    assert sizing.memory == 1198133
+    assert round(sizing.bits_per_item, 2) == 9.59
+    assert bloom_sizing(1000000, 0.01, counter_bits=4).memory == 4792530
+
+    # filter at capacity has target error rate, twice over - much worse
+    rate = expected_error_rate(sizing.bits, sizing.hashes, 1000000)
+    assert 0.009 < rate < 0.011
+    assert expected_error_rate(sizing.bits, sizing.hashes, 2000000) > 0.15
+
+    assert max_capacity(sizing.memory, 0.01) == 1000000
+    assert max_capacity(sizing.memory, 0.01, counter_bits=4) == 250000
+
+
+def test_sizing_matches_filters(rdb):
+    """Test sizing of counting and scalable filters"""
+    f = RedisCountingBloomFilter("rdt:test-counting", r=rdb, capacity=1000)
+    assert rdb.exists(f.name) == 0
+    f.add("a")
+    sizing = bloom_sizing(1000, 0.01, counter_bits=4)
+    assert (sizing.bits, sizing.hashes) == (f.counters, f.hashes)
+    # counters preallocated with exact size on first write
+    assert rdb.strlen(f.name) == sizing.memory
+
+    f = RedisScalableBloomFilter("rdt:test-scalable", r=rdb, capacity=100)
+    f.add_bulk([str(i) for i in range(350)])
+    filters = f.filters()
+    expected = scalable_sizing(f.count(), 100, 0.01)
+    assert len(expected) == len(filters) == 3
+    for sub, sizing in zip(filters, expected):
+        assert (sub["bits"], sub["hashes"], sub["capacity"]) == (
+            sizing.bits,
+            sizing.hashes,
+            sizing.capacity,
+        )
+    assert len(scalable_sizing(0, 100, 0.01)) == 1
+    assert len(scalable_sizing(100, 100, 0.01)) == 2
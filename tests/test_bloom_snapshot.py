@@ -0,0 +1,60 @@
+"""Tests for local bloom snapshot"""
+# pylint: disable=invalid-name
+from rdt.bloom_filters import RedisBitmapBloomFilter
+from rdt.bloom_queue import RedisBloomQueue
+from rdt.bloom_snapshot import BloomSnapshot
+from tests.fixtures import redis_db
+
+rdb = redis_db
+
+
+def test_bloom_snapshot(rdb):
+    """Test local snapshot matches redis filter"""
+    f = RedisBitmapBloomFilter("rdt:test-bloom", r=rdb, capacity=5000)
+    seen = [f"https://example.com/{i}" for i in range(3000)]
+    f.add_bulk(seen)
+
+    # few chunks, bitmap is ~6 KB
+    s = BloomSnapshot(f, chunk_size=1000)
+    assert s.chunks == 6
+    # bitmap is preallocated by first write
+    assert s.stats.fetched_bytes == rdb.strlen(f.name) == s.nbytes
+    assert all(s.contains_bulk(seen))
+
+    new = [f"https://example.com/new/{i}" for i in range(1000)]
+    assert s.contains_bulk(new) == f.exists_bulk(new)
+
+    # stale copy, new keys confirmed in redis
+    f.add("late")
+    assert s.contains("late") is False
+    assert s.exists_bulk([seen[0], "late", "never"]) == [True, True, False]
+    assert s.stats.local_hits == 1
+    assert s.stats.remote_checks == 2
+
+    # incremental refresh continues round robin
+    assert s.refresh(4) == 4000
+    assert s.refresh(4) == s.nbytes - 4000 + 2000
+    assert s.contains("late") is True
+    assert "BloomSnapshot" in str(s)
+
+    # missing (or shorter) bitmap is padded with zeros
+    rdb.delete(f.name)
+    assert s.refresh() == 0
+    assert s.contains("late") is False
+
+
+def test_bloom_snapshot_mmap(rdb, tmp_path):
+    """Test snapshot kept in memory mapped file"""
+    q = RedisBloomQueue(
+        "rdt:test-bloom-queue", r=rdb, capacity=1000, backend="bitmap"
+    )
+    q.put_bulk(["a", "b"])
+    path = tmp_path / "bloom.bin"
+    with BloomSnapshot(q.filter, path=str(path), max_age=0) as s:
+        assert path.stat().st_size == s.nbytes
+        assert s.exists_bulk(["a", "b", "c"]) == [True, True, False]
+        q.put("c")
+        # refreshed because older than max_age
+        assert s.exists("c") is True
+        assert s.stats.remote_checks == 1
+    assert s.stats.hit_ratio == 0.75
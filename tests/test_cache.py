@@ -0,0 +1,122 @@
+"""Tests for membership cache"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import time
+
+import pytest
+
+from rdt import MembershipCache, RedisBucketFilter, RedisSetFilter
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_membership_cache(rdb):
+    with MembershipCache(rdb, prefixes=["rdt:"]) as cache:
+        assert cache.tracking is True
+        f = RedisSetFilter("rdt:test-set", r=rdb, cache=cache)
+        epoch = cache.epoch
+        f.add("alice", "bob")
+        # invalidation of the write is delivered asynchronously
+        assert wait_for(lambda: cache.epoch > epoch)
+
+        assert f.exists("alice") is True
+        assert f.exists("alice") is True
+        assert f.exists("jane") is False
+        # negative results aren't cached
+        assert len(cache) == 1
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 2
+
+        # invalidated by server when key changed by other client
+        rdb.srem("rdt:test-set", "alice")
+        assert wait_for(lambda: len(cache) == 0)
+        assert f.exists("alice") is False
+        assert cache.stats.invalidations == 1
+
+        # remove drops cached member
+        assert f.exists("bob") is True
+        assert f.remove("bob") is True
+        assert f.exists("bob") is False
+
+        # flushdb drops all
+        epoch = cache.epoch
+        assert f.add("bob") == 1
+        assert wait_for(lambda: cache.epoch > epoch)
+        assert f.exists("bob") is True
+        assert wait_for(lambda: len(cache) == 1)
+        rdb.flushdb()
+        assert wait_for(lambda: len(cache) == 0)
+
+        # bucket filter shares the cache
+        bf = RedisBucketFilter("rdt:test-bucket", r=rdb, cache=cache)
+        bf.add("alice")
+        assert bf.exists("alice") and bf.exists("alice")
+        assert bf.exists("other") is False
+        assert "MembershipCache" in str(cache)
+
+        # shared cache should track filter keys
+        with pytest.raises(AssertionError):
+            RedisSetFilter("other:test-set", r=rdb, cache=cache)
+
+    assert cache.tracking is False
+
+
+def test_membership_cache_of_filter(rdb):
+    # tracking requires prefixes, all writes are tracked otherwise
+    with pytest.raises(AssertionError):
+        MembershipCache(rdb)
+
+    # cache created by filter tracks only its key
+    f = RedisSetFilter("rdt:test-set", r=rdb, cache=True)
+    assert f.cache.prefixes == ["rdt:test-set"]
+    assert f.cache.tracking is True
+    epoch = f.cache.epoch
+    f.add("alice")
+    assert wait_for(lambda: f.cache.epoch > epoch)
+    assert f.exists("alice") and f.exists("alice")
+    assert f.cache.stats.hits == 1
+
+    # write of other key doesn't invalidate
+    rdb.sadd("rdt:other-set", "bob")
+    rdb.srem("rdt:test-set", "alice")
+    assert wait_for(lambda: len(f.cache) == 0)
+    assert f.cache.stats.invalidations == 1
+    f.cache.close()
+
+
+def test_membership_cache_budget_and_ttl(rdb):
+    cache = MembershipCache(rdb, max_entries=3, ttl=0.2, tracking=False)
+    assert cache.tracking is False
+
+    for i in range(5):
+        cache.add("key", str(i))
+    assert len(cache) == 3
+    assert cache.stats.evictions == 2
+    assert cache.contains("key", "0") is False
+    assert cache.contains("key", "4") is True
+
+    # epoch changed while request was in flight
+    epoch = cache.epoch
+    cache.invalidate("other")
+    cache.add("key", "5", epoch)
+    assert cache.contains("key", "5") is False
+
+    # expired by ttl
+    time.sleep(0.3)
+    assert cache.contains("key", "4") is False
+
+    # memory budget
+    cache = MembershipCache(rdb, max_memory=1000, tracking=False)
+    for i in range(100):
+        cache.add("key", "value-{}".format(i))
+    assert cache.stats.memory <= 1000
+    assert 0 < len(cache) < 10
+    assert cache.stats.hit_ratio == 0.0
@@ -0,0 +1,78 @@
+"""Tests for common functions"""
+# pylint: disable=missing-function-docstring,redefined-outer-name,protected-access
+import pytest
+import redis
+
+from rdt import common
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+class NoLpopCountRedis(redis.Redis):
+    """Client of server without LPOP count argument (redis < 6.2)"""
+
+    def execute_command(self, *args, **options):
+        if args[0] == "LPOP" and len(args) > 2:
+            raise redis.exceptions.ResponseError(
+                "ERR wrong number of arguments for 'lpop' command"
+            )
+        return super().execute_command(*args, **options)
+
+
+def test_lpop_count_supported(rdb):
+    rdb.rpush("rdt:test-list", *range(2))
+    assert common.lpop_count_supported(rdb, "rdt:test-list") is True
+    # checked with zero count, list isn't changed
+    assert rdb.llen("rdt:test-list") == 2
+
+    old = NoLpopCountRedis(connection_pool=rdb.connection_pool)
+    assert common.lpop_count_supported(old, "rdt:test-list") is False
+    assert common.lpop_bulk_script(old) is common.lpop_bulk_script(old)
+
+    # other errors are not cached
+    other = redis.Redis(connection_pool=rdb.connection_pool)
+    rdb.set("rdt:test-key", 1)
+    with pytest.raises(redis.exceptions.ResponseError):
+        common.lpop_count_supported(other, "rdt:test-key")
+    assert other not in common._LPOP_COUNT_SUPPORTED
+
+
+def test_lpop_bulk(rdb):
+    rdb.rpush("rdt:test-list", *range(5))
+
+    assert common.lpop_bulk(rdb, "rdt:test-list", 0) == []
+    assert common.lpop_bulk(rdb, "rdt:test-list", 2) == [b"0", b"1"]
+    assert common.lpop_bulk(rdb, "rdt:test-list", 10) == [b"2", b"3", b"4"]
+    assert common.lpop_bulk(rdb, "rdt:test-list", 10) == []
+    assert rdb.exists("rdt:test-list") == 0
+
+
+def test_lpop_bulk_script_fallback(rdb):
+    old = NoLpopCountRedis(connection_pool=rdb.connection_pool)
+    rdb.rpush("rdt:test-list", *range(5))
+
+    # error of first LPOP with count is cached, script used instead
+    assert common.lpop_bulk(old, "rdt:test-list", 2) == [b"0", b"1"]
+    assert common._LPOP_COUNT_SUPPORTED[old] is False
+    assert common.lpop_bulk(old, "rdt:test-list", 10) == [b"2", b"3", b"4"]
+    assert common.lpop_bulk(old, "rdt:test-list", 10) == []
+    assert rdb.exists("rdt:test-list") == 0
+
+
+def test_blpop_bulk(rdb):
+    assert common.blpop_bulk(rdb, "rdt:test-list", 10, timeout=1) == []
+
+    rdb.rpush("rdt:test-list", *range(5))
+
+    assert common.blpop_bulk(rdb, "rdt:test-list", 0) == []
+    assert common.blpop_bulk(rdb, "rdt:test-list", 1) == [b"0"]
+    assert common.blpop_bulk(rdb, "rdt:test-list", 3) == [b"1", b"2", b"3"]
+    assert common.blpop_bulk(rdb, "rdt:test-list", 10, timeout=1) == [b"4"]
+
+    # script fallback
+    old = NoLpopCountRedis(connection_pool=rdb.connection_pool)
+    rdb.rpush("rdt:test-list", *range(3))
+    assert common.blpop_bulk(old, "rdt:test-list", 2) == [b"0", b"1"]
+    assert common.blpop_bulk(old, "rdt:test-list", 2) == [b"2"]
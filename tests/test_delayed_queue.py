@@ -0,0 +1,63 @@
+"""Tests for delayed queue"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import time
+
+from rdt import RedisDelayedQueue, RedisLifoQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_redis_delayed_queue(rdb):
+    target = RedisLifoQueue("rdt:test-queue", r=rdb)
+    q = RedisDelayedQueue("rdt:test-delayed", target, batch_size=2)
+
+    now = time.time()
+    assert q.is_empty() is True
+    assert q.next_due() is None
+    assert q.promote() == 0
+
+    assert q.put({"a": 1}, not_before=now - 10) == 1
+    assert q.put({"a": 1}, not_before=now - 5) == 0  # rescheduled
+    assert q.put_bulk([{"a": 2}, {"a": 3}, {"a": 4}], not_before=now - 1) == 3
+    assert q.put_bulk([{"b": 1}, {"b": 2}], not_before=[now + 100, now + 50])
+    assert len(q) == 6
+    assert q.sizeof() > 0
+    assert abs(q.next_due() - (now - 5)) < 0.01
+
+    # all due items moved, in few batches
+    assert q.promote() == 4
+    assert len(q) == 2
+    assert len(target) == 4
+    assert target.get_bulk(10) == [{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}]
+    assert abs(q.next_due() - (now + 50)) < 0.01
+
+    # explicit time
+    assert q.promote(now=now + 60) == 1
+    assert target.get() == {"b": 2}
+
+    # batches over lua unpack limit are moved in chunks
+    q.batch_size = 20000
+    q.put_bulk([{"c": i} for i in range(20000)], not_before=now - 1)
+    assert q.promote() == 20000
+    assert len(q) == 1
+    moved = target.get_bulk(20000)
+    assert sorted(item["c"] for item in moved) == list(range(20000))
+
+    assert "RedisDelayedQueue" in str(q)
+
+
+def test_redis_delayed_queue_get_block(rdb):
+    target = RedisLifoQueue("rdt:test-queue", r=rdb)
+    q = RedisDelayedQueue("rdt:test-delayed", target)
+
+    assert q.get_block(timeout=0.2) is None
+
+    q.put({"a": 1}, delay=0.3)
+    started = time.time()
+    assert q.get_block(timeout=0.1) is None
+    assert q.get_block(timeout=5) == {"a": 1}
+    # woke up close to due time instead of waiting for `max_wait`
+    assert time.time() - started < 1
+    assert q.is_empty() is True
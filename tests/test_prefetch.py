@@ -0,0 +1,86 @@
+"""Tests for prefetching consumer"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import pytest
+import redis
+
+from rdt import PrefetchingConsumer, RedisLifoQueue, RedisUniqueQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_prefetching_consumer(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    q.put_bulk([{"a": i} for i in range(50)])
+
+    with PrefetchingConsumer(
+        q, low_watermark=5, high_watermark=20, batch_size=10, block_timeout=0.1
+    ) as consumer:
+        assert consumer.get_block(timeout=5) == {"a": 0}
+        assert consumer.get_block() == {"a": 1}
+        # buffer never holds more than high watermark
+        assert len(consumer) <= 20
+
+        received = [consumer.get_block(timeout=5) for _ in range(30)]
+        assert received == [{"a": i} for i in range(2, 32)]
+
+        assert "PrefetchingConsumer" in str(consumer)
+
+    # not processed items returned into the queue in same order
+    assert consumer.closed is True
+    assert q.get_bulk(100) == [{"a": i} for i in range(32, 50)]
+    assert consumer.get_block(timeout=0.1) is None
+
+
+def test_prefetching_consumer_unique_queue(rdb):
+    q = RedisUniqueQueue("rdt:test-unique-queue", r=rdb)
+    consumer = PrefetchingConsumer(
+        q, low_watermark=0, high_watermark=5, block_timeout=0.1
+    )
+
+    assert consumer.get() is None
+    assert consumer.get_bulk(10) == []
+    assert consumer.get_block(timeout=0.2) is None
+
+    q.put_bulk(["a", "b", "c"])
+    assert consumer.get_block(timeout=5) == "a"
+    assert consumer.get_block(timeout=5) == "b"
+
+    # returned items bypass filter
+    assert consumer.close() == 1
+    assert q.get() == "c"
+    assert q.put("c") == 0
+
+
+class FailingQueue:
+    """Queue failing first `failures` blocking pops"""
+
+    def __init__(self, queue, failures):
+        self.queue = queue
+        self.failures = failures
+
+    def get_block_bulk(self, max_items, timeout=None):
+        if self.failures:
+            self.failures -= 1
+            raise redis.exceptions.ConnectionError("connection lost")
+        return self.queue.get_block_bulk(max_items, timeout=timeout)
+
+
+def test_prefetching_consumer_error(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    q.put_bulk([{"a": 1}, {"a": 2}])
+    consumer = PrefetchingConsumer(
+        FailingQueue(q, failures=1),
+        low_watermark=0,
+        high_watermark=10,
+        block_timeout=0.1,
+    )
+
+    # error of background thread wakes up blocked consumer
+    with pytest.raises(redis.exceptions.ConnectionError):
+        consumer.get_block()
+    # fetching retried
+    assert consumer.get_block(timeout=5) == {"a": 1}
+    assert consumer.get_bulk(10) == [{"a": 2}]
+    assert consumer.close() == 0
@@ -0,0 +1,77 @@
+"""Tests for priority queue"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import operator
+import threading
+
+from rdt import RedisPriorityQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_redis_priority_queue(rdb):
+    q = RedisPriorityQueue("rdt:test-priority", r=rdb)
+
+    assert q.is_empty() is True
+    assert q.get() is None
+    assert q.get_bulk(10) == []
+    assert q.get_block(timeout=1) is None
+
+    assert q.put({"a": 1}, priority=5) == 1
+    assert q.put({"a": 2}, priority=1) == 2
+    assert q.put({"a": 3}) == 3  # default priority 0
+    assert q.put_bulk([{"b": 1}, {"b": 2}], priorities=[1, -1]) is True
+    assert len(q) == 5
+    assert q.sizeof() > 0
+
+    # lowest priority first, same priority in FIFO order
+    assert q.get() == {"b": 2}
+    assert q.get_bulk(3) == [{"a": 3}, {"a": 2}, {"b": 1}]
+    assert q.get_block(timeout=1) == {"a": 1}
+    assert q.is_empty() is True
+
+    q.put_bulk([{"c": i} for i in range(12)])
+    assert q.get_block_bulk(5) == [{"c": i} for i in range(5)]
+    assert q.get_block_bulk(10, timeout=1) == [{"c": i} for i in range(5, 12)]
+    assert q.get_block_bulk(10, timeout=1) == []
+
+    # wait on empty queue until producer put items
+    # (woken id is popped with the batch in priority order)
+    timer = threading.Timer(0.2, q.put_bulk, [[{"d": 1}, {"d": 2}], [2, 1]])
+    timer.start()
+    assert q.get_block_bulk(10, timeout=5) == [{"d": 2}, {"d": 1}]
+    timer.join()
+    assert len(q) == 0
+
+    # payloads are removed together with ids
+    assert rdb.hlen(q.items_name) == 0
+
+    assert "RedisPriorityQueue" in str(q)
+
+
+def test_redis_priority_queue_unique(rdb):
+    q = RedisPriorityQueue(
+        "rdt:test-priority",
+        r=rdb,
+        unique=True,
+        keygetter=operator.itemgetter("url"),
+        prioritygetter=operator.itemgetter("depth"),
+    )
+
+    assert q.put({"url": "a", "depth": 2}) == 1
+    assert q.put({"url": "a", "depth": 0}) == 0
+    assert q.in_filter({"url": "a"}) is True
+    assert q.in_filter({"url": "b"}) is False
+
+    result = q.put_bulk_result(
+        [{"url": "b", "depth": 1}, {"url": "a", "depth": 1}, {"url": "c"}],
+        priorities=[None, None, 0],
+    )
+    assert result.accepted == 2
+    assert result.rejected == [1]
+    assert result.length == 3
+
+    assert [x["url"] for x in q.get_bulk(10)] == ["c", "b", "a"]
+    assert q.filter_len() == 3
+    assert q.put({"url": "c", "depth": 0}) == 0
@@ -0,0 +1,122 @@
+"""Tests for buffered producer"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import threading
+import time
+
+import pytest
+import redis
+
+from rdt import BufferedProducer, RedisLifoQueue, RedisUniqueQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_buffered_producer(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+
+    with BufferedProducer(q, max_items=10, flush_interval_ms=60000) as p:
+        for i in range(25):
+            p.put({"a": i})
+        # flushed by size
+        assert len(q) == 20
+        assert len(p) == 5
+        assert p.stats.flushes == 2
+        assert p.stats.max_batch_size == 10
+        assert "BufferedProducer" in str(p)
+
+    # flushed on exit
+    assert len(q) == 25
+    assert q.get_bulk(100) == [{"a": i} for i in range(25)]
+    assert p.stats.items == 25
+    assert p.stats.mean_batch_size == 25 / 3
+    assert p.stats.mean_flush_time > 0
+
+
+def test_buffered_producer_flush_by_time(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    p = BufferedProducer(q, max_items=1000, flush_interval_ms=20)
+
+    p.put_bulk([{"a": 1}, {"a": 2}])
+    assert q.get_block_bulk(10, timeout=2) == [{"a": 1}, {"a": 2}]
+    assert len(p) == 0
+    assert p.close() == 0
+
+
+def test_buffered_producer_threads_and_duplicates(rdb):
+    q = RedisUniqueQueue("rdt:test-unique-queue", r=rdb)
+    p = BufferedProducer(q, max_items=50, flush_interval_ms=10)
+
+    def produce():
+        for i in range(200):
+            p.put(str(i))
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    p.close()
+
+    assert len(q) == 200
+    assert p.stats.items == 800
+    assert p.stats.dropped == 600
+
+
+class FailingQueue:
+    """Queue failing first `failures` bulk puts"""
+
+    def __init__(self, queue, failures):
+        self.queue = queue
+        self.failures = failures
+
+    def put_bulk(self, items):
+        if self.failures:
+            self.failures -= 1
+            raise redis.exceptions.ConnectionError("connection lost")
+        return self.queue.put_bulk(items)
+
+
+def test_buffered_producer_failed_flush(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    p = BufferedProducer(
+        FailingQueue(q, failures=1), max_items=1000, flush_interval_ms=20
+    )
+
+    # background flush failed, batch kept in buffer and retried, error of
+    # the successful retry isn't raised
+    p.put_bulk([{"a": 1}, {"a": 2}])
+    assert q.get_block_bulk(10, timeout=2) == [{"a": 1}, {"a": 2}]
+    while p.stats.flushes == 0:
+        time.sleep(0.01)
+    assert p.put({"a": 3}) == 1
+    assert p.close() == 1
+    assert q.get() == {"a": 3}
+
+
+def test_buffered_producer_failed_flush_keeps_items(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    failing = FailingQueue(q, failures=100)
+    p = BufferedProducer(
+        failing, max_items=2, flush_interval_ms=60000, max_buffer=3
+    )
+
+    # error raised after item is buffered
+    p.put({"a": 1})
+    with pytest.raises(redis.exceptions.ConnectionError):
+        p.put({"a": 2})
+    assert len(p) == 2
+    with pytest.raises(redis.exceptions.ConnectionError):
+        p.put({"a": 3})
+    assert len(p) == 3
+
+    # buffer is full, item isn't buffered
+    with pytest.raises(BufferError):
+        p.put({"a": 4})
+    assert len(p) == 3
+
+    failing.failures = 0
+    assert p.close() == 3
+    assert q.get_bulk(10) == [{"a": 1}, {"a": 2}, {"a": 3}]
+    assert p.stats.flushes == 1
@@ -1,8 +1,16 @@
 """Test filters"""
 # pylint: disable=missing-function-docstring
+import time
+
+import pytest
 import redis
 
-from rdt import RedisSetFilter, RedisBucketFilter
+from rdt import RedisSetFilter, RedisBucketFilter, RedisGenerationalFilter
+from rdt.filters import (
+    digest_collision_probability,
+    key_digest,
+    migrate_set_to_digest,
+)
 from tests.fixtures import redis_db
 
 
@@ -85,3 +93,103 @@ def test_redis_bucket_filter(rdb):
     # check str
     assert "RedisBucketFilter" in str(f)
     assert "rdt:test-bucket" in str(f)
+
+
+def test_redis_set_filter_digest(rdb):
+    assert len(key_digest("alice")) == 8
+    assert len(key_digest("alice", bits=128)) == 16
+    assert key_digest("alice", 128)[:8] == key_digest(b"alice")
+    assert key_digest(42) == key_digest("42")
+    assert 0.02 < digest_collision_probability(10**9) < 0.03
+    assert digest_collision_probability(10**9, bits=128) < 1e-20
+
+    f = RedisSetFilter("rdt:test-set", r=rdb, digest_bits=64)
+    assert f.add("alice", "bob") == 2
+    assert f.add("alice") == 0
+    assert f.exists("alice") is True
+    assert f.exists("jane") is False
+    assert f.to_set() == {key_digest("alice"), key_digest("bob")}
+    assert f.remove("bob") is True
+    assert len(f) == 1
+
+    # migrate raw set of urls
+    raw = RedisSetFilter("rdt:test-urls", r=rdb)
+    urls = [
+        "https://example.com/catalog/category/item?id={}&page=1".format(i)
+        for i in range(1000)
+    ]
+    raw.add(*urls)
+    raw_size = raw.sizeof()
+    assert migrate_set_to_digest(rdb, raw.name, batch_size=100) == 1000
+
+    digest = RedisSetFilter("rdt:test-urls", r=rdb, digest_bits=64)
+    assert len(digest) == 1000
+    assert digest.exists(urls[0]) is True
+    # ~0.56, hash table size varies with incremental rehashing
+    assert digest.sizeof() < raw_size * 0.7
+
+    # migrated set is marked, second run would hash digests again
+    assert rdb.get("rdt:test-urls:digest-bits") == b"64"
+    with pytest.raises(AssertionError):
+        migrate_set_to_digest(rdb, raw.name)
+    assert digest.exists(urls[0]) is True
+
+    # into another key
+    raw.name = "rdt:test-urls-raw"
+    raw.add(*urls)
+    assert migrate_set_to_digest(rdb, raw.name, 128, target="rdt:t") == 1000
+    assert len(raw) == 1000
+    target = RedisSetFilter("rdt:t", r=rdb, digest_bits=128)
+    assert target.exists(urls[1]) is True
+    with pytest.raises(AssertionError):
+        migrate_set_to_digest(rdb, "rdt:t")
+
+
+def test_redis_generational_filter(rdb):
+    # fake clock at the start of current 100 seconds window
+    g = int(time.time()) // 100
+    now = [g * 100.0]
+    f = RedisGenerationalFilter(
+        "rdt:test-gen", r=rdb, window=100, generations=3, clock=lambda: now[0]
+    )
+    assert f.generation() == g
+    assert f.generation_keys() == [
+        "rdt:test-gen:{}".format(g - i) for i in range(3)
+    ]
+
+    assert f.add("alice", "bob") == 2
+    assert f.add("alice") == 0
+    assert f.exists("alice") is True
+    assert f.exists("jane") is False
+    # generation key expire with the last window it is alive
+    assert rdb.ttl("rdt:test-gen:{}".format(g)) > 200
+
+    # next window, values from previous generation are still known
+    now[0] += 100
+    assert f.add("alice", "jane") == 1
+    assert len(f) == 3
+    assert f.sizeof() > 0
+    assert f.remove("bob") is True
+    assert f.remove("bob") is False
+
+    # first generation is dropped as whole
+    now[0] += 200
+    assert f.exists("alice") is False
+    assert f.exists("jane") is True
+    assert rdb.exists("rdt:test-gen:{}".format(g)) == 1
+    assert f.add("alice") == 1
+    assert rdb.exists("rdt:test-gen:{}".format(g)) == 0
+    assert rdb.smembers(f.registry_name) == {
+        str(g + 1).encode(),
+        str(g + 3).encode(),
+    }
+    assert f.expire() == 0
+
+    # digest mode
+    f.digest_bits = 64
+    assert f.add("https://example.com") == 1
+    assert f.exists("https://example.com") is True
+    assert rdb.sismember(
+        f.generation_keys()[0], key_digest("https://example.com")
+    )
+    assert "RedisGenerationalFilter" in str(f)
@@ -1,8 +1,12 @@
 """Tests for queues"""
 # pylint: disable=missing-function-docstring,redefined-outer-name
+import threading
+import time
+
 import redis
 
 from rdt import RedisLifoQueue
+from rdt.common import PutResult
 from tests.fixtures import redis_db
 
 
@@ -56,6 +60,12 @@ def test_redis_lifo_queue(rdb):
     # get block on empty queue
     assert q.get_block(timeout=1) is None
 
+    # get block bulk
+    assert q.get_block_bulk(10, timeout=1) == []
+    q.put_bulk([{"c": 1}, {"c": 2}, {"c": 3}])
+    assert q.get_block_bulk(2) == [{"c": 1}, {"c": 2}]
+    assert q.get_block_bulk(10, timeout=1) == [{"c": 3}]
+
     # key shouldn't exist after we got all elements
     assert q.exists("rdt:test-queue") is False
 
@@ -65,3 +75,145 @@ def test_redis_lifo_queue(rdb):
     # print
     assert "RedisLifoQueue" in str(q)
     assert "rdt:test-queue" in str(q)
+
+
+def test_redis_lifo_queue_packed(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb, pack_size=3)
+    assert q.packed is True
+
+    items = [{"a": i} for i in range(8)]
+    assert q.put_bulk(items) is True
+    # 3 list elements, len counts items
+    assert rdb.llen(q.name) == 3
+    assert len(q) == 8
+
+    # plain elements from single puts and other producers
+    assert q.put({"b": 1}) == 9
+    RedisLifoQueue("rdt:test-queue", r=rdb).put({"b": 2})
+    assert len(q) == 10
+
+    # unpacked transparently, rest of envelope kept in local remainder
+    assert q.get() == {"a": 0}
+    assert len(q) == 9
+    assert rdb.llen(q.name) == 4
+    assert q.get_bulk(4) == [{"a": i} for i in range(1, 5)]
+    assert q.get_block(timeout=1) == {"a": 5}
+    assert q.get_block_bulk(3, timeout=1) == [{"a": 6}, {"a": 7}, {"b": 1}]
+    assert q.get_block_bulk(10, timeout=1) == [{"b": 2}]
+    assert len(q) == 0
+    assert q.exists(q.counter_name) is False
+    assert q.get() is None
+    assert q.get_block_bulk(10, timeout=1) == []
+
+    # remainder pushed back into the head of the queue
+    q.put_bulk([{"c": 1}, {"c": 2}, {"c": 3}, {"c": 4}])
+    assert q.get() == {"c": 1}
+    assert q.return_remainder() == 2
+    assert len(q) == 3
+    plain = RedisLifoQueue("rdt:test-queue", r=rdb)
+    assert plain.get() == {"c": 2}
+    assert plain.get() == {"c": 3}
+    assert q.get_bulk(10) == [{"c": 4}]
+
+    # batches over lua unpack limit are pushed in chunks
+    q.pack_size = 2
+    q.put_bulk([{"a": i} for i in range(20000)])
+    assert rdb.llen(q.name) == 10000
+    assert len(q) == 20000
+    assert len(q.get_bulk(20000)) == 20000
+
+    # one list element per pack
+    q.pack_size = 100
+    q.put_bulk([{"url": str(i)} for i in range(1000)])
+    assert rdb.llen(q.name) == 10
+    assert len(q.get_bulk(1000)) == 1000
+
+
+def test_redis_lifo_queue_iter_items(rdb):
+    q = RedisLifoQueue("rdt:test-queue", r=rdb)
+    q.put_bulk([{"a": i} for i in range(25)])
+
+    # drain until empty
+    assert list(q.iter_items(batch_size=10)) == [{"a": i} for i in range(25)]
+    assert q.is_empty() is True
+
+    # early termination returns not consumed items
+    q.put_bulk([{"a": i} for i in range(25)])
+    for item in q.iter_items(batch_size=10):
+        if item["a"] == 3:
+            break
+    assert len(q) == 21
+    assert q.get() == {"a": 4}
+
+    # blocking mode stop after timeout without items
+    items = q.iter_items(batch_size=100, block=True, timeout=1)
+    assert len(list(items)) == 20
+
+    # packed queue
+    q = RedisLifoQueue("rdt:test-queue", r=rdb, pack_size=4)
+    q.put_bulk([{"a": i} for i in range(10)])
+    it = q.iter_items(batch_size=3)
+    assert [next(it) for _ in range(2)] == [{"a": 0}, {"a": 1}]
+    it.close()
+    assert len(q) == 8
+    assert list(q.iter_items()) == [{"a": i} for i in range(2, 10)]
+
+
+def test_redis_lifo_queue_bounded(rdb):
+    # reject
+    q = RedisLifoQueue("rdt:test-queue", r=rdb, maxlen=3)
+    assert q.put({"a": 0}) == 1
+    result = q.put_bulk_result([{"a": i} for i in range(1, 5)])
+    assert result == (2, [2, 3], 3)
+    assert q.put({"a": 5}) == 0
+    assert q.put_bulk([{"a": 6}]) is False
+    assert q.get_bulk(10) == [{"a": 0}, {"a": 1}, {"a": 2}]
+    assert q.put_bulk([{"a": 7}]) is True
+    q.get()
+
+    # drop oldest
+    q = RedisLifoQueue(
+        "rdt:test-queue", r=rdb, maxlen=3, overflow="drop_oldest"
+    )
+    q.put_bulk([{"a": i} for i in range(5)])
+    assert q.put({"a": 5}) == 3
+    assert q.get_bulk(10) == [{"a": 3}, {"a": 4}, {"a": 5}]
+    # trimmed items of the batch aren't accepted
+    result = q.put_bulk_result([{"a": i} for i in range(5)])
+    assert result == PutResult(3, [0, 1], 3)
+    q.get_bulk(10)
+
+    # batches over lua unpack limit are pushed in chunks
+    q.maxlen = 15000
+    result = q.put_bulk_result([{"a": i} for i in range(20000)])
+    assert result.accepted == 15000
+    assert result.rejected == list(range(5000))
+    assert q.get() == {"a": 5000}
+    q.overflow = "reject"
+    result = q.put_bulk_result([{"a": i} for i in range(20000)])
+    assert (result.accepted, result.length) == (1, 15000)
+    q.get_bulk(15000)
+
+    # block until consumer free space
+    q = RedisLifoQueue(
+        "rdt:test-queue", r=rdb, maxlen=2, overflow="block", max_wait=10
+    )
+    q.put_bulk([{"a": 0}, {"a": 1}])
+    assert q.put({"a": 2}, timeout=0.1) == 0
+
+    consumed = []
+
+    def consume():
+        while len(consumed) < 6:
+            consumed.extend(q.get_block_bulk(1, timeout=5))
+
+    consumer = threading.Thread(target=consume)
+    started = time.monotonic()
+    consumer.start()
+    result = q.put_bulk_result([{"a": i} for i in range(2, 6)], timeout=5)
+    consumer.join()
+    # woken up by notification, not by max_wait timeout
+    assert time.monotonic() - started < 5
+    assert result.accepted == 4
+    assert result.rejected == []
+    assert consumed == [{"a": i} for i in range(6)]
@@ -0,0 +1,126 @@
+"""Tests for reliable queue"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import operator
+import threading
+
+from rdt import RedisLifoQueue, RedisUniqueQueue, RedisReliableQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_redis_reliable_queue(rdb):
+    q = RedisReliableQueue(
+        RedisLifoQueue("rdt:test-queue", r=rdb), consumer="worker-1"
+    )
+
+    assert q.name == "rdt:test-queue"
+    assert q.processing_name == "rdt:test-queue:processing:worker-1"
+
+    # empty
+    assert q.get() is None
+    assert q.get_bulk(10) == []
+    assert q.get_block(timeout=1) is None
+
+    items = [{"a": i} for i in range(6)]
+    assert q.put_bulk(items) is True
+    assert len(q) == 6
+
+    # get moves items into processing list
+    assert q.get() == {"a": 0}
+    assert q.get_bulk(3) == [{"a": 1}, {"a": 2}, {"a": 3}]
+    assert q.get_block(timeout=1) == {"a": 4}
+    assert len(q) == 1
+    assert q.processing_len() == 5
+
+    # ack few items at once
+    assert q.ack({"a": 0}, {"a": 1}, {"a": 2}) == 3
+    assert q.ack({"a": 0}) == 0
+    assert q.processing_len() == 2
+
+    # nack return items into the head of the queue
+    assert q.nack({"a": 3}, {"a": 4}) == 2
+    assert q.processing_len() == 0
+    assert rdb.zcard(q.deadlines_name) == 0
+    assert q.get_bulk(10) == [{"a": 3}, {"a": 4}, {"a": 5}]
+
+    # nothing expired yet
+    assert q.reap() == 0
+
+    assert "RedisReliableQueue" in str(q)
+
+
+def test_redis_reliable_queue_reap(rdb):
+    uq = RedisUniqueQueue(
+        "rdt:test-unique-queue", r=rdb, keygetter=operator.itemgetter("_id")
+    )
+    crashed = RedisReliableQueue(uq, consumer="crashed", visibility_timeout=0)
+    alive = RedisReliableQueue(uq, consumer="alive", visibility_timeout=60)
+
+    assert crashed.put_bulk([{"_id": 1}, {"_id": 2}, {"_id": 3}]) is True
+    assert crashed.put({"_id": 1}) == 0  # filter still works
+
+    assert crashed.get_bulk(2) == [{"_id": 1}, {"_id": 2}]
+    assert alive.get() == {"_id": 3}
+    assert len(uq) == 0
+
+    # only items of consumer with expired timeout returned
+    assert alive.reap() == 2
+    assert crashed.processing_len() == 0
+    assert alive.processing_len() == 1
+    assert len(uq) == 2
+
+    assert alive.get_bulk(10) == [{"_id": 1}, {"_id": 2}]
+    assert alive.ack({"_id": 1}, {"_id": 2}, {"_id": 3}) == 3
+    assert alive.reap() == 0
+
+
+class RandomOrderSerializer:
+    """Serializer producing different payload for the same item"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def dumps(self, item):
+        self.calls += 1
+        return "{}|{}".format(self.calls, item)
+
+    @staticmethod
+    def loads(payload):
+        return payload.decode("utf-8").split("|", 1)[1]
+
+
+def test_redis_reliable_queue_read_and_ack_messages(rdb):
+    lq = RedisLifoQueue(
+        "rdt:test-queue", r=rdb, serializer=RandomOrderSerializer
+    )
+    q = RedisReliableQueue(lq, consumer="worker-1")
+    assert q.put_bulk(["0", "1", "2"]) is True
+
+    messages = q.read(2)
+    assert [m.item for m in messages] == ["0", "1"]
+    # item serialized again doesn't match processing list
+    assert q.ack("0") == 0
+    # message is matched by exact payload
+    assert q.ack(*messages) == 2
+    assert q.processing_len() == 0
+    assert rdb.zcard(q.deadlines_name) == 0
+
+    assert q.read(10, timeout=0.1)[0].item == "2"
+    assert q.read(10, timeout=0.1) == []
+
+
+def test_redis_reliable_queue_get_block_wakeup(rdb):
+    q = RedisReliableQueue(
+        RedisLifoQueue("rdt:test-queue", r=rdb), consumer="worker-1"
+    )
+    timer = threading.Timer(0.1, lambda: q.put({"a": 1}))
+    timer.start()
+    assert q.get_block(timeout=2) == {"a": 1}
+    timer.join()
+    # moved with deadline by script
+    assert q.processing_len() == 1
+    assert rdb.zcard(q.deadlines_name) == 1
+    assert len(q) == 0
+    assert q.get_block(timeout=0.1) is None
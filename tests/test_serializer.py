@@ -1,15 +1,26 @@
 """Test item serializer"""
 # pylint: disable=protected-access
 # pylint: disable=missing-function-docstring
+import functools
 import json
 import bson
 import pytest
+from rdt import RedisLifoQueue
 from rdt.serializers import (
     StrItemSerializer,
     BaseJsonItemSerializer,
     JsonItemSerializer,
     BsonItemSerializer,
+    BsonJsonItemSerializer,
+    OrjsonItemSerializer,
+    MsgpackItemSerializer,
+    CompressedItemSerializer,
+    SERIALIZERS,
 )
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
 
 
 def test_base_serializer():
@@ -54,3 +65,80 @@ def test_bson_serializer():
     # check functions type
     assert s._loads.__name__ == bson.BSON.decode.__name__
     assert s._dumps.__name__ == bson.BSON.encode.__name__
+
+
+def test_compressed_serializer():
+    s = CompressedItemSerializer(threshold=100)
+    assert s.serializer_name == "compressed-json"
+
+    small = {"a": 1}
+    big = {"html": "<p>hello world</p>" * 100}
+
+    # small payload kept raw, one byte header with text flag
+    assert s.dumps(small) == b"\x80" + b'{"a": 1}'
+    assert s.loads(s.dumps(small)) == small
+
+    # big payload compressed
+    assert s.dumps(big)[0] == 0x80 | CompressedItemSerializer.ZLIB
+    assert len(s.dumps(big)) < len(json.dumps(big))
+    assert s.loads(s.dumps(big)) == big
+
+    # mixed payloads decoded by any settings
+    s_lzma = CompressedItemSerializer(threshold=10, codec="lzma")
+    assert s_lzma.dumps(big)[0] == 0x80 | CompressedItemSerializer.LZMA
+    assert s.loads(s_lzma.dumps(big)) == big
+    assert s_lzma.loads(s.dumps(big)) == big
+
+    # binary wrapped serializer
+    s_bson = CompressedItemSerializer(BsonItemSerializer, threshold=100)
+    assert s_bson.dumps(big)[0] == CompressedItemSerializer.ZLIB
+    assert s_bson.loads(s_bson.dumps(big)) == big
+
+    with pytest.raises(AssertionError):
+        CompressedItemSerializer(codec="zstd")
+    with pytest.raises(ValueError):
+        s.loads(b"\x05data")
+
+
+def test_compressed_serializer_queue(rdb):
+    serializer = functools.partial(CompressedItemSerializer, threshold=100)
+    q = RedisLifoQueue("rdt:test-queue", r=rdb, serializer=serializer)
+
+    items = [{"a": 1}, {"html": "<div>text</div>" * 200}]
+    q.put_bulk(items)
+    assert rdb.memory_usage(q.name) < 1000
+    assert q.get_bulk(2) == items
+
+
+def test_binary_serializers(rdb):
+    pytest.importorskip("orjson")
+    s = OrjsonItemSerializer()
+    assert s.serializer_name == "orjson"
+    assert s.dumps({"a": 1}) == b'{"a":1}'
+    assert s.loads(b'{"a":1}') == {"a": 1}
+
+    s = BsonJsonItemSerializer()
+    assert s.loads(s.dumps({"a": 1})) == {"a": 1}
+
+    # not dict items returned as is, without copying
+    q = RedisLifoQueue("rdt:test-queue", r=rdb, serializer=OrjsonItemSerializer)
+    q.put_bulk([[1, 2], {"a": 1}])
+    assert q.get() == [1, 2]
+    assert q.get_block(timeout=1) == {"a": 1}
+
+
+def test_msgpack_serializer():
+    pytest.importorskip("msgpack")
+    s = MsgpackItemSerializer()
+    assert isinstance(s.dumps({"a": "b"}), bytes)
+    assert s.loads(s.dumps({"a": "b"})) == {"a": "b"}
+
+
+def test_serializers_registry():
+    assert SERIALIZERS["json"] is JsonItemSerializer
+    for name, serializer in SERIALIZERS.items():
+        try:
+            s = serializer()
+        except ImportError:
+            continue
+        assert name in s.serializer_name
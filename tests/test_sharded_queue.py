@@ -0,0 +1,71 @@
+"""Tests for sharded queue"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import operator
+
+import pytest
+
+from rdt import RedisShardedQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+@pytest.mark.parametrize("cluster", [False, True])
+def test_redis_sharded_queue(rdb, cluster):
+    q = RedisShardedQueue("rdt:test-sharded", r=rdb, shards=3, cluster=cluster)
+
+    assert q.shard_keys == [
+        "{rdt:test-sharded:0}",
+        "{rdt:test-sharded:1}",
+        "{rdt:test-sharded:2}",
+    ]
+    assert q.is_empty() is True
+    assert q.get() is None
+    assert q.get_bulk(10) == []
+    assert q.get_block(timeout=1) is None
+
+    # round-robin puts
+    assert q.put({"a": 0}) == 1
+    assert q.put_bulk([{"a": i} for i in range(1, 9)]) is True
+    assert q.put_bulk([]) is False
+    assert q.shard_lengths() == [3, 3, 3]
+    assert len(q) == 9
+    assert q.sizeof() > 0
+
+    # items taken evenly from all shards
+    items = q.get_bulk(3)
+    assert len(items) == 3
+    assert q.shard_lengths() == [2, 2, 2]
+
+    assert q.get() is not None
+    assert q.get_block(timeout=1) is not None
+    assert len(q.get_block_bulk(2)) == 2
+    assert len(q.get_block_bulk(10, timeout=1)) == 2
+    assert q.is_empty() is True
+
+    # uneven shards are drained completely
+    q.put_bulk([{"a": i} for i in range(3)])
+    rdb.rpush(q.shard_key(1), *[q.serializer.dumps({"b": i}) for i in range(5)])
+    assert len(q.get_bulk(100)) == 8
+    assert q.is_empty() is True
+
+    assert "RedisShardedQueue" in str(q)
+
+
+def test_redis_sharded_queue_keygetter(rdb):
+    q = RedisShardedQueue(
+        "rdt:test-sharded",
+        r=rdb,
+        shards=4,
+        keygetter=operator.itemgetter("domain"),
+    )
+
+    items = [{"domain": "example.com", "n": i} for i in range(5)]
+    q.put_bulk(items)
+    q.put({"domain": "example.com", "n": 5})
+
+    # same key always go to same shard
+    shard = q.get_shard(items[0])
+    assert q.shard_lengths()[shard] == 6
+    assert [x["n"] for x in q.get_bulk(10)] == list(range(6))
@@ -0,0 +1,76 @@
+"""Tests for stream queue"""
+# pylint: disable=missing-function-docstring,redefined-outer-name
+import time
+
+from rdt import RedisStreamQueue
+from tests.fixtures import redis_db
+
+
+rdb = redis_db  # redis fixture
+
+
+def test_redis_stream_queue(rdb):
+    q = RedisStreamQueue("rdt:test-stream", r=rdb, group="g1", consumer="c1")
+
+    assert q.is_empty() is True
+    assert q.get() is None
+    assert q.get_bulk(10) == []
+    assert q.get_block(timeout=0.1) is None
+
+    assert isinstance(q.put({"a": 0}), str)
+    assert q.put_bulk([{"a": i} for i in range(1, 5)]) is True
+    assert len(q) == 5
+    assert q.sizeof() > 0
+
+    assert q.get() == {"a": 0}
+    assert q.get_bulk(2) == [{"a": 1}, {"a": 2}]
+    assert q.get_block() == {"a": 3}
+    assert q.get_block_bulk(10, timeout=0.1) == [{"a": 4}]
+    # NOACK reads are not tracked
+    assert q.pending_len() == 0
+    # drained, delivered entries stay in stream for other groups
+    assert q.is_empty() is True
+    assert len(q) == 0
+    assert q.stream_len() == 5
+
+    # other group reads same items
+    other = RedisStreamQueue("rdt:test-stream", r=rdb, group="g2")
+    assert len(other) == 5
+    assert len(other.get_bulk(3)) == 3
+    assert len(other) == 2
+    assert other.is_empty() is False
+    assert len(other.get_bulk(10)) == 2
+
+    assert "RedisStreamQueue" in str(q)
+
+
+def test_redis_stream_queue_ack_and_claim(rdb):
+    q = RedisStreamQueue("rdt:test-stream", r=rdb, consumer="crashed")
+    q.put_bulk([{"a": i} for i in range(4)])
+
+    messages = q.read(3)
+    assert [m.item for m in messages] == [{"a": 0}, {"a": 1}, {"a": 2}]
+    assert q.pending_len() == 3
+    assert q.ack(messages[0].id) == 1
+    assert q.pending_len() == 2
+
+    # another consumer takes over stale items
+    worker = RedisStreamQueue("rdt:test-stream", r=rdb, consumer="worker")
+    assert worker.claim_stale(min_idle_time=60) == []
+    time.sleep(0.05)
+    claimed = worker.claim_stale(min_idle_time=0.01)
+    assert [m.item for m in claimed] == [{"a": 1}, {"a": 2}]
+    assert worker.ack(*[m.id for m in claimed]) == 2
+    assert worker.read(10, timeout=0.1)[0].item == {"a": 3}
+
+
+def test_redis_stream_queue_maxlen(rdb):
+    q = RedisStreamQueue("rdt:test-stream", r=rdb, maxlen=10)
+    q.put_bulk([{"a": i} for i in range(1000)])
+    # trimming is approximate
+    assert q.stream_len() < 1000
+    assert len(q) == q.stream_len()
+    assert q.trim(0) >= 0
+
+    # bounded by default
+    assert RedisStreamQueue("rdt:test-stream", r=rdb).maxlen == 100000
@@ -4,6 +4,7 @@ import operator
 
 import redis
 
+from rdt.filters import key_digest
 from rdt.unique_queue import RedisUniqueQueue
 from tests.fixtures import redis_db
 
@@ -98,8 +99,8 @@ def test_redis_unique_queue_keygetter(rdb):
     ]
     assert q.put_bulk(items) is True
 
-    # len
-    assert len(q) == 3
+    # len, duplicated key inside the batch is filtered too
+    assert len(q) == 2
 
     # check in filter
     assert q.in_filter({"payload": {"key": "b"}, "bob": 1}) is True
@@ -109,7 +110,7 @@ def test_redis_unique_queue_keygetter(rdb):
     assert q.sizeof() > 0
 
     # get bulk
-    assert len(q.get_bulk(2)) == 2
+    assert len(q.get_bulk(1)) == 1
     assert len(q.get_bulk(10)) == 1
     assert q.is_empty() is True
 
@@ -146,3 +147,65 @@ def test_redis_unique_queue_bulk_items_already_in_filter(rdb):
 
     assert q.put_bulk(items) is True
     assert q.put_bulk(items) is False
+
+
+def test_redis_unique_queue_put_bulk_result(rdb):
+    """Test exact accept/reject report of put_bulk_result"""
+    q = RedisUniqueQueue(
+        "rdt:test-unique-queue", r=rdb, keygetter=operator.itemgetter("_id")
+    )
+
+    assert q.put({"_id": 1}) == 1
+
+    items = [{"_id": 1}, {"_id": 2}, {"_id": 3}, {"_id": 2}]
+    result = q.put_bulk_result(items)
+    assert result.accepted == 2
+    assert result.rejected == [0, 3]
+    assert result.length == 3
+
+    # nothing new
+    result = q.put_bulk_result(items)
+    assert result.accepted == 0
+    assert result.rejected == [0, 1, 2, 3]
+    assert result.length == 3
+
+    # empty batch
+    assert q.put_bulk_result([]) == (0, [], 3)
+
+    assert [item["_id"] for item in q.get_block_bulk(2)] == [1, 2]
+    assert [item["_id"] for item in q.get_block_bulk(10)] == [3]
+    assert q.get_block_bulk(10, timeout=1) == []
+    assert q.filter_len() == 3
+
+
+def test_redis_unique_queue_iter_items(rdb):
+    q = RedisUniqueQueue("rdt:test-unique-queue", r=rdb)
+    q.put_bulk([str(i) for i in range(10)])
+
+    it = q.iter_items(batch_size=4)
+    assert next(it) == "0"
+    it.close()
+    # returned items are still in filter
+    assert len(q) == 9
+    assert q.put("1") == 0
+
+    assert list(q.iter_items(block=True, timeout=1)) == [
+        str(i) for i in range(1, 10)
+    ]
+
+
+def test_redis_unique_queue_digest(rdb):
+    q = RedisUniqueQueue(
+        "rdt:test-unique-queue",
+        r=rdb,
+        keygetter=operator.itemgetter("url"),
+        digest_bits=128,
+    )
+    items = [{"url": "https://example.com/{}".format(i)} for i in range(3)]
+    assert q.put_bulk_result(items + items[:1]) == (3, [3], 3)
+    assert q.in_filter(items[0]) is True
+    assert q.in_filter({"url": "https://example.com/new"}) is False
+    assert rdb.smembers(q.filter_name) == {
+        key_digest(item["url"], 128) for item in items
+    }
+    assert q.get_bulk(3) == items